@@ -0,0 +1,11 @@
+"""
+Бенчмарки бэкенда: генератор синтетических данных + прогон с JSON-результатом.
+
+Запуск из папки backend (tennis_parser — из корня репозитория, отсюда PYTHONPATH=..),
+на ОТДЕЛЬНОЙ локальной базе после `alembic upgrade head` (синк daily в бенчмарке
+удаляет матчи, которых нет в синтетической таблице):
+    DATABASE_URL=postgresql://localhost/tennis_bench python -m benchmarks.datagen --users 2000
+    DATABASE_URL=postgresql://localhost/tennis_bench PYTHONPATH=.. python -m benchmarks.run --out results.json
+    PYTHONPATH=.. python -m benchmarks.run --offline --out results.json       # только чистый CPU, без БД
+    PYTHONPATH=.. python -m benchmarks.run --baseline old.json --out new.json # exit 1 при регрессии
+"""
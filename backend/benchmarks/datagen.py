@@ -0,0 +1,383 @@
+"""
+Синтетические данные для бенчмарков: турниры всех размеров сетки (R32/R64/R128),
+N юзеров со случайными (но согласованными) сетками, daily-матчи и прогнозы.
+Тот же генератор отдаёт строки Google-таблиц (tournaments, листы сеток,
+DAILY_MATCHES, DICTIONARY) и события Tennis API — для бенчмарков парсеров.
+
+Всё детерминировано по --seed: один и тот же seed = одни и те же данные.
+
+Загрузить в локальную базу (ID-диапазоны бенчмарка, боевые строки не трогаются):
+    DATABASE_URL=postgresql://localhost/tennis_bench python -m benchmarks.datagen --users 2000
+Удалить:
+    DATABASE_URL=postgresql://localhost/tennis_bench python -m benchmarks.datagen --reset
+"""
+import argparse
+import csv
+import io
+import logging
+import os
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+# Диапазоны ID бенчмарка (database/explain_check занимает 900000 / 9000000000)
+T_BASE = 800000
+U_BASE = 8000000000
+DAILY_PREFIX = "benchd"
+
+DRAW_SIZES = (32, 64, 128)
+ROUND_ORDER = ("R128", "R64", "R32", "R16", "QF", "SF", "F")
+FIRST_ROUND = {32: "R32", 64: "R64", 128: "R128"}
+# (type, tag) -> веса очков и размер сетки как у боевых турниров
+KIND = {32: ("ATP-250", "ATP"), 64: ("ATP-1000", "ATP"), 128: ("Grand Slam", "ТБШ")}
+# У ACTIVE-турнира сыграны только первые раунды
+ACTIVE_DECIDED_ROUNDS = 2
+
+DAILY_START = date(2030, 1, 1)
+DAILY_TOURNAMENTS = ["ATP Bench Open", "WTA Bench Cup", "ATP Synthetic Masters", "WTA Generated Classic"]
+
+# Только буквы: normalize_name в bracket_status выкидывает цифры
+FIRST_NAMES = ["Alex", "Boris", "Carlos", "Daniil", "Emil", "Felix", "Grigor", "Holger",
+               "Ivan", "Jannik", "Karen", "Lorenzo", "Matteo", "Novak", "Oscar", "Pablo"]
+LAST_NAMES = ["Abbott", "Barkov", "Castro", "Dorin", "Evans", "Fokin", "Garin", "Hurkacz",
+              "Ivashka", "Jarry", "Kovac", "Lehecka", "Muller", "Norrie", "Ofner", "Popyrin"]
+
+SHEET_DATE = "%d.%m.%Y %H:%M"
+
+
+@dataclass
+class Config:
+    users: int = 1000
+    per_size: int = 2          # турниров на каждый размер сетки; последний — ACTIVE
+    days: int = 30
+    matches_per_day: int = 40
+    daily_share: float = 0.3   # доля юзеров, играющих daily
+    seed: int = 42
+
+
+# ==========================================
+# ГЕНЕРАЦИЯ (ЧИСТЫЕ ФУНКЦИИ)
+# ==========================================
+
+def rounds_for(draw_size: int) -> Tuple[str, ...]:
+    return ROUND_ORDER[ROUND_ORDER.index(FIRST_ROUND[draw_size]):]
+
+def tournaments(cfg: Config) -> List[dict]:
+    result = []
+    for size in DRAW_SIZES:
+        t_type, tag = KIND[size]
+        for k in range(cfg.per_size):
+            tid = T_BASE + size * 10 + k
+            active = k == cfg.per_size - 1
+            result.append({
+                "id": tid, "name": f"Bench {size} #{k + 1}", "status": "ACTIVE" if active else "CLOSED",
+                "sheet_name": f"bench_{tid}", "starting_round": FIRST_ROUND[size],
+                "type": t_type, "tag": tag, "draw_size": size,
+                "start": "01.01.2020 10:00", "close": "01.01.2099 10:00" if active else "08.01.2020 10:00",
+            })
+    return result
+
+def _set_scores(rng: random.Random, winner_first: bool) -> List[str]:
+    sets = []
+    for _ in range(rng.choice((2, 3))):
+        loser = rng.randint(0, 4)
+        sets.append(f"6-{loser}" if winner_first else f"{loser}-6")
+    return sets + [None] * (5 - len(sets))
+
+def true_draw(t: dict, rng: random.Random) -> List[dict]:
+    """Согласованная сетка: игроки раунда = победители предыдущего."""
+    rounds = rounds_for(t["draw_size"])
+    all_names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    players = rng.sample(all_names, t["draw_size"])
+    decided = len(rounds) if t["status"] == "CLOSED" else ACTIVE_DECIDED_ROUNDS
+
+    rows, prev_winners = [], None
+    for r_idx, round_name in enumerate(rounds):
+        count = t["draw_size"] >> (r_idx + 1)
+        winners = []
+        for m in range(count):
+            if prev_winners is None:
+                p1, p2 = players[2 * m], players[2 * m + 1]
+            else:
+                p1, p2 = prev_winners[2 * m], prev_winners[2 * m + 1]
+            winner = None
+            if r_idx < decided and p1 and p2:
+                winner = p1 if rng.random() < 0.6 else p2
+            sets = _set_scores(rng, winner == p1) if winner else [None] * 5
+            rows.append({
+                "tournament_id": t["id"], "round": round_name, "match_number": m + 1,
+                "player1": p1, "player2": p2, "winner": winner,
+                "set1": sets[0], "set2": sets[1], "set3": sets[2], "set4": sets[3], "set5": sets[4],
+            })
+            winners.append(winner)
+        prev_winners = winners
+    if t["status"] == "CLOSED" and prev_winners and prev_winners[0]:
+        champion = prev_winners[0]
+        rows.append({
+            "tournament_id": t["id"], "round": "Champion", "match_number": 1,
+            "player1": champion, "player2": None, "winner": champion,
+            "set1": None, "set2": None, "set3": None, "set4": None, "set5": None,
+        })
+    return rows
+
+def user_bracket(t: dict, draw_rows: List[dict], rng: random.Random) -> List[dict]:
+    """
+    Сетка юзера: в первом раунде выбор из реальной пары, дальше — из своих
+    же победителей. player1/player2 — реальная пара слота (как пишет save_picks).
+    """
+    rounds = rounds_for(t["draw_size"])
+    real = {(d["round"], d["match_number"]): d for d in draw_rows}
+    picks, prev = [], None
+    for r_idx, round_name in enumerate(rounds):
+        count = t["draw_size"] >> (r_idx + 1)
+        chosen = []
+        for m in range(count):
+            slot = real.get((round_name, m + 1)) or {}
+            if prev is None:
+                options = (slot.get("player1"), slot.get("player2"))
+            else:
+                options = (prev[2 * m], prev[2 * m + 1])
+            pick = options[0] if rng.random() < 0.55 else options[1]
+            picks.append({"round": round_name, "match_number": m + 1, "predicted_winner": pick,
+                          "player1": slot.get("player1") or "TBD", "player2": slot.get("player2") or "TBD"})
+            chosen.append(pick)
+        prev = chosen
+    picks.append({"round": "Champion", "match_number": 1, "predicted_winner": prev[0],
+                  "player1": "TBD", "player2": "TBD"})
+    return picks
+
+def daily(cfg: Config, rng: random.Random) -> Tuple[List[dict], List[dict]]:
+    matches = []
+    for d in range(cfg.days):
+        day = DAILY_START + timedelta(days=d)
+        last_day = d == cfg.days - 1
+        for m in range(cfg.matches_per_day):
+            start = datetime.combine(day, datetime.min.time()) + timedelta(hours=10 + m % 12, minutes=(m * 7) % 60)
+            winner = None if last_day else rng.choice((1, 2))
+            matches.append({
+                "id": f"{DAILY_PREFIX}_{d}_{m}", "tournament": DAILY_TOURNAMENTS[m % len(DAILY_TOURNAMENTS)],
+                "status": "PLANNED" if last_day else "COMPLETED", "round": "R32",
+                "start_time": start, "match_date": day,
+                "player1": f"{FIRST_NAMES[m % 16]} {LAST_NAMES[(m + d) % 16]}",
+                "player2": f"{FIRST_NAMES[(m + 5) % 16]} {LAST_NAMES[(m + d + 3) % 16]}",
+                "score": "" if last_day else "6-4 6-3", "winner": winner,
+            })
+    players = [U_BASE + u for u in range(1, cfg.users + 1) if rng.random() < cfg.daily_share]
+    picks = []
+    for user_id in players:
+        for match in matches:
+            if rng.random() < 0.7:
+                pick = rng.choice((1, 2))
+                correct = None if match["winner"] is None else pick == match["winner"]
+                picks.append({"user_id": user_id, "match_id": match["id"], "predicted_winner": pick,
+                              "is_correct": correct, "points": 1 if correct else 0})
+    return matches, picks
+
+def daily_rng(cfg: Config) -> random.Random:
+    """Daily — свой поток случайных чисел: не зависит от числа турниров и юзеров в сетках."""
+    return random.Random(cfg.seed + 1)
+
+def as_objects(rows: List[dict]) -> List[SimpleNamespace]:
+    """Строки -> объекты с атрибутами (как ORM) для офлайн-бенчмарков."""
+    return [SimpleNamespace(**row) for row in rows]
+
+
+# ==========================================
+# СТРОКИ GOOGLE-ТАБЛИЦ И СОБЫТИЯ API
+# ==========================================
+
+def tournaments_sheet(ts: List[dict]) -> List[list]:
+    rows = [["ID", "Name", "Dates", "Status", "Sheet", "Round", "Type", "Start", "Close", "Tag",
+             "Surface", "Champion", "Info", "Matches", "Month", "Image"]]
+    for t in ts:
+        rows.append([str(t["id"]), t["name"], "01-08 Jan", t["status"], t["sheet_name"], t["starting_round"],
+                     t["type"], t["start"], t["close"], t["tag"], "Hard", "", "", "", "January", ""])
+    return rows
+
+def bracket_sheet(t: dict, draw_rows: List[dict]) -> List[list]:
+    """Лист сетки в раскладке, которую читает _sync_tournaments_logic."""
+    from services.sync_service import get_match_rows
+
+    rounds = rounds_for(t["draw_size"])
+    header = []
+    for round_name in rounds:
+        header += [round_name, "", "", "", "", ""]
+    header.append("Champion")
+    data = [header] + [[""] * len(header) for _ in range(t["draw_size"] * 2 + 2)]
+
+    by_slot = {(d["round"], d["match_number"]): d for d in draw_rows}
+    for r_idx, round_name in enumerate(rounds):
+        col = r_idx * 6
+        for i, row_idx in enumerate(get_match_rows(round_name, t["draw_size"])):
+            match = by_slot.get((round_name, i + 1))
+            if not match: continue
+            data[row_idx][col] = match["player1"] or ""
+            data[row_idx + 1][col] = match["player2"] or ""
+            for s in range(5):
+                score = match[f"set{s + 1}"]
+                if score:
+                    a, b = score.split("-")
+                    data[row_idx][col + 1 + s] = a
+                    data[row_idx + 1][col + 1 + s] = b
+    champion = by_slot.get(("Champion", 1))
+    if champion:
+        data[1][len(header) - 1] = champion["winner"]
+    return data
+
+def daily_sheet(matches: List[dict]) -> List[list]:
+    rows = [["ID", "Tournament", "Status", "Round", "Time", "Player 1", "Player 2", "Score", "Winner", "Manual Block"]]
+    for m in matches:
+        rows.append([m["id"], m["tournament"], m["status"], m["round"], m["start_time"].strftime(SHEET_DATE),
+                     m["player1"], m["player2"], m["score"], str(m["winner"] or ""), ""])
+    return rows
+
+def dictionary_sheet(size: int) -> List[list]:
+    rows = [["Full", "", "", "Short", "", "Flag", "", "", "", "Rus"]]
+    for i in range(size):
+        first, last = FIRST_NAMES[i % 16], LAST_NAMES[(i // 16) % 16]
+        rows.append([f"{first} {last} {i}", "", "", f"{first[0]}. {last} {i}", "", "🏳️", "", "", "", f"Игрок {i}"])
+    return rows
+
+def api_events(count: int, rng: random.Random) -> List[dict]:
+    """События в формате Tennis API: туры, челленджеры, пары, квалификация — как в живом дне."""
+    kinds = [("Atp Singles", "ATP Bench Open"), ("Wta Singles", "WTA Bench Cup"),
+             ("Challenger Men Singles", "Bench Challenger"), ("Atp Doubles", "ATP Bench Open"),
+             ("Itf Men Singles", "M25 Bench")]
+    events = []
+    for i in range(count):
+        etype, t_name = kinds[i % len(kinds)]
+        first = f"{FIRST_NAMES[i % 16][0]}. {LAST_NAMES[(i // 16) % 16]}"
+        second = f"{FIRST_NAMES[(i + 3) % 16][0]}. {LAST_NAMES[(i // 16 + 5) % 16]}"
+        if "Doubles" in etype:
+            first, second = f"{first}/{second}", f"{second}/{first}"
+        finished = rng.random() < 0.5
+        events.append({
+            "event_key": 10_000_000 + i, "tournament_key": 100 + i % 40, "tournament_name": t_name,
+            "event_type_type": etype, "event_first_player": first, "event_second_player": second,
+            "event_status": "Finished" if finished else ("Set 2" if rng.random() < 0.3 else ""),
+            "event_live": "0", "event_winner": "First Player" if finished else None,
+            "event_date": "2030-01-15", "event_time": f"{10 + i % 12:02d}:{(i * 5) % 60:02d}",
+            "tournament_round": "Qualification" if i % 17 == 0 else f"ATP {t_name} - 1/16-finals",
+            "scores": [{"score_first": "6", "score_second": "4"}, {"score_first": "7.7", "score_second": "6.5"}],
+        })
+    return events
+
+
+# ==========================================
+# ЗАГРУЗКА В POSTGRES
+# ==========================================
+
+def check_local(engine) -> None:
+    """Данные пишутся и удаляются: только локальная база, если явно не разрешено иное."""
+    host = engine.url.host
+    if host not in (None, "", "localhost", "127.0.0.1", "::1") and os.getenv("BENCH_ALLOW_REMOTE") != "1":
+        raise SystemExit(f"Refusing to write benchmark data to {host} (set BENCH_ALLOW_REMOTE=1 to override)")
+
+def _copy(cur, table: str, columns: List[str], rows: List[dict]) -> None:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in columns])
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+def reset(engine) -> None:
+    check_local(engine)
+    t_range = (T_BASE, T_BASE + 10_000)
+    u_range = (U_BASE, U_BASE + 100_000_000)
+    with engine.begin() as conn:
+        conn.execute(text("SELECT set_config('app.change_source', 'sync', true)"))
+        conn.execute(text("DELETE FROM daily_picks WHERE match_id LIKE :p OR user_id BETWEEN :u0 AND :u1"),
+                     {"p": f"{DAILY_PREFIX}\\_%", "u0": u_range[0], "u1": u_range[1]})
+        conn.execute(text("DELETE FROM daily_matches WHERE id LIKE :p"), {"p": f"{DAILY_PREFIX}\\_%"})
+        conn.execute(text("DELETE FROM daily_leaderboard WHERE user_id BETWEEN :u0 AND :u1"),
+                     {"u0": u_range[0], "u1": u_range[1]})
+        for table in ("user_picks", "user_scores", "leaderboard", "true_draw"):
+            conn.execute(text(f"DELETE FROM {table} WHERE tournament_id BETWEEN :t0 AND :t1"),
+                         {"t0": t_range[0], "t1": t_range[1]})
+        conn.execute(text("DELETE FROM tournaments WHERE id BETWEEN :t0 AND :t1"), {"t0": t_range[0], "t1": t_range[1]})
+        conn.execute(text("DELETE FROM users WHERE user_id BETWEEN :u0 AND :u1"), {"u0": u_range[0], "u1": u_range[1]})
+    logger.info("🧹 Benchmark data removed")
+
+def load(engine, cfg: Config) -> Dict[str, int]:
+    check_local(engine)
+    reset(engine)
+    rng = random.Random(cfg.seed)
+
+    ts = tournaments(cfg)
+    draws = {t["id"]: true_draw(t, rng) for t in ts}
+    users = [{"user_id": U_BASE + u, "first_name": f"Bench {u}", "last_name": None, "username": f"bench{u}"}
+             for u in range(1, cfg.users + 1)]
+    picks = []
+    for t in ts:
+        for user in users:
+            for pick in user_bracket(t, draws[t["id"]], rng):
+                picks.append({"user_id": user["user_id"], "tournament_id": t["id"], **pick})
+    matches, daily_picks = daily(cfg, daily_rng(cfg))
+
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            # Синк пересчитывает сам — change-feed запущенного бэкенда не должен пересчитывать
+            cur.execute("SELECT set_config('app.change_source', 'sync', true)")
+            _copy(cur, "tournaments", ["id", "name", "status", "sheet_name", "starting_round", "type", "tag", "start", "close"], ts)
+            _copy(cur, "users", ["user_id", "first_name", "last_name", "username"], users)
+            _copy(cur, "true_draw", ["tournament_id", "round", "match_number", "player1", "player2", "winner",
+                                     "set1", "set2", "set3", "set4", "set5"], [r for rows in draws.values() for r in rows])
+            _copy(cur, "user_picks", ["user_id", "tournament_id", "round", "match_number", "player1", "player2",
+                                      "predicted_winner"], picks)
+            _copy(cur, "daily_matches", ["id", "tournament", "status", "round", "start_time", "match_date",
+                                         "player1", "player2", "score", "winner"], matches)
+            _copy(cur, "daily_picks", ["user_id", "match_id", "predicted_winner", "is_correct", "points"], daily_picks)
+            cur.execute("""
+                INSERT INTO daily_leaderboard (user_id, total_points, correct_picks, total_picks)
+                SELECT user_id, SUM(points), COUNT(*) FILTER (WHERE is_correct), COUNT(*) FILTER (WHERE is_correct IS NOT NULL)
+                FROM daily_picks WHERE match_id LIKE %s GROUP BY user_id
+                ON CONFLICT (user_id) DO UPDATE SET total_points = EXCLUDED.total_points,
+                    correct_picks = EXCLUDED.correct_picks, total_picks = EXCLUDED.total_picks
+            """, (f"{DAILY_PREFIX}\\_%",))
+            for table in ("tournaments", "users", "true_draw", "user_picks", "daily_matches", "daily_picks", "daily_leaderboard"):
+                cur.execute(f"ANALYZE {table}")
+        raw.commit()
+    finally:
+        raw.close()
+
+    # Очки и лидерборды — боевой функцией, как после синка
+    from database.db import SessionLocal
+    from utils.score_calculator import update_tournament_leaderboard
+    db = SessionLocal()
+    try:
+        for t in ts:
+            update_tournament_leaderboard(t["id"], db)
+    finally:
+        db.close()
+
+    stats = {"tournaments": len(ts), "users": len(users), "user_picks": len(picks),
+             "daily_matches": len(matches), "daily_picks": len(daily_picks)}
+    logger.info("📦 Loaded: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic benchmark data")
+    parser.add_argument("--users", type=int, default=Config.users)
+    parser.add_argument("--per-size", type=int, default=Config.per_size, help="турниров на размер сетки")
+    parser.add_argument("--days", type=int, default=Config.days)
+    parser.add_argument("--matches-per-day", type=int, default=Config.matches_per_day)
+    parser.add_argument("--daily-share", type=float, default=Config.daily_share)
+    parser.add_argument("--seed", type=int, default=Config.seed)
+    parser.add_argument("--reset", action="store_true", help="только удалить данные бенчмарка")
+    args = parser.parse_args()
+
+    from database.db import engine
+    if args.reset:
+        reset(engine)
+    else:
+        load(engine, Config(args.users, args.per_size, args.days, args.matches_per_day, args.daily_share, args.seed))
@@ -0,0 +1,296 @@
+"""
+Прогон бенчмарков бэкенда: время горячих путей на синтетических данных.
+Результат — JSON (min/p50/p95/max по каждому кейсу) для сравнения между коммитами.
+
+    PYTHONPATH=.. python -m benchmarks.run --offline --out results.json
+    DATABASE_URL=postgresql://localhost/tennis_bench PYTHONPATH=.. python -m benchmarks.run --out results.json
+    PYTHONPATH=.. python -m benchmarks.run --baseline old.json --out new.json   # exit 1, если p50 вырос > threshold
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+# config.py падает без этих переменных; боту и таблицам бенчмарк не ходит
+for _var in ("TELEGRAM_BOT_TOKEN", "GOOGLE_SHEET_ID", "GOOGLE_CREDENTIALS"):
+    os.environ.setdefault(_var, "bench")
+
+from benchmarks import datagen
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+SUITE_VERSION = 1
+DEFAULT_THRESHOLD = 0.2
+
+
+# ==========================================
+# ИЗМЕРЕНИЕ
+# ==========================================
+
+def measure(fn: Callable[[], Optional[int]], repeat: int, warmup: int = 1, setup: Callable[[], None] = None) -> dict:
+    """
+    fn возвращает число обработанных элементов (или None).
+    setup выполняется перед каждым прогоном и в замер не входит (сброс кэшей).
+    """
+    for _ in range(warmup):
+        if setup: setup()
+        fn()
+    timings, items = [], None
+    for _ in range(repeat):
+        if setup: setup()
+        started = time.perf_counter()
+        items = fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    ms = [t * 1000 for t in timings]
+    return {
+        "repeat": repeat, "items": items,
+        "min_ms": round(ms[0], 3), "p50_ms": round(ms[len(ms) // 2], 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "max_ms": round(ms[-1], 3), "mean_ms": round(statistics.fmean(ms), 3),
+    }
+
+
+# ==========================================
+# ОФЛАЙН-КЕЙСЫ (ЧИСТЫЙ CPU)
+# ==========================================
+
+def offline_cases(cfg: datagen.Config, repeat: int) -> Dict[str, dict]:
+    from tennis_parser import core
+    from utils.bracket import generate_bracket
+    from utils.bracket_status import enrich_bracket_with_status, reconstruct_fantasy_bracket
+
+    rng = random.Random(cfg.seed)
+    results = {}
+
+    # --- Сетки: генерация + фэнтези-реконструкция для закрытого турнира ---
+    for t in datagen.tournaments(cfg):
+        if t["status"] != "CLOSED": continue
+        size = t["draw_size"]
+        if f"bracket.generate[R{size}]" in results: continue
+        draw_rows = datagen.true_draw(t, rng)
+        true_draws = datagen.as_objects(draw_rows)
+        user_picks = datagen.as_objects(datagen.user_bracket(t, draw_rows, rng))
+        tournament = SimpleNamespace(id=t["id"])
+        rounds = list(datagen.rounds_for(size)) + ["Champion"]
+
+        results[f"bracket.generate[R{size}]"] = measure(
+            lambda: len(generate_bracket(tournament, true_draws, user_picks, rounds)), repeat)
+
+        def fantasy():
+            # reconstruct меняет сетку на месте — строим заново, как в роутере
+            bracket = generate_bracket(tournament, true_draws, user_picks, rounds)
+            bracket = reconstruct_fantasy_bracket(bracket, user_picks)
+            return len(enrich_bracket_with_status(bracket, true_draws))
+        results[f"bracket.fantasy[R{size}]"] = measure(fantasy, repeat)
+
+    # --- Парсеры листов и событий API ---
+    dictionary_rows = datagen.dictionary_sheet(2000)
+    results["parser.parse_dictionary"] = measure(lambda: len(core.parse_dictionary(dictionary_rows)), repeat)
+
+    matches, _ = datagen.daily(cfg, rng)
+    sheet_rows = datagen.daily_sheet(matches)
+    for i, row in enumerate(sheet_rows[1:]):
+        if i % 10 == 0: row[9] = "X" if i % 20 else "M"
+    results["parser.sheet_overlay"] = measure(lambda: len(core.sheet_overlay(sheet_rows)), repeat)
+
+    player_dict = core.parse_dictionary(dictionary_rows)
+    events = datagen.api_events(3000, rng)
+    results["parser.process_matches[cold]"] = measure(
+        lambda: len(core.process_matches(events, player_dict)), repeat, setup=core._tournament_decisions.clear)
+    results["parser.process_matches[warm]"] = measure(lambda: len(core.process_matches(events, player_dict)), repeat)
+
+    try:
+        from tennis_parser import daily_sheet_writer as writer
+    except ImportError as e:
+        logger.warning(f"⚠️ daily_sheet_writer skipped: {e}")
+    else:
+        processed = core.process_matches(events, player_dict)
+        # Половина матчей уже в таблице (часть с изменённым счётом), половина новых
+        existing = [writer.HEADER] + [row[:8] + [str(row[8] or ""), ""] for row in processed[::2]]
+        for row in existing[1::3]:
+            row[7] = "0-0"
+        api_map = {row[0]: row for row in processed}
+        dates = {"2030-01-15"}
+        results["parser.daily_sheet_plan"] = measure(
+            lambda: len(writer.plan(existing, api_map, dates)[0]), repeat)
+    return results
+
+
+# ==========================================
+# КЕЙСЫ С БАЗОЙ
+# ==========================================
+
+class _SheetClient:
+    """Подменяет gspread-клиент синка: листы отдаются из памяти (сеть не меряем)."""
+
+    def __init__(self, sheets: Dict[str, List[list]]):
+        self._sheets = sheets
+
+    def open_by_key(self, key):
+        return self
+
+    def worksheet(self, name):
+        if name not in self._sheets:
+            raise KeyError(name)
+        return SimpleNamespace(get_all_values=lambda: [list(row) for row in self._sheets[name]])
+
+
+def db_cases(cfg: datagen.Config, repeat: int) -> Dict[str, dict]:
+    from database.db import SessionLocal, engine
+    from routers import daily, leaderboard, users
+    from services import sync_service, tournament_registry
+    from utils.pick_handler import save_picks_bulk_transaction
+    from utils.score_calculator import update_tournament_leaderboard
+
+    datagen.check_local(engine)
+    ts = datagen.tournaments(cfg)
+    # Тот же порядок вызовов, что в datagen.load -> те же сетки, что лежат в базе
+    rng = random.Random(cfg.seed)
+    draws = {t["id"]: datagen.true_draw(t, rng) for t in ts}
+    results = {}
+    db = SessionLocal()
+    try:
+        tournament_registry.refresh(db)
+        missing = [t["id"] for t in ts if tournament_registry.get(t["id"]) is None]
+        if missing:
+            raise SystemExit(f"No benchmark data for {missing}: run `python -m benchmarks.datagen` first")
+
+        # --- Пересчёт очков и лидерборда турнира ---
+        for t in ts:
+            if t["status"] != "CLOSED": continue
+            key = f"score.update_tournament_leaderboard[R{t['draw_size']}]"
+            if key in results: continue
+            results[key] = measure(lambda tid=t["id"]: len(update_tournament_leaderboard(tid, db) or []), repeat)
+
+        # --- Сохранение сетки юзера (ACTIVE-турнир, реальные UPDATE) ---
+        active = next(t for t in ts if t["status"] == "ACTIVE" and t["draw_size"] == 128)
+        draw_rows = draws[active["id"]]
+        variants = [
+            [SimpleNamespace(tournament_id=active["id"], round=p["round"], match_number=p["match_number"],
+                             predicted_winner=p["predicted_winner"])
+             for p in datagen.user_bracket(active, draw_rows, rng)]
+            for _ in range(2)
+        ]
+        state = {"i": 0}
+        def save_picks():
+            state["i"] += 1
+            return len(save_picks_bulk_transaction(variants[state["i"] % 2], db, datagen.U_BASE + 1))
+        results["picks.save_picks_bulk_transaction[R128]"] = measure(save_picks, repeat)
+
+        # --- Профиль и лидерборды (кэши роутеров сбрасываются перед каждым прогоном) ---
+        me = {"id": datagen.U_BASE + 1}
+        results["users.get_profile_stats"] = measure(
+            lambda: len(users.get_profile_stats(db=db, user=me).history), repeat)
+
+        clear_lb = leaderboard._lb_cache.clear
+        closed_ids = ",".join(str(t["id"]) for t in ts if t["status"] == "CLOSED")
+        results["leaderboard.global"] = measure(
+            lambda: len(leaderboard.get_global_leaderboard(db=db)), repeat, setup=clear_lb)
+        results["leaderboard.list"] = measure(
+            lambda: len(leaderboard.get_tournaments_with_ranks(db=db, user=me)), repeat, setup=clear_lb)
+        results["leaderboard.tournament[R128]"] = measure(
+            lambda: len(leaderboard.get_tournament_leaderboard(ts[-1]["id"], db=db)), repeat, setup=clear_lb)
+        results["leaderboard.combined"] = measure(
+            lambda: len(leaderboard.get_combined_leaderboard(closed_ids, db=db)), repeat, setup=clear_lb)
+
+        clear_daily = daily._leaderboard_cache.clear
+        results["daily.leaderboard[ALL]"] = measure(
+            lambda: len(daily.get_daily_leaderboard(tournament_filter=None, db=db)), repeat, setup=clear_daily)
+        results["daily.leaderboard[ATP]"] = measure(
+            lambda: len(daily.get_daily_leaderboard(tournament_filter="ATP", db=db)), repeat, setup=clear_daily)
+    finally:
+        db.close()
+
+    # --- Синк из таблиц: те же данные, что в базе (upsert без изменений) ---
+    matches, _ = datagen.daily(cfg, datagen.daily_rng(cfg))
+    sheets = {"tournaments": datagen.tournaments_sheet(ts), "DAILY_MATCHES": datagen.daily_sheet(matches)}
+    for t in ts:
+        sheets[t["sheet_name"]] = datagen.bracket_sheet(t, draws[t["id"]])
+    original_client = sync_service.get_google_sheets_client
+    sync_service.get_google_sheets_client = lambda: _SheetClient(sheets)
+    try:
+        results["sync.tournaments"] = measure(lambda: sync_service._sync_tournaments_logic(engine), max(1, repeat // 5))
+        results["sync.daily"] = measure(lambda: sync_service._sync_daily_logic(engine), max(1, repeat // 5))
+    finally:
+        sync_service.get_google_sheets_client = original_client
+    return results
+
+
+# ==========================================
+# ОТЧЁТ И СРАВНЕНИЕ
+# ==========================================
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """Кейсы, у которых p50 вырос больше чем на threshold (доля) относительно baseline."""
+    regressions = []
+    for name, result in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("p50_ms"): continue
+        ratio = result["p50_ms"] / old["p50_ms"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {old['p50_ms']}ms -> {result['p50_ms']}ms (x{ratio:.2f})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backend benchmarks")
+    parser.add_argument("--offline", action="store_true", help="только кейсы без базы")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--users", type=int, default=datagen.Config.users, help="должно совпадать с datagen")
+    parser.add_argument("--per-size", type=int, default=datagen.Config.per_size)
+    parser.add_argument("--days", type=int, default=datagen.Config.days)
+    parser.add_argument("--matches-per-day", type=int, default=datagen.Config.matches_per_day)
+    parser.add_argument("--seed", type=int, default=datagen.Config.seed)
+    parser.add_argument("--out", help="куда записать JSON")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="допустимый рост p50 (0.2 = +20%%)")
+    args = parser.parse_args()
+
+    cfg = datagen.Config(users=args.users, per_size=args.per_size, days=args.days,
+                         matches_per_day=args.matches_per_day, seed=args.seed)
+    started_at = datetime.now(timezone.utc).isoformat()
+    results = offline_cases(cfg, args.repeat)
+    if not args.offline:
+        results.update(db_cases(cfg, args.repeat))
+
+    report = {
+        "suite": "backend", "version": SUITE_VERSION, "started_at": started_at, "commit": _git_commit(),
+        "python": platform.python_version(), "offline": args.offline,
+        "params": {"users": cfg.users, "per_size": cfg.per_size, "days": cfg.days,
+                   "matches_per_day": cfg.matches_per_day, "seed": cfg.seed, "repeat": args.repeat},
+        "results": results,
+    }
+    for name, r in results.items():
+        logger.info(f"⏱️ {name:48} p50={r['p50_ms']:>10.3f}ms  p95={r['p95_ms']:>10.3f}ms  items={r['items']}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"💾 Saved {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for line in regressions:
+            logger.error(f"❌ Regression: {line}")
+        if regressions:
+            sys.exit(1)
+        logger.info("✅ No regressions against baseline")
@@ -1,13 +1,10 @@
 import os
 import asyncio
 import logging
-import json
+import html
 from datetime import datetime, timedelta
 import pytz
 
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-
 from aiogram import Bot, Dispatcher, types, F
 from aiogram.types import WebAppInfo, InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 from aiogram.filters import Command
@@ -15,17 +12,39 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import broadcast
+import segments
+import pick_replace
+import sheet_blocks
+import runtime
+from fsm_storage import PostgresStorage
 
 load_dotenv()
 
 # --- КОНФИГУРАЦИЯ ---
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Другой адрес Bot API (локальный сервер или fake_bot_api.py для прогонов рассылки)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Webhook-режим: задан WEBHOOK_URL (публичный https-адрес, например https://bot.example.com)
+# -> бот слушает WEBHOOK_PORT и может работать в нескольких репликах за балансировщиком.
+# Без WEBHOOK_URL — long polling, как раньше (ровно один экземпляр).
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+# Порт /health и /metrics бота (задержка event loop, пулы блокирующих вызовов); 0 — выключить
+METRICS_PORT = int(os.getenv("BOT_METRICS_PORT", "8080"))
+# Запрос в БД дольше этого обрывается сервером (поток пула не висит вечно)
+STATEMENT_TIMEOUT_MS = int(os.getenv("BOT_STATEMENT_TIMEOUT_MS", "30000"))
 MINI_APP_URL = "https://prime-challenge.vercel.app"
 TIMEZONE = pytz.timezone('Europe/Moscow')
 
@@ -45,18 +64,25 @@ if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
 try:
-    engine = create_engine(DATABASE_URL) if DATABASE_URL else None
+    engine = create_engine(
+        DATABASE_URL, pool_pre_ping=True,
+        connect_args={"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"},
+    ) if DATABASE_URL else None
 except:
     engine = None
 
-bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-storage = MemoryStorage()
+session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+bot = Bot(token=TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+sheet_blocks.configure(GOOGLE_SHEET_ID, GOOGLE_CREDENTIALS)
+# FSM в Postgres: незаконченные диалоги админки переживают рестарт
+storage = PostgresStorage(engine) if engine else MemoryStorage()
 dp = Dispatcher(storage=storage)
-scheduler = AsyncIOScheduler(timezone=TIMEZONE)
 
 # --- СОСТОЯНИЯ ---
 class BroadcastState(StatesGroup):
     waiting_for_content = State()
+    waiting_for_segment = State()
+    waiting_for_tournament = State()
     waiting_for_confirm = State()
     waiting_for_time = State()
 
@@ -87,50 +113,51 @@ class EditDailyPickState(StatesGroup):
     waiting_for_winner = State()
 
 # --- ХЕЛПЕРЫ ---
-def get_all_user_ids():
-    if not engine: return []
-    try:
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT user_id FROM users"))
-            return [row[0] for row in result]
-    except Exception as e:
-        logger.error(f"DB Error: {e}")
-        return []
+def _broadcast_text(broadcast_id: int, stats: dict, done: bool) -> str:
+    head = f"✅ Рассылка #{broadcast_id} завершена" if done else f"⏳ Рассылка #{broadcast_id} идёт"
+    return (
+        f"{head}\n"
+        f"Доставлено: {stats.get('delivered', 0)}\n"
+        f"Ошибок: {stats.get('failed', 0)} · Заблокировали бота: {stats.get('blocked', 0)} · Повторов: {stats.get('retries', 0)}"
+    )
 
-def get_google_client():
-    try:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        if not GOOGLE_CREDENTIALS: return None
-        creds_dict = json.loads(GOOGLE_CREDENTIALS) if isinstance(GOOGLE_CREDENTIALS, str) else GOOGLE_CREDENTIALS
-        return gspread.authorize(ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope))
-    except Exception as e:
-        logger.error(f"Google Auth Error: {e}")
-        return None
+# broadcast_id -> {admin: сообщение со статусом}; живёт между чанками одной рассылки
+_status_messages = {}
 
-async def run_broadcast(chat_id: int, message_id: int):
-    users = get_all_user_ids()
-    for admin in ADMIN_IDS:
-        try: await bot.send_message(admin, f"🚀 Рассылка началась ({len(users)} чел.)...")
-        except: pass
+async def run_broadcast(broadcast_id: int):
+    """Один заход по рассылке из очереди (broadcast.poll_forever) с живым отчётом админам."""
+    if broadcast_id not in _status_messages:
+        _status_messages[broadcast_id] = {}
+        for admin in ADMIN_IDS:
+            try: _status_messages[broadcast_id][admin] = await bot.send_message(admin, f"🚀 Рассылка #{broadcast_id} началась...")
+            except Exception: pass
 
-    count_ok = 0
-    kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="👉 Войти в игру", web_app=WebAppInfo(url=MINI_APP_URL))]])
-    for uid in users:
-        try:
-            await bot.copy_message(chat_id=uid, from_chat_id=chat_id, message_id=message_id, reply_markup=kb)
-            count_ok += 1
-            await asyncio.sleep(0.05)
-        except Exception:
-            pass
+    async def report(bid: int, stats: dict, done: bool):
+        for admin, msg in _status_messages.get(bid, {}).items():
+            try: await msg.edit_text(_broadcast_text(bid, stats, done))
+            except Exception: pass
 
-    for admin in ADMIN_IDS:
-        try: await bot.send_message(admin, f"✅ Рассылка завершена. Дошло: {count_ok}")
-        except: pass
+    kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="👉 Войти в игру", web_app=WebAppInfo(url=MINI_APP_URL))]])
+    try:
+        _, done = await broadcast.run(bot, engine, broadcast_id, reply_markup=kb, on_progress=report)
+        if done: _status_messages.pop(broadcast_id, None)
+    except Exception as e:
+        logger.error(f"Broadcast #{broadcast_id} error: {e}")
 
 # --- ХАНДЛЕРЫ ---
 
+def _unblock_user(user_id: int):
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE users SET bot_blocked_at = NULL WHERE user_id = :uid AND bot_blocked_at IS NOT NULL"),
+                     {"uid": user_id})
+
 @dp.message(Command("start"))
 async def cmd_start(message: types.Message):
+    if engine:
+        try:
+            await runtime.run(_unblock_user, message.from_user.id)
+        except Exception as e:
+            logger.error(f"DB Error: {e}")
     kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="🎾 Играть", web_app=WebAppInfo(url=MINI_APP_URL))]])
     await message.answer(
         f"Привет, <b>{message.from_user.first_name}</b>! 👋\n\n"
@@ -167,28 +194,27 @@ async def update_sheet_block(message: types.Message, block_type: str, icon: str)
     if message.from_user.id not in ADMIN_IDS: return
     parts = message.text.split(maxsplit=1)
     if len(parts) < 2:
-        await message.answer("⚠️ Формат: `/block ID_МАТЧА`")
+        await message.answer("⚠️ Формат: `/block ID_МАТЧА` (можно несколько через пробел)")
+        return
+    if not sheet_blocks.enabled():
+        await message.answer("❌ Ошибка доступа к Google Sheets (проверь ключи).")
         return
 
-    m_id = parts[1].strip()
-    await message.answer("⏳ Подключаюсь к Гугл Таблице...")
-
+    m_ids = list(dict.fromkeys(parts[1].replace(",", " ").split()))
     try:
-        client = get_google_client()
-        if not client:
-            await message.answer("❌ Ошибка доступа к Google Sheets (проверь ключи).")
-            return
-
-        ws = client.open_by_key(GOOGLE_SHEET_ID).worksheet("DAILY_MATCHES")
-        cell = ws.find(m_id, in_column=1)
-
-        if cell:
-            ws.update_cell(cell.row, 10, block_type)
-            await message.answer(f"{icon} Матчу `{m_id}` присвоен статус **{block_type or 'ПУСТО'}**.")
-        else:
-            await message.answer(f"❌ Матч `{m_id}` не найден в таблице.")
+        found = await sheet_blocks.mark(m_ids, block_type)
     except Exception as e:
         await message.answer(f"❌ Ошибка: {e}")
+        return
+
+    done = [m_id for m_id in m_ids if found[m_id]]
+    missing = [m_id for m_id in m_ids if not found[m_id]]
+    lines = []
+    if done:
+        lines.append(f"{icon} Матчам `{', '.join(done)}` присвоен статус **{block_type or 'ПУСТО'}**.")
+    if missing:
+        lines.append(f"❌ Не найдены в таблице: `{', '.join(missing)}`.")
+    await message.answer("\n".join(lines))
 
 @dp.message(Command("block"))
 async def cmd_block(message: types.Message):
@@ -203,6 +229,37 @@ async def cmd_unblock(message: types.Message):
     await update_sheet_block(message, "", "✅")
 
 
+# ==========================================
+# МАССОВАЯ ЗАМЕНА: ПРЕВЬЮ И ПРИМЕНЕНИЕ (pick_replace.py)
+# ==========================================
+
+async def replace_preview_text(data: dict) -> str:
+    try:
+        found = await runtime.run_admin(pick_replace.preview, engine, data['tour_id'], data['old_name'], data.get('opponent'))
+    except Exception as e:
+        return f"❌ Превью не удалось: {e}"
+    if not found['rows']:
+        return "🔍 Совпадений нет — менять нечего."
+    names = "\n".join(f"• <code>{html.escape(name)}</code> — {cnt}" for name, cnt in found['names'])
+    return f"🔍 Затронет строк: <b>{found['rows']}</b> у <b>{found['users']}</b> юзеров\nСовпавшие имена:\n{names}"
+
+async def execute_replace(callback: types.CallbackQuery, state: FSMContext):
+    if callback.data == "cancel_replace":
+        await state.clear()
+        return await callback.message.edit_text("❌ Отменено.")
+
+    data = await state.get_data()
+    await state.clear()
+    await callback.message.edit_text("⏳ Меняю пачками...")
+    try:
+        replaced = await runtime.run_admin(
+            pick_replace.apply, engine, data['tour_id'], data['old_name'], data['new_name'], data.get('opponent')
+        )
+        await callback.message.edit_text(f"✅ Готово! Замен по всей сетке: <b>{replaced}</b>\nПересчёт турнира запущен.")
+    except Exception as e:
+        await callback.message.edit_text(f"❌ Ошибка: {e}")
+
+
 # ==========================================
 # МАССОВАЯ ЗАМЕНА (ПРОСТАЯ - БЕЗ СОПЕРНИКА)
 # ==========================================
@@ -236,39 +293,15 @@ async def simple_new_name(message: types.Message, state: FSMContext):
         [InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_replace")]
     ])
     await message.answer(
-        f"⚠️ **ПРОСТАЯ ЗАМЕНА**\nТурнир: `{data['tour_id']}`\nИщем: `% {data['old_name']} %`\nМеняем: `{data['new_name']}`",
+        f"⚠️ **ПРОСТАЯ ЗАМЕНА**\nТурнир: `{data['tour_id']}`\nИщем: `% {data['old_name']} %`\nМеняем: `{data['new_name']}`\n\n"
+        + await replace_preview_text(data),
         reply_markup=kb
     )
     await state.set_state(ReplaceSimpleState.waiting_for_confirm)
 
 @dp.callback_query(ReplaceSimpleState.waiting_for_confirm)
 async def execute_simple_replace(callback: types.CallbackQuery, state: FSMContext):
-    if callback.data == "cancel_replace":
-        await state.clear()
-        return await callback.message.edit_text("❌ Отменено.")
-
-    data = await state.get_data()
-    try:
-        with engine.connect() as conn:
-            query = text("""
-                UPDATE user_picks 
-                SET 
-                    predicted_winner = CASE WHEN predicted_winner ILIKE :old_pattern THEN :new_name ELSE predicted_winner END,
-                    player1 = CASE WHEN player1 ILIKE :old_pattern THEN :new_name ELSE player1 END,
-                    player2 = CASE WHEN player2 ILIKE :old_pattern THEN :new_name ELSE player2 END
-                WHERE tournament_id = :tid 
-                  AND (predicted_winner ILIKE :old_pattern OR player1 ILIKE :old_pattern OR player2 ILIKE :old_pattern)
-            """)
-            result = conn.execute(query, {
-                "new_name": data['new_name'],
-                "tid": data['tour_id'],
-                "old_pattern": f"%{data['old_name']}%"
-            })
-            conn.commit()
-            await callback.message.edit_text(f"✅ Готово! Замен по всей сетке: **{result.rowcount}**")
-    except Exception as e:
-        await callback.message.edit_text(f"❌ Ошибка: {e}")
-    await state.clear()
+    await execute_replace(callback, state)
 
 
 # ==========================================
@@ -310,41 +343,15 @@ async def opp_new_name(message: types.Message, state: FSMContext):
         [InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_replace")]
     ])
     await message.answer(
-        f"⚠️ **ЗАМЕНА С СОПЕРНИКОМ**\nТурнир: `{data['tour_id']}`\nИщем: `{data['old_name']}`\nСоперник: `{data['opponent']}`\nМеняем: `{data['new_name']}`",
+        f"⚠️ **ЗАМЕНА С СОПЕРНИКОМ**\nТурнир: `{data['tour_id']}`\nИщем: `{data['old_name']}`\nСоперник: `{data['opponent']}`\nМеняем: `{data['new_name']}`\n\n"
+        + await replace_preview_text(data),
         reply_markup=kb
     )
     await state.set_state(ReplaceOpponentState.waiting_for_confirm)
 
 @dp.callback_query(ReplaceOpponentState.waiting_for_confirm)
 async def execute_opp_replace(callback: types.CallbackQuery, state: FSMContext):
-    if callback.data == "cancel_replace":
-        await state.clear()
-        return await callback.message.edit_text("❌ Отменено.")
-
-    data = await state.get_data()
-    try:
-        with engine.connect() as conn:
-            query = text("""
-                UPDATE user_picks 
-                SET 
-                    predicted_winner = CASE WHEN predicted_winner ILIKE :old_pattern THEN :new_name ELSE predicted_winner END,
-                    player1 = CASE WHEN player1 ILIKE :old_pattern THEN :new_name ELSE player1 END,
-                    player2 = CASE WHEN player2 ILIKE :old_pattern THEN :new_name ELSE player2 END
-                WHERE tournament_id = :tid 
-                  AND (predicted_winner ILIKE :old_pattern OR player1 ILIKE :old_pattern OR player2 ILIKE :old_pattern)
-                  AND (player1 ILIKE :opp OR player2 ILIKE :opp)
-            """)
-            result = conn.execute(query, {
-                "new_name": data['new_name'],
-                "tid": data['tour_id'],
-                "old_pattern": f"%{data['old_name']}%",
-                "opp": f"%{data['opponent']}%"
-            })
-            conn.commit()
-            await callback.message.edit_text(f"✅ Готово! Замен по всей сетке: **{result.rowcount}**")
-    except Exception as e:
-        await callback.message.edit_text(f"❌ Ошибка: {e}")
-    await state.clear()
+    await execute_replace(callback, state)
 
 
 # ==========================================
@@ -378,6 +385,18 @@ async def process_daily_user_id(message: types.Message, state: FSMContext):
     await message.answer("Выберите победителя (**1** или **2**):", reply_markup=kb)
     await state.set_state(EditDailyPickState.waiting_for_winner)
 
+def _apply_daily_pick(user_id: int, match_id: str, pick: int) -> bool:
+    with engine.connect() as conn:
+        # daily_apply_pick (миграция 0005): прогноз + is_correct/points + дельта
+        # daily_leaderboard в одной транзакции, как и в API бэкенда
+        conn.execute(text("SELECT set_config('app.change_source', 'bot', true)"))
+        created = conn.execute(
+            text("SELECT daily_apply_pick(:uid, :mid, :pick)"),
+            {"pick": pick, "uid": user_id, "mid": match_id}
+        ).scalar()
+        conn.commit()
+    return created
+
 @dp.message(EditDailyPickState.waiting_for_winner)
 async def execute_daily_change(message: types.Message, state: FSMContext):
     if message.text == "❌ Отмена":
@@ -393,28 +412,12 @@ async def execute_daily_change(message: types.Message, state: FSMContext):
     data = await state.get_data()
 
     try:
-        with engine.connect() as conn:
-            update_query = text("""
-                UPDATE daily_picks SET predicted_winner = :pick
-                WHERE user_id = :uid AND match_id = :mid
-            """)
-            result = conn.execute(update_query, {"pick": new_pick, "uid": data['user_id'], "mid": data['match_id']})
-            action = "Обновлено"
-
-            if result.rowcount == 0:
-                insert_query = text("""
-                    INSERT INTO daily_picks (user_id, match_id, predicted_winner, created_at)
-                    VALUES (:uid, :mid, :pick, NOW())
-                """)
-                conn.execute(insert_query, {"pick": new_pick, "uid": data['user_id'], "mid": data['match_id']})
-                action = "🆕 Создано"
-
-            conn.commit()
-            await message.answer(
-                f"✅ **Успешно!** {action}\nМатч: `{data['match_id']}`\nЮзер: `{data['user_id']}`\nВыбор: **{new_pick}**",
-                reply_markup=ReplyKeyboardRemove()
-            )
-
+        created = await runtime.run(_apply_daily_pick, data['user_id'], data['match_id'], new_pick)
+        action = "🆕 Создано" if created else "Обновлено"
+        await message.answer(
+            f"✅ **Успешно!** {action}\nМатч: `{data['match_id']}`\nЮзер: `{data['user_id']}`\nВыбор: **{new_pick}**",
+            reply_markup=ReplyKeyboardRemove()
+        )
     except Exception as e:
         await message.answer(f"❌ Ошибка БД: {e}")
 
@@ -476,6 +479,18 @@ async def process_new_name(message: types.Message, state: FSMContext):
     await message.answer("⚠️ **Подтвердить замену?**", reply_markup=kb)
     await state.set_state(EditPickState.waiting_for_final_confirm)
 
+def _update_pick(data: dict) -> int:
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            UPDATE user_picks SET predicted_winner = :new_name
+            WHERE tournament_id = :tid AND user_id = :uid AND round = :rnd AND predicted_winner = :old_name
+        """), {
+            "new_name": data['new_name'], "tid": data['tour_id'],
+            "uid": data['user_id'], "rnd": data['round_name'], "old_name": data['old_name']
+        })
+        conn.commit()
+    return result.rowcount
+
 @dp.callback_query(EditPickState.waiting_for_final_confirm)
 async def execute_edit_pick(callback: types.CallbackQuery, state: FSMContext):
     if callback.data == "cancel_edit_pick":
@@ -484,17 +499,8 @@ async def execute_edit_pick(callback: types.CallbackQuery, state: FSMContext):
         return
     data = await state.get_data()
     try:
-        with engine.connect() as conn:
-            query = text("""
-                UPDATE user_picks SET predicted_winner = :new_name
-                WHERE tournament_id = :tid AND user_id = :uid AND round = :rnd AND predicted_winner = :old_name
-            """)
-            result = conn.execute(query, {
-                "new_name": data['new_name'], "tid": data['tour_id'],
-                "uid": data['user_id'], "rnd": data['round_name'], "old_name": data['old_name']
-            })
-            conn.commit()
-            await callback.message.edit_text("✅ Данные обновлены." if result.rowcount > 0 else "❌ Запись не найдена.")
+        updated = await runtime.run(_update_pick, data)
+        await callback.message.edit_text("✅ Данные обновлены." if updated > 0 else "❌ Запись не найдена.")
     except Exception as e:
         await callback.message.edit_text(f"❌ Ошибка БД: {e}")
     await state.clear()
@@ -510,17 +516,60 @@ async def start_broadcast_flow(message: types.Message, state: FSMContext):
     await message.answer("Отправь сообщение для рассылки.", reply_markup=ReplyKeyboardRemove())
     await state.set_state(BroadcastState.waiting_for_content)
 
+# Сегменты получателей (segments.py): callback -> фильтр
+SEGMENT_BUTTONS = {
+    "seg_all": {},
+    "seg_active7": {"active_days": 7},
+    "seg_active30": {"active_days": 30},
+    "seg_daily": {"daily": True},
+}
+
 @dp.message(BroadcastState.waiting_for_content)
 async def process_content(message: types.Message, state: FSMContext):
     await state.update_data(msg_id=message.message_id, chat_id=message.chat.id)
     kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🚀 СЕЙЧАС", callback_data="send_now"), InlineKeyboardButton(text="⏰ Отложить", callback_data="send_later")],
+        [InlineKeyboardButton(text="👥 Всем", callback_data="seg_all"), InlineKeyboardButton(text="🎲 Участникам Daily", callback_data="seg_daily")],
+        [InlineKeyboardButton(text="🔥 Активным 7 дн.", callback_data="seg_active7"), InlineKeyboardButton(text="📅 Активным 30 дн.", callback_data="seg_active30")],
+        [InlineKeyboardButton(text="🏆 По турниру", callback_data="seg_tour")],
         [InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_broad")]
     ])
     await message.copy_to(chat_id=message.chat.id)
-    await message.answer("👆 Превью. Отправляем?", reply_markup=kb)
+    await message.answer("👆 Превью. Кому отправляем?", reply_markup=kb)
+    await state.set_state(BroadcastState.waiting_for_segment)
+
+async def ask_confirm(message: types.Message, state: FSMContext, segment: dict):
+    await state.update_data(segment=segment)
+    try:
+        total = await runtime.run_admin(segments.count, engine, segment)
+    except Exception as e:
+        logger.error(f"DB Error: {e}")
+        total = "?"
+    kb = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🚀 СЕЙЧАС", callback_data="send_now"), InlineKeyboardButton(text="⏰ Отложить", callback_data="send_later")],
+        [InlineKeyboardButton(text="❌ Отмена", callback_data="cancel_broad")]
+    ])
+    await message.answer(f"Получатели: {segments.describe(segment)} — <b>{total}</b> чел.\nОтправляем?", reply_markup=kb)
     await state.set_state(BroadcastState.waiting_for_confirm)
 
+@dp.callback_query(BroadcastState.waiting_for_segment)
+async def process_segment(callback: types.CallbackQuery, state: FSMContext):
+    if callback.data == "cancel_broad":
+        await callback.message.edit_text("Отменено.")
+        await state.clear()
+    elif callback.data == "seg_tour":
+        await callback.message.edit_text("Введи ID турнира:")
+        await state.set_state(BroadcastState.waiting_for_tournament)
+    elif callback.data in SEGMENT_BUTTONS:
+        await callback.message.edit_reply_markup(reply_markup=None)
+        await ask_confirm(callback.message, state, SEGMENT_BUTTONS[callback.data])
+
+@dp.message(BroadcastState.waiting_for_tournament)
+async def process_segment_tournament(message: types.Message, state: FSMContext):
+    if not message.text or not message.text.strip().isdigit():
+        await message.answer("❌ Нужен числовой ID турнира.")
+        return
+    await ask_confirm(message, state, {"tournament_id": int(message.text.strip())})
+
 @dp.callback_query(BroadcastState.waiting_for_confirm)
 async def process_confirm(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
@@ -529,8 +578,10 @@ async def process_confirm(callback: types.CallbackQuery, state: FSMContext):
         await callback.message.edit_text("Отменено.")
         await state.clear()
     elif action == "send_now":
+        await runtime.run(broadcast.create, engine, data['chat_id'], data['msg_id'], callback.from_user.id,
+                                None, data.get('segment'))
+        broadcast.wake()
         await callback.message.edit_text("Запускаю...")
-        await run_broadcast(data['chat_id'], data['msg_id'])
         await state.clear()
     elif action == "send_later":
         await callback.message.edit_text("Введи время (ЧЧ:ММ по Москве):")
@@ -544,7 +595,9 @@ async def process_time(message: types.Message, state: FSMContext):
         run_date = now.replace(hour=hour, minute=minute, second=0)
         if run_date < now: run_date += timedelta(days=1)
         data = await state.get_data()
-        scheduler.add_job(run_broadcast, 'date', run_date=run_date, kwargs={'chat_id': data['chat_id'], 'message_id': data['msg_id']})
+        # Очередь в БД: отложенная рассылка переживёт рестарт бота
+        await runtime.run(broadcast.create, engine, data['chat_id'], data['msg_id'], message.from_user.id,
+                                run_date, data.get('segment'))
         await message.answer(f"✅ Запланировано на {run_date.strftime('%d.%m %H:%M')}")
         await state.clear()
     except:
@@ -555,10 +608,64 @@ async def cancel_all(message: types.Message, state: FSMContext):
     await state.clear()
     await message.answer("Отменено.", reply_markup=ReplyKeyboardRemove())
 
+# ==========================================
+# ЗАПУСК: POLLING ИЛИ WEBHOOK
+# ==========================================
+# Реплики в webhook-режиме ничего не делят в памяти:
+#   FSM — в Postgres (fsm_storage), рассылки — claim под advisory-локом,
+#   одновременно шлёт только одна реплика (общий лимит Telegram на бота),
+#   массовые замены и метки в таблице — идемпотентны по строкам.
+# Telegram шлёт апдейты параллельно (max_connections), балансировщик раскидывает
+# их по репликам, каждая обрабатывает апдейт в фоне и сразу отвечает 200.
+
+async def run_webhook():
+    if engine is None:
+        logger.warning("⚠️ Webhook mode without DATABASE_URL: FSM in memory, run a single replica only")
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", WEBHOOK_PORT).start()
+    # Каждая реплика ставит один и тот же адрес — повторный вызов безвреден
+    await bot.set_webhook(
+        f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
+        max_connections=100,
+    )
+    logger.info(f"🌐 Webhook on :{WEBHOOK_PORT}{WEBHOOK_PATH}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        # Вебхук не снимаем: остальные реплики продолжают принимать апдейты
+        await runner.cleanup()
+
 async def main():
     print("Bot is running...")
-    scheduler.start()
-    await dp.start_polling(bot)
+    # Блокирующие вызовы — в ограниченные пулы, задержка цикла — в /metrics
+    runtime.install(asyncio.get_running_loop())
+    # Фоновые задачи гасим при остановке: рассылка в полёте сохраняет cursor
+    # и снимает аренду (broadcast.run), а не ждёт её истечения
+    background = [asyncio.create_task(runtime.monitor_lag())]
+    if METRICS_PORT:
+        runtime.start_server(METRICS_PORT)
+    # Очередь рассылок: отложенные, новые и прерванные рестартом (с сохранённого места).
+    # Опрос идёт в каждой реплике, но claim выдаёт задачу, только когда никто
+    # другой не шлёт: лимит Telegram общий на бота
+    if engine:
+        background.append(asyncio.create_task(broadcast.poll_forever(engine, run_broadcast)))
+    try:
+        if WEBHOOK_URL:
+            await run_webhook()
+        else:
+            # getUpdates не работает, пока стоит вебхук (например, после webhook-деплоя)
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    finally:
+        for task in background: task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
 
 if __name__ == '__main__':
     asyncio.run(main())
@@ -0,0 +1,429 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+import segments
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# ДВИЖОК РАССЫЛОК
+# ==========================================
+# Пул воркеров + общий token bucket под лимиты Telegram:
+#   ~30 сообщений/с на бота суммарно (берём с запасом) и не чаще 1/с в один чат.
+# RetryAfter (flood wait) ставит на паузу весь bucket, сообщение повторяется.
+# Заблокировавшие бота получают users.bot_blocked_at и дальше не рассылаются.
+#
+# Получатели — сегмент (segments.py), отбор целиком в SQL. Чанк читается
+# keyset-страницами по PAGE_SIZE (user_id > последний выданный), каждая —
+# отдельный короткий запрос: память не зависит от размера users, а соединение
+# и снимок не держатся, пока отправка разбирает страницу.
+#
+# Прогресс в таблице broadcasts: получатели идут по возрастанию user_id,
+# cursor — максимальный id, до которого обработаны все. После рестарта
+# рассылка продолжается с cursor (повтор возможен только для тех, кто был "в полёте").
+#
+# Очередь — та же таблица: scheduled -> running -> done. Опрос (poll_forever)
+# берёт задачу через FOR UPDATE SKIP LOCKED и арендует её на LEASE_SECONDS
+# (продлевается с каждым сохранением прогресса). За один заход — не больше
+# CHUNK_SIZE получателей, потом аренда снимается и задача встаёт в очередь снова.
+# Упавший воркер просто перестаёт продлевать аренду — задачу подхватит следующий.
+# Потерявший аренду (её забрал другой или не удалось продлить за
+# LEASE_SECONDS - LEASE_MARGIN) сразу перестаёт слать: иначе остаток чанка
+# получили бы дважды.
+#
+# Лимит Telegram общий на бота, а опрос крутится в каждой реплике. Поэтому claim
+# не выдаёт задачу, пока у любой рассылки есть живая аренда: во всём боте
+# одновременно шлёт одна рассылка. Проверка и захват идут под общим
+# pg_advisory_xact_lock, чтобы две реплики не взяли по задаче разом.
+
+GLOBAL_RATE = 25.0
+GLOBAL_BURST = 5
+PER_CHAT_INTERVAL = 1.0
+WORKERS = 8
+NETWORK_ATTEMPTS = 3
+PAGE_SIZE = 1000
+PROGRESS_INTERVAL = 5.0
+CHUNK_SIZE = 5000
+LEASE_SECONDS = 60
+LEASE_MARGIN = 15
+POLL_INTERVAL = 10.0
+CLAIM_LOCK_KEY = 7_401_046  # рядом с services/change_feed.LEADER_LOCK_KEY
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_wake = asyncio.Event()
+
+ProgressCallback = Callable[[int, Dict[str, int], bool], Awaitable[None]]
+
+
+class TokenBucket:
+    """rate токенов в секунду, не больше capacity про запас."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ChatLimiter:
+    """Не чаще одного сообщения в PER_CHAT_INTERVAL на чат (повторы после ошибок)."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last: Dict[int, float] = {}
+
+    async def wait(self, chat_id: int) -> None:
+        last = self._last.get(chat_id)
+        if last is not None:
+            delay = last + self.interval - time.monotonic()
+            if delay > 0: await asyncio.sleep(delay)
+        self._last[chat_id] = time.monotonic()
+
+    def forget(self, chat_id: int) -> None:
+        self._last.pop(chat_id, None)
+
+
+# --- БД (синхронно, вызывается через asyncio.to_thread) ---
+
+def create(engine: Engine, from_chat_id: int, message_id: int, created_by: Optional[int],
+           scheduled_at: Optional[datetime] = None, segment: Optional[dict] = None) -> int:
+    """Ставит рассылку в очередь (scheduled_at=None — сразу, segment=None — всем)."""
+    segments.where(segment or {})  # неизвестный фильтр — ошибка сейчас, а не при отправке
+    with engine.begin() as conn:
+        return conn.execute(
+            text("""
+                INSERT INTO broadcasts (from_chat_id, message_id, created_by, scheduled_at, segment)
+                VALUES (:c, :m, :u, COALESCE(:at, now()), CAST(:seg AS jsonb)) RETURNING id
+            """),
+            {"c": from_chat_id, "m": message_id, "u": created_by, "at": scheduled_at,
+             "seg": json.dumps(segment or {})},
+        ).scalar()
+
+def claim(engine: Engine) -> Optional[int]:
+    """
+    Следующая задача: наступившая scheduled или running без живой аренды.
+    None, пока какая-то рассылка уже идёт (живая аренда) — в любой реплике.
+    """
+    with engine.begin() as conn:
+        # До конца транзакции: следующий claim увидит уже выданную аренду
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CLAIM_LOCK_KEY})
+        return conn.execute(
+            text("""
+                UPDATE broadcasts
+                SET status = 'running', locked_by = :worker,
+                    locked_until = now() + make_interval(secs => :lease)
+                WHERE id = (
+                    SELECT id FROM broadcasts
+                    WHERE ((status = 'scheduled' AND scheduled_at <= now())
+                           OR (status = 'running' AND (locked_until IS NULL OR locked_until < now())))
+                      AND NOT EXISTS (
+                          SELECT 1 FROM broadcasts busy
+                          WHERE busy.status = 'running' AND busy.locked_until >= now()
+                      )
+                    ORDER BY scheduled_at, id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id
+            """),
+            {"worker": WORKER_ID, "lease": LEASE_SECONDS},
+        ).scalar()
+
+def load(engine: Engine, broadcast_id: int) -> Optional[dict]:
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT * FROM broadcasts WHERE id = :id"), {"id": broadcast_id}).mappings().first()
+    return dict(row) if row else None
+
+def wake() -> None:
+    """Разбудить опрос (новая рассылка "сейчас")."""
+    _wake.set()
+
+def _recipients_page(engine: Engine, sql: str, params: dict, after_id: int, limit: int) -> List[int]:
+    with engine.connect() as conn:
+        return [r[0] for r in conn.execute(text(sql), {**params, "after": after_id, "limit": limit})]
+
+async def iter_recipients(engine: Engine, segment: dict, after_id: int, limit: int) -> AsyncIterator[List[int]]:
+    """Получатели сегмента после after_id (не больше limit) порциями по PAGE_SIZE."""
+    sql, params = segments.recipients_query(segment)
+    while limit > 0:
+        size = min(PAGE_SIZE, limit)
+        page = await asyncio.to_thread(_recipients_page, engine, sql, params, after_id, size)
+        if not page: return
+        yield page
+        if len(page) < size: return
+        limit -= len(page)
+        after_id = page[-1]
+
+def _save_progress(engine: Engine, broadcast_id: int, cursor: int, stats: Dict[str, int],
+                   blocked_ids: List[int], done: bool, release: bool) -> bool:
+    """
+    Прогресс + продление аренды (release — снять аренду, чанк закончен).
+    False — аренды у этого воркера уже нет, прогресс не записан.
+    """
+    with engine.begin() as conn:
+        if blocked_ids:
+            conn.execute(
+                text("UPDATE users SET bot_blocked_at = now() WHERE user_id = ANY(:ids) AND bot_blocked_at IS NULL"),
+                {"ids": blocked_ids},
+            )
+        return conn.execute(
+            text("""
+                UPDATE broadcasts
+                SET cursor = :cursor, delivered = :delivered, failed = :failed, blocked = :blocked,
+                    retries = :retries, status = :status, finished_at = CASE WHEN :done THEN now() END,
+                    locked_until = CASE WHEN :release THEN NULL ELSE now() + make_interval(secs => :lease) END
+                WHERE id = :id AND locked_by = :worker AND locked_until > now()
+            """),
+            {"id": broadcast_id, "cursor": cursor, "status": "done" if done else "running", "done": done,
+             "release": release or done, "lease": LEASE_SECONDS, "worker": WORKER_ID, **stats},
+        ).rowcount == 1
+
+
+# --- ОТПРАВКА ---
+
+async def run(
+    bot: Bot,
+    engine: Engine,
+    broadcast_id: int,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    max_recipients: int = CHUNK_SIZE,
+) -> Tuple[Dict[str, int], bool]:
+    """
+    Один заход по арендованной (claim) рассылке: до max_recipients получателей.
+    on_progress(id, stats, done) вызывается раз в PROGRESS_INTERVAL и в конце.
+    Возвращает (счётчики delivered/failed/blocked/retries, рассылка закончена).
+    """
+    job = await asyncio.to_thread(load, engine, broadcast_id)
+    if not job or job["status"] != "running" or job["locked_by"] != WORKER_ID:
+        return {}, False
+    stats = {k: job[k] for k in ("delivered", "failed", "blocked", "retries")}
+    bucket = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+    chats = ChatLimiter(PER_CHAT_INTERVAL)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=WORKERS * 4)
+
+    # Низшая отметка: issued — выданные по порядку id, completed — завершённые
+    issued: deque = deque()
+    completed = set()
+    cursor = job["cursor"]
+    blocked_ids: List[int] = []
+    # Аренда: claim только что продлил её на LEASE_SECONDS
+    lease_lost = asyncio.Event()
+    lease_until = time.monotonic() + LEASE_SECONDS
+
+    def _complete(uid: int) -> None:
+        nonlocal cursor
+        completed.add(uid)
+        while issued and issued[0] in completed:
+            cursor = issued.popleft()
+            completed.discard(cursor)
+
+    async def _deliver(uid: int) -> None:
+        network_errors = 0
+        while True:
+            await bucket.acquire()
+            await chats.wait(uid)
+            if lease_lost.is_set(): return
+            try:
+                await bot.copy_message(chat_id=uid, from_chat_id=job["from_chat_id"],
+                                       message_id=job["message_id"], reply_markup=reply_markup)
+                stats["delivered"] += 1
+                return
+            except TelegramRetryAfter as e:
+                stats["retries"] += 1
+                logger.warning(f"📛 Flood wait {e.retry_after}s (broadcast {broadcast_id})")
+                bucket.pause(e.retry_after)
+            except TelegramForbiddenError:
+                stats["blocked"] += 1
+                blocked_ids.append(uid)
+                return
+            except (TelegramNetworkError, TelegramServerError) as e:
+                network_errors += 1
+                if network_errors >= NETWORK_ATTEMPTS:
+                    stats["failed"] += 1
+                    logger.warning(f"Broadcast {broadcast_id}: {uid} failed: {e}")
+                    return
+                stats["retries"] += 1
+                await asyncio.sleep(2 ** network_errors)
+            except TelegramBadRequest as e:
+                # chat not found / user deactivated и т.п. — не повторяем
+                stats["failed"] += 1
+                logger.info(f"Broadcast {broadcast_id}: {uid} rejected: {e.message}")
+                return
+
+    async def _worker() -> None:
+        while True:
+            uid = await queue.get()
+            try:
+                if uid is None: return
+                # Без аренды не шлём и не двигаем cursor: получателя обслужит новый владелец
+                if lease_lost.is_set(): continue
+                try: await _deliver(uid)
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.error(f"Broadcast {broadcast_id}: {uid} error: {e}")
+                chats.forget(uid)
+                if not lease_lost.is_set(): _complete(uid)
+            finally:
+                queue.task_done()
+
+    async def _flush(done: bool, release: bool = False) -> bool:
+        nonlocal lease_until
+        batch = blocked_ids[:]
+        del blocked_ids[:len(batch)]
+        started = time.monotonic()
+        saved = await asyncio.to_thread(_save_progress, engine, broadcast_id, cursor, dict(stats), batch, done, release)
+        if not saved:
+            if not lease_lost.is_set():
+                logger.warning(f"🔒 Broadcast {broadcast_id}: lease lost, stopping at cursor {cursor}")
+            lease_lost.set()
+            return False
+        lease_until = started + LEASE_SECONDS
+        if on_progress:
+            try: await on_progress(broadcast_id, dict(stats), done)
+            except Exception as e: logger.warning(f"Broadcast progress report failed: {e}")
+        return True
+
+    async def _reporter() -> None:
+        while not lease_lost.is_set():
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            try:
+                await _flush(False)
+            except Exception as e:
+                logger.error(f"Broadcast {broadcast_id} progress save failed: {e}")
+            # Продлить не выходит — останавливаемся раньше, чем аренда истечёт
+            if time.monotonic() > lease_until - LEASE_MARGIN and not lease_lost.is_set():
+                logger.warning(f"🔒 Broadcast {broadcast_id}: lease not renewed for too long, stopping")
+                lease_lost.set()
+
+    logger.info(f"📢 Broadcast {broadcast_id} started from cursor {cursor}")
+    workers = [asyncio.create_task(_worker()) for _ in range(WORKERS)]
+    reporter = asyncio.create_task(_reporter())
+    done = False
+    try:
+        # Получателей меньше лимита чанка — значит, это последний чанк
+        received = 0
+        stream = iter_recipients(engine, job["segment"] or {}, cursor, max_recipients)
+        try:
+            async for page in stream:
+                if lease_lost.is_set(): break
+                for uid in page:
+                    issued.append(uid)
+                    await queue.put(uid)
+                received += len(page)
+        finally:
+            await stream.aclose()
+        done = received < max_recipients and not lease_lost.is_set()
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    except asyncio.CancelledError:
+        # Остановка бота: сохраняем, докуда дошли, снимаем аренду — продолжим после рестарта
+        await asyncio.shield(_flush(False, release=True))
+        raise
+    finally:
+        reporter.cancel()
+        for task in workers: task.cancel()
+
+    if lease_lost.is_set() or not await _flush(done, release=True):
+        logger.info(f"⏹️ Broadcast {broadcast_id} stopped without lease: {stats}")
+        return stats, False
+    if done:
+        logger.info(f"✅ Broadcast {broadcast_id} finished: {stats}")
+    else:
+        logger.info(f"⏸️ Broadcast {broadcast_id} chunk done at cursor {cursor}: {stats}")
+    return stats, done
+
+
+async def poll_forever(engine: Engine, runner: Callable[[int], Awaitable[None]]) -> None:
+    """Цикл очереди в каждой реплике; шлёт только та, чей claim получил задачу."""
+    while True:
+        try:
+            broadcast_id = await asyncio.to_thread(claim, engine)
+        except Exception as e:
+            logger.error(f"Broadcast queue error: {e}")
+            broadcast_id = None
+        if broadcast_id:
+            await runner(broadcast_id)
+            continue
+        _wake.clear()
+        try: await asyncio.wait_for(_wake.wait(), timeout=POLL_INTERVAL)
+        except asyncio.TimeoutError: pass
+
+
+# --- CLI: прогон против fake_bot_api.py ---
+
+async def _main(args) -> None:
+    import os
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from sqlalchemy import create_engine
+
+    api_url = os.getenv("TELEGRAM_API_URL")
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_url)) if api_url else None
+    bot = Bot(token=os.getenv("TELEGRAM_BOT_TOKEN", "0:fake"), session=session)
+    engine = create_engine(os.getenv("DATABASE_URL").replace("postgres://", "postgresql://", 1))
+
+    async def report(bid: int, stats: Dict[str, int], done: bool) -> None:
+        logger.info(f"{'✅' if done else '⏳'} #{bid}: {stats}")
+
+    if not args.resume:
+        await asyncio.to_thread(create, engine, args.from_chat, args.message_id, None, None, json.loads(args.segment))
+    started = time.monotonic()
+    stats: Dict[str, int] = {}
+    try:
+        # Все задачи очереди, по чанкам, пока есть что брать
+        while (broadcast_id := await asyncio.to_thread(claim, engine)):
+            stats, _ = await run(bot, engine, broadcast_id, on_progress=report)
+    finally:
+        await bot.session.close()
+    logger.info(f"⏱️ {sum(stats.values()) - stats.get('retries', 0)} recipients in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Broadcast runner (TELEGRAM_API_URL -> fake_bot_api.py)")
+    parser.add_argument("--from-chat", type=int, default=1)
+    parser.add_argument("--message-id", type=int, default=1)
+    parser.add_argument("--resume", action="store_true", help="только довести задачи из очереди, новую не создавать")
+    parser.add_argument("--segment", default="{}", help='JSON сегмента, например {"active_days": 7}')
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    asyncio.run(_main(parser.parse_args()))
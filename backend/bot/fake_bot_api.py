@@ -0,0 +1,127 @@
+"""
+Фейковый Telegram Bot API для прогонов рассылки без настоящего Telegram.
+
+    python fake_bot_api.py --port 8081 --rate 30 --blocked-every 50 --latency 0.05
+    TELEGRAM_API_URL=http://127.0.0.1:8081 DATABASE_URL=... python broadcast.py --from-chat 1 --message-id 1
+
+Лимит --rate на весь бот: сверх него — 429 с retry_after (как flood control).
+Каждый --blocked-every-й chat_id отвечает 403 "bot was blocked by the user".
+GET /stats — сколько сообщений получил каждый чат (дубли = повторная доставка).
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - [FAKE BOT API] - %(message)s")
+logger = logging.getLogger(__name__)
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+
+
+def make_handler(rate: float, retry_after: int, blocked_every: int, latency: float, error_rate: float):
+    lock = threading.Lock()
+    window: deque = deque()
+    received: Counter = Counter()
+    counters: Counter = Counter()
+    message_ids = iter(range(1, 10 ** 9))
+
+    def over_limit() -> bool:
+        now = time.monotonic()
+        with lock:
+            while window and now - window[0] > 1.0:
+                window.popleft()
+            if len(window) >= rate:
+                return True
+            window.append(now)
+            return False
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _params(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length).decode("utf-8") if length else ""
+            if "json" in (self.headers.get("Content-Type") or ""):
+                return json.loads(raw or "{}")
+            params = {k: v[0] for k, v in parse_qs(raw).items()}
+            params.update({k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()})
+            return params
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with lock:
+                    self._reply(200, {"counters": dict(counters), "chats": len(received),
+                                      "duplicates": sum(1 for n in received.values() if n > 1)})
+                return
+            self.do_POST()
+
+        def do_POST(self):
+            method = self.path.rstrip("/").split("/")[-1].split("?")[0]
+            params = self._params()
+            if latency: time.sleep(latency * random.uniform(0.5, 1.5))
+
+            if method == "getMe":
+                return self._reply(200, {"ok": True, "result": BOT_USER})
+            if method in ("deleteWebhook", "setWebhook", "setMyCommands"):
+                return self._reply(200, {"ok": True, "result": True})
+            if method == "getUpdates":
+                time.sleep(min(float(params.get("timeout") or 0), 1.0))
+                return self._reply(200, {"ok": True, "result": []})
+
+            chat_id = int(params.get("chat_id") or 0)
+            if over_limit():
+                with lock: counters["429"] += 1
+                return self._reply(429, {"ok": False, "error_code": 429,
+                                         "description": f"Too Many Requests: retry after {retry_after}",
+                                         "parameters": {"retry_after": retry_after}})
+            if error_rate and random.random() < error_rate:
+                with lock: counters["502"] += 1
+                return self._reply(502, {"ok": False, "error_code": 502, "description": "Bad Gateway"})
+            if blocked_every and chat_id % blocked_every == 0:
+                with lock: counters["403"] += 1
+                return self._reply(403, {"ok": False, "error_code": 403,
+                                         "description": "Forbidden: bot was blocked by the user"})
+
+            with lock:
+                counters[method] += 1
+                received[chat_id] += 1
+                message_id = next(message_ids)
+            if method == "copyMessage":
+                return self._reply(200, {"ok": True, "result": {"message_id": message_id}})
+            return self._reply(200, {"ok": True, "result": {
+                "message_id": message_id, "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"}, "from": BOT_USER, "text": params.get("text", ""),
+            }})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API server")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--rate", type=float, default=30, help="сообщений/с на бота до 429")
+    parser.add_argument("--retry-after", type=int, default=2)
+    parser.add_argument("--blocked-every", type=int, default=0, help="каждый N-й chat_id заблокировал бота")
+    parser.add_argument("--latency", type=float, default=0.0, help="средняя задержка ответа, сек")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 502")
+    args = parser.parse_args()
+
+    handler = make_handler(args.rate, args.retry_after, args.blocked_every, args.latency, args.error_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), handler)
+    logger.info(f"Serving fake Bot API on http://127.0.0.1:{args.port}")
+    server.serve_forever()
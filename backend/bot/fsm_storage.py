@@ -0,0 +1,54 @@
+import asyncio
+import json
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# ==========================================
+# FSM-ХРАНИЛИЩЕ В POSTGRES (таблица bot_fsm)
+# ==========================================
+# Вместо MemoryStorage: незаконченные диалоги админки (рассылка, замены)
+# переживают рестарт. Запросы короткие, идут через asyncio.to_thread.
+# Пустые записи (нет состояния и данных) удаляются.
+
+
+class PostgresStorage(BaseStorage):
+    def __init__(self, engine: Engine, key_builder: Optional[KeyBuilder] = None):
+        self.engine = engine
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+    def _upsert(self, key: str, column: str, value) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(f"""
+                    INSERT INTO bot_fsm (key, {column}, updated_at) VALUES (:key, :value, now())
+                    ON CONFLICT (key) DO UPDATE SET {column} = EXCLUDED.{column}, updated_at = now()
+                """),
+                {"key": key, "value": value},
+            )
+            conn.execute(text("DELETE FROM bot_fsm WHERE key = :key AND state IS NULL AND data = '{}'::jsonb"), {"key": key})
+
+    def _select(self, key: str, column: str):
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT {column} FROM bot_fsm WHERE key = :key"), {"key": key}).scalar()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        await asyncio.to_thread(self._upsert, self.key_builder.build(key), "state", value)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await asyncio.to_thread(self._select, self.key_builder.build(key), "state")
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        payload = json.dumps(dict(data), ensure_ascii=False)
+        await asyncio.to_thread(self._upsert, self.key_builder.build(key), "data", payload)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        data = await asyncio.to_thread(self._select, self.key_builder.build(key), "data")
+        return dict(data) if data else {}
+
+    async def close(self) -> None:
+        pass
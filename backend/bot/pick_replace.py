@@ -0,0 +1,108 @@
+import json
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# МАССОВЫЕ ЗАМЕНЫ ИМЁН В СЕТКЕ (user_picks)
+# ==========================================
+# Поиск по подстроке идёт через pg_trgm-индексы (миграция 0009), поэтому
+# превью (сколько строк / юзеров / какие имена заденет) дешёвое.
+#
+# Применение — пачками по BATCH_SIZE строк, каждая в своей короткой транзакции:
+# блокировки держатся миллисекунды, сохранения прогнозов юзеров не встают.
+# Keyset по id: строка, уже получившая новое имя, повторно не трогается,
+# даже если новое имя тоже подходит под шаблон.
+#
+# Пачки пишутся с source = 'bot' (change-feed не запускает пересчёт на каждую),
+# в конце один NOTIFY с source = NULL -> services/rescoring пересчитывает только этот турнир.
+
+BATCH_SIZE = 1000
+BATCH_PAUSE = 0.05
+TABLE_CHANNEL = "table_changes"  # = services/change_feed.TABLE_CHANNEL
+PREVIEW_NAMES = 10
+
+_MATCH = "(predicted_winner ILIKE :pattern OR player1 ILIKE :pattern OR player2 ILIKE :pattern)"
+_OPPONENT = "(player1 ILIKE :opp OR player2 ILIKE :opp)"
+
+
+def _like(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _where(tid: int, old_name: str, opponent: Optional[str]) -> Tuple[str, dict]:
+    clauses = ["tournament_id = :tid", _MATCH]
+    params = {"tid": tid, "pattern": _like(old_name)}
+    if opponent:
+        clauses.append(_OPPONENT)
+        params["opp"] = _like(opponent)
+    return " AND ".join(clauses), params
+
+
+def preview(engine: Engine, tid: int, old_name: str, opponent: Optional[str] = None) -> Dict:
+    """{"rows", "users", "names": [(имя, сколько строк)]} — что заденет замена."""
+    condition, params = _where(tid, old_name, opponent)
+    with engine.connect() as conn:
+        rows, users = conn.execute(
+            text(f"SELECT COUNT(*), COUNT(DISTINCT user_id) FROM user_picks WHERE {condition}"), params
+        ).one()
+        # Какие именно значения подошли под шаблон: защита от слишком широкой подстроки
+        names = conn.execute(text(f"""
+            SELECT name, COUNT(*) FROM (
+                SELECT unnest(ARRAY[predicted_winner, player1, player2]) AS name
+                FROM user_picks WHERE {condition}
+            ) n
+            WHERE name ILIKE :pattern
+            GROUP BY name ORDER BY COUNT(*) DESC LIMIT {PREVIEW_NAMES}
+        """), params).all()
+    return {"rows": rows, "users": users, "names": [tuple(n) for n in names]}
+
+
+def apply(engine: Engine, tid: int, old_name: str, new_name: str, opponent: Optional[str] = None,
+          batch_size: int = BATCH_SIZE) -> int:
+    """Заменяет имя пачками и просит пересчитать турнир. Возвращает число изменённых строк."""
+    condition, params = _where(tid, old_name, opponent)
+    query = text(f"""
+        WITH batch AS (
+            SELECT id FROM user_picks
+            WHERE id > :after AND {condition}
+            ORDER BY id LIMIT :limit
+        )
+        UPDATE user_picks up SET
+            predicted_winner = CASE WHEN up.predicted_winner ILIKE :pattern THEN :new_name ELSE up.predicted_winner END,
+            player1 = CASE WHEN up.player1 ILIKE :pattern THEN :new_name ELSE up.player1 END,
+            player2 = CASE WHEN up.player2 ILIKE :pattern THEN :new_name ELSE up.player2 END,
+            updated_at = now()
+        FROM batch WHERE up.id = batch.id
+        RETURNING up.id
+    """)
+    params = {**params, "new_name": new_name, "limit": batch_size}
+
+    after, total, started = 0, 0, time.monotonic()
+    try:
+        while True:
+            with engine.begin() as conn:
+                conn.execute(text("SELECT set_config('app.change_source', 'bot', true)"))
+                ids = conn.execute(query, {**params, "after": after}).scalars().all()
+            if not ids: break
+            total += len(ids)
+            after = max(ids)
+            if len(ids) < batch_size: break
+            time.sleep(BATCH_PAUSE)
+    finally:
+        # Даже после ошибки на середине: применённые пачки уже закоммичены и должны быть посчитаны
+        if total:
+            request_rescore(engine, tid)
+    logger.info(f"🔁 [T{tid}] Replaced {total} pick row(s) '{old_name}' -> '{new_name}' in {time.monotonic() - started:.1f}s")
+    return total
+
+def request_rescore(engine: Engine, tid: int) -> None:
+    """Событие change-feed с source = NULL: лидер бэкенда пересчитает турнир tid."""
+    payload = json.dumps({"table": "user_picks", "key": str(tid), "user": None, "source": None})
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_notify(:ch, :payload)"), {"ch": TABLE_CHANNEL, "payload": payload})
@@ -0,0 +1,152 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# БЛОКИРУЮЩИЕ ВЫЗОВЫ И ЗАДЕРЖКА EVENT LOOP
+# ==========================================
+# SQLAlchemy (sync) и gspread в хендлерах останавливают весь бот: пока идёт
+# запрос, /start не отвечает никому. Поэтому все такие вызовы — в пулы потоков:
+#   io    — короткие запросы (FSM, /start, рассылка, точечные правки); он же
+#           default executor цикла, т.е. через него идёт и asyncio.to_thread
+#   admin — тяжёлые операции админки (массовые замены, превью, Google Sheets):
+#           отдельный маленький пул, чтобы они не выедали потоки у io
+# Оба пула ограничены, у каждого вызова есть таймаут ожидания (поток при этом
+# не убивается — запрос в БД обрывает statement_timeout движка).
+#
+# Задержка цикла меряется тиком раз в LAG_INTERVAL: насколько позже он проснулся.
+# GET /metrics и /health отдаёт отдельный поток: зависший цикл всё равно виден.
+
+IO_WORKERS = int(os.getenv("BOT_IO_WORKERS", "8"))
+ADMIN_WORKERS = int(os.getenv("BOT_ADMIN_WORKERS", "2"))
+IO_TIMEOUT = 20
+ADMIN_TIMEOUT = 600
+
+LAG_INTERVAL = 0.5
+LAG_WARN = 0.25       # сек — пишем в лог
+STALL_UNHEALTHY = 10  # сек без тика -> /health = 503
+
+_pools = {
+    "io": ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="bot-io"),
+    "admin": ThreadPoolExecutor(max_workers=ADMIN_WORKERS, thread_name_prefix="bot-admin"),
+}
+
+_lock = threading.Lock()
+_state: Dict[str, float] = {
+    "last_tick_at": time.time(),
+    "lag_seconds": 0.0,
+    "lag_max_seconds": 0.0,
+    "lag_warnings_total": 0,
+}
+_calls: Dict[str, Dict[str, int]] = {name: {"inflight": 0, "total": 0, "timeouts": 0, "errors": 0} for name in _pools}
+
+
+def install(loop: asyncio.AbstractEventLoop) -> None:
+    """asyncio.to_thread (FSM-хранилище, рассылка) тоже идёт через ограниченный io-пул."""
+    loop.set_default_executor(_pools["io"])
+
+
+async def _run(pool: str, timeout: float, fn, args, kwargs):
+    counters = _calls[pool]
+    with _lock:
+        counters["inflight"] += 1
+        counters["total"] += 1
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_pools[pool], functools.partial(fn, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        with _lock: counters["timeouts"] += 1
+        logger.warning(f"⏱️ {pool}: {getattr(fn, '__name__', fn)} did not finish in {timeout}s")
+        raise
+    except Exception:
+        with _lock: counters["errors"] += 1
+        raise
+    finally:
+        with _lock: counters["inflight"] -= 1
+
+async def run(fn, *args, timeout: float = IO_TIMEOUT, **kwargs):
+    """Короткий блокирующий вызов (запрос в БД) вне event loop."""
+    return await _run("io", timeout, fn, args, kwargs)
+
+async def run_admin(fn, *args, timeout: float = ADMIN_TIMEOUT, **kwargs):
+    """Тяжёлая операция админки: свой пул, не мешает обычным апдейтам."""
+    return await _run("admin", timeout, fn, args, kwargs)
+
+
+async def monitor_lag() -> None:
+    """Тик раз в LAG_INTERVAL; опоздание тика = сколько цикл был занят."""
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(LAG_INTERVAL)
+        lag = max(0.0, time.monotonic() - started - LAG_INTERVAL)
+        with _lock:
+            _state["last_tick_at"] = time.time()
+            _state["lag_seconds"] = lag
+            _state["lag_max_seconds"] = max(_state["lag_max_seconds"], lag)
+            if lag > LAG_WARN: _state["lag_warnings_total"] += 1
+        if lag > LAG_WARN:
+            logger.warning(f"🐢 Event loop lag: {lag:.3f}s")
+
+def stall_seconds() -> float:
+    """Сколько цикл не тикал прямо сейчас (растёт, пока он заблокирован)."""
+    with _lock:
+        return max(0.0, time.time() - _state["last_tick_at"] - LAG_INTERVAL)
+
+def is_healthy() -> bool:
+    return stall_seconds() < STALL_UNHEALTHY
+
+def render_metrics() -> str:
+    stall = stall_seconds()
+    with _lock:
+        state = dict(_state)
+        calls = {name: dict(c) for name, c in _calls.items()}
+    lines = [
+        f"bot_event_loop_lag_seconds {state['lag_seconds']:.4f}",
+        f"bot_event_loop_lag_max_seconds {state['lag_max_seconds']:.4f}",
+        f"bot_event_loop_lag_warnings_total {state['lag_warnings_total']}",
+        f"bot_event_loop_stall_seconds {stall:.3f}",
+    ]
+    for name, c in calls.items():
+        lines.append(f'bot_blocking_calls_inflight{{pool="{name}"}} {c["inflight"]}')
+        lines.append(f'bot_blocking_calls_total{{pool="{name}"}} {c["total"]}')
+        lines.append(f'bot_blocking_call_timeouts_total{{pool="{name}"}} {c["timeouts"]}')
+        lines.append(f'bot_blocking_call_errors_total{{pool="{name}"}} {c["errors"]}')
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/health":
+            healthy = is_healthy()
+            body = json.dumps({"ok": healthy, "stall_seconds": round(stall_seconds(), 3)}).encode("utf-8")
+            self._reply(200 if healthy else 503, "application/json", body)
+        elif self.path == "/metrics":
+            self._reply(200, "text/plain; version=0.0.4", render_metrics().encode("utf-8"))
+        else:
+            self._reply(404, "text/plain", b"not found")
+
+    def _reply(self, code: int, content_type: str, body: bytes):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_server(port: int) -> None:
+    server = ThreadingHTTPServer(("0.0.0.0", port), _Handler)
+    threading.Thread(target=server.serve_forever, name="bot-metrics", daemon=True).start()
+    logger.info(f"🩺 Bot health/metrics on :{port} (/health, /metrics)")
@@ -0,0 +1,56 @@
+from typing import Dict, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# ==========================================
+# СЕГМЕНТЫ ПОЛУЧАТЕЛЕЙ РАССЫЛКИ
+# ==========================================
+# Сегмент — dict условий (через AND), хранится в broadcasts.segment:
+#   {}                    — все, кто не заблокировал бота
+#   {"active_days": N}    — делал прогнозы (сетка или daily) за последние N дней
+#   {"tournament_id": T}  — есть прогнозы в турнире T
+#   {"daily": True}       — участник Daily Challenge
+# Всё считается в SQL (EXISTS по индексам user_id), в Python приходят только id.
+
+_CONDITIONS = {
+    "active_days": """(
+        EXISTS (SELECT 1 FROM daily_picks dp
+                WHERE dp.user_id = u.user_id AND dp.created_at >= now() - make_interval(days => :active_days))
+        OR EXISTS (SELECT 1 FROM user_picks up
+                   WHERE up.user_id = u.user_id AND up.updated_at >= now() - make_interval(days => :active_days))
+    )""",
+    "tournament_id": "EXISTS (SELECT 1 FROM user_picks up WHERE up.user_id = u.user_id AND up.tournament_id = :tournament_id)",
+    "daily": "EXISTS (SELECT 1 FROM daily_leaderboard dl WHERE dl.user_id = u.user_id AND dl.total_picks > 0)",
+}
+
+
+def where(segment: Dict) -> Tuple[str, dict]:
+    """SQL-условие по users u + параметры. Неизвестные ключи — ошибка, а не рассылка всем."""
+    clauses = ["u.bot_blocked_at IS NULL"]
+    params = {}
+    for key, value in (segment or {}).items():
+        if key not in _CONDITIONS:
+            raise ValueError(f"Unknown segment filter: {key}")
+        if key == "daily" and not value: continue
+        clauses.append(_CONDITIONS[key])
+        if key != "daily": params[key] = int(value)
+    return " AND ".join(clauses), params
+
+def recipients_query(segment: Dict) -> Tuple[str, dict]:
+    """Keyset-страница получателей: user_id > :after, по возрастанию, не больше :limit."""
+    condition, params = where(segment)
+    sql = f"SELECT u.user_id FROM users u WHERE u.user_id > :after AND {condition} ORDER BY u.user_id LIMIT :limit"
+    return sql, params
+
+def count(engine: Engine, segment: Dict) -> int:
+    condition, params = where(segment)
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM users u WHERE {condition}"), params).scalar()
+
+def describe(segment: Dict) -> str:
+    parts = []
+    if segment.get("active_days"): parts.append(f"активные за {segment['active_days']} дн.")
+    if segment.get("tournament_id"): parts.append(f"с прогнозами в турнире {segment['tournament_id']}")
+    if segment.get("daily"): parts.append("участники Daily")
+    return ", ".join(parts) or "все"
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+
+import runtime
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# РУЧНЫЕ МЕТКИ DAILY_MATCHES (/block, /manual, /unblock)
+# ==========================================
+# Один авторизованный клиент и открытый лист на всё время работы бота.
+# Индекс match_id -> номер строки строится по одной колонке A (col_values),
+# а не ws.find на каждую команду. Парсер удаляет и дописывает строки, поэтому
+# перед записью номера строк сверяются одним batch_get по A: расхождение
+# или промах -> индекс перечитывается. Живёт INDEX_TTL секунд.
+#
+# Команды, пришедшие в пределах FLUSH_DELAY, уходят одним batch_update
+# по колонке J (её парсер не пишет никогда — daily_sheet_writer).
+
+WORKSHEET = "DAILY_MATCHES"
+BLOCK_COLUMN = "J"
+INDEX_TTL = 300
+FLUSH_DELAY = 1.0
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+_sheet_id: Optional[str] = None
+_credentials = None
+_ws = None
+_index: Dict[str, int] = {}
+_index_at = 0.0
+_lock = threading.Lock()  # apply() идёт в потоке; две пачки не пишут одновременно
+
+# (match_id, метка, future команды) — ждут общего batch_update
+_pending: List[Tuple[str, str, asyncio.Future]] = []
+_flush_task: Optional[asyncio.Task] = None
+
+
+def configure(sheet_id: Optional[str], credentials) -> None:
+    global _sheet_id, _credentials
+    _sheet_id, _credentials = sheet_id, credentials
+
+def enabled() -> bool:
+    return bool(_sheet_id and _credentials)
+
+def _worksheet():
+    global _ws
+    if _ws is None:
+        creds_dict = json.loads(_credentials) if isinstance(_credentials, str) else _credentials
+        client = gspread.authorize(ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE))
+        _ws = client.open_by_key(_sheet_id).worksheet(WORKSHEET)
+    return _ws
+
+def _reset() -> None:
+    global _ws, _index_at
+    _ws, _index_at = None, 0.0
+
+def _refresh_index(ws) -> None:
+    global _index, _index_at
+    _index = {}
+    for row, value in enumerate(ws.col_values(1)[1:], start=2):
+        _index.setdefault(str(value).strip(), row)
+    _index_at = time.time()
+
+def _verified_rows(ws, m_ids: List[str]) -> Dict[str, int]:
+    """Номера строк из индекса, подтверждённые текущим содержимым колонки A."""
+    rows = {m_id: _index[m_id] for m_id in m_ids if m_id in _index}
+    if not rows: return {}
+    ranges = ws.batch_get([f"A{row}" for row in rows.values()])
+    confirmed = {}
+    for (m_id, row), values in zip(rows.items(), ranges):
+        if values and values[0] and str(values[0][0]).strip() == m_id:
+            confirmed[m_id] = row
+    return confirmed
+
+
+def apply(edits: Dict[str, str]) -> Dict[str, bool]:
+    """
+    Проставляет метки {match_id: "X"/"M"/""} одним batch_update.
+    Возвращает {match_id: найден ли в таблице}.
+    """
+    with _lock:
+        return _apply(edits)
+
+def _apply(edits: Dict[str, str]) -> Dict[str, bool]:
+    try:
+        ws = _worksheet()
+        if time.time() - _index_at > INDEX_TTL:
+            _refresh_index(ws)
+            rows = {m_id: _index[m_id] for m_id in edits if m_id in _index}
+        else:
+            rows = _verified_rows(ws, list(edits))
+            if len(rows) < len(edits):
+                # Строки сдвинулись или матч дописан после построения индекса
+                _refresh_index(ws)
+                rows = {m_id: _index[m_id] for m_id in edits if m_id in _index}
+        if rows:
+            ws.batch_update([
+                {"range": f"{BLOCK_COLUMN}{row}", "values": [[edits[m_id]]]} for m_id, row in rows.items()
+            ])
+    except Exception:
+        # Протухший токен / удалённый лист: следующая команда переподключится
+        _reset()
+        raise
+    return {m_id: m_id in rows for m_id in edits}
+
+
+async def _flush_later() -> None:
+    global _pending, _flush_task
+    await asyncio.sleep(FLUSH_DELAY)
+    # Команды, пришедшие во время записи, соберутся уже в следующую пачку
+    batch, _pending, _flush_task = _pending, [], None
+    edits = {m_id: flag for m_id, flag, _ in batch}  # повтор по матчу — побеждает последняя команда
+    try:
+        found = await runtime.run_admin(apply, edits, timeout=60)
+    except Exception as e:
+        for _, _, fut in batch:
+            if not fut.done(): fut.set_exception(e)
+        return
+    logger.info(f"📝 Sheet marks: {len(edits)} match(es) in one batch_update")
+    for m_id, _, fut in batch:
+        if not fut.done(): fut.set_result(found[m_id])
+
+async def mark(m_ids: List[str], flag: str) -> Dict[str, bool]:
+    """Ставит метку в очередь ближайшего batch_update и ждёт его. {match_id: найден}."""
+    global _flush_task
+    loop = asyncio.get_running_loop()
+    futures = []
+    for m_id in m_ids:
+        fut = loop.create_future()
+        _pending.append((m_id, flag, fut))
+        futures.append(fut)
+    if _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_later())
+    results = await asyncio.gather(*futures)
+    return dict(zip(m_ids, results))
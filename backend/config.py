@@ -13,6 +13,12 @@ GOOGLE_CREDENTIALS = os.getenv("GOOGLE_SHEETS_CREDENTIALS") or os.getenv("GOOGLE
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TENNIS_API_KEY = os.getenv("TENNIS_API_KEY")
 
+# Матчи daily пишет парсер прямо в БД; DAILY_MATCHES — только ручные блоки M/X
+DAILY_DIRECT_INGEST = os.getenv("DAILY_DIRECT_INGEST", "").lower() in ("1", "true", "yes")
+
+# Админы — те же, что у бота (ADMIN_ID через запятую): доступ к /admin/*
+ADMIN_IDS = {int(x) for x in os.getenv("ADMIN_ID", "360269274,5159283334").split(",") if x.strip().isdigit()}
+
 if not TELEGRAM_BOT_TOKEN:
     raise RuntimeError("TELEGRAM_BOT_TOKEN is required")
 if not GOOGLE_SHEET_ID:
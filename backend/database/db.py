@@ -16,12 +16,9 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def init_db():
-    """
-    Создаёт все таблицы в базе данных.
-    """
-    from database import models
-    Base.metadata.create_all(bind=engine)
+# Схема БД управляется миграциями (backend/migrations, Alembic).
+# Они запускаются отдельным шагом перед деплоем: `alembic upgrade head`,
+# а не create_all при каждом старте воркера.
 
 def get_db():
     """
@@ -0,0 +1,200 @@
+"""
+Регрессионная проверка планов горячих запросов.
+
+Засеивает синтетические данные внутри транзакции, делает ANALYZE,
+прогоняет EXPLAIN по каждому горячему запросу и падает (exit 1),
+если по "охраняемой" таблице планировщик выбрал Seq Scan.
+Транзакция откатывается — база остаётся как была.
+
+Запуск (из папки backend, на локальной/CI базе после `alembic upgrade head`):
+    DATABASE_URL=postgresql://... python -m database.explain_check
+"""
+import json
+import logging
+import sys
+from datetime import date
+
+from sqlalchemy import text
+
+from database.db import engine
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+# Диапазоны ID, которые точно не пересекаются с боевыми
+T_BASE = 900000
+U_BASE = 9000000000
+TOURNAMENTS = 200
+# Прогнозы засеиваем только в часть турниров, иначе user_picks раздувается до миллионов
+PICK_TOURNAMENTS = 10
+USERS = 500
+DAILY_DAYS = 60
+DAILY_PER_DAY = 40
+
+SEED = [
+    # Турниры (R32: 31 матч + Champion)
+    f"""
+    INSERT INTO tournaments (id, name, status, starting_round, type, tag)
+    SELECT {T_BASE} + t, 'Bench ' || t, 'CLOSED', 'R32', 'ATP-250', 'ATP'
+    FROM generate_series(1, {TOURNAMENTS}) t
+    """,
+    f"""
+    INSERT INTO users (user_id, first_name, username)
+    SELECT {U_BASE} + u, 'User ' || u, 'user' || u
+    FROM generate_series(1, {USERS}) u
+    """,
+    f"""
+    INSERT INTO true_draw (tournament_id, round, match_number, player1, player2, winner)
+    SELECT {T_BASE} + t, r.name, m, 'P' || m || 'a', 'P' || m || 'b', 'P' || m || 'a'
+    FROM generate_series(1, {TOURNAMENTS}) t
+    CROSS JOIN (VALUES ('R32', 16), ('R16', 8), ('QF', 4), ('SF', 2), ('F', 1)) AS r(name, cnt)
+    CROSS JOIN LATERAL generate_series(1, r.cnt) m
+    """,
+    f"""
+    INSERT INTO user_picks (user_id, tournament_id, round, match_number, player1, player2, predicted_winner)
+    SELECT {U_BASE} + u, {T_BASE} + t, r.name, m, 'P' || m || 'a', 'P' || m || 'b',
+           CASE WHEN (u + m) % 2 = 0 THEN 'P' || m || 'a' ELSE 'P' || m || 'b' END
+    FROM generate_series(1, {PICK_TOURNAMENTS}) t
+    CROSS JOIN generate_series(1, {USERS}) u
+    CROSS JOIN (VALUES ('R32', 16), ('R16', 8), ('QF', 4), ('SF', 2), ('F', 1)) AS r(name, cnt)
+    CROSS JOIN LATERAL generate_series(1, r.cnt) m
+    """,
+    f"""
+    INSERT INTO user_scores (user_id, tournament_id, score, correct_picks)
+    SELECT {U_BASE} + u, {T_BASE} + t, (u * 7 + t) % 100, (u * 3 + t) % 31
+    FROM generate_series(1, {TOURNAMENTS}) t CROSS JOIN generate_series(1, {USERS}) u
+    """,
+    f"""
+    INSERT INTO leaderboard (tournament_id, user_id, rank, score, correct_picks)
+    SELECT {T_BASE} + t, {U_BASE} + u, 0, (u * 7 + t) % 100, (u * 3 + t) % 31
+    FROM generate_series(1, {TOURNAMENTS}) t CROSS JOIN generate_series(1, {USERS}) u
+    """,
+    f"""
+    INSERT INTO daily_matches (id, tournament, status, start_time, match_date, player1, player2, winner)
+    SELECT 'bench_' || d || '_' || m, 'ATP Bench', 'COMPLETED',
+           DATE '2030-01-01' + d + make_interval(hours => 10 + m % 12), DATE '2030-01-01' + d, 'A', 'B', 1 + m % 2
+    FROM generate_series(1, {DAILY_DAYS}) d CROSS JOIN generate_series(1, {DAILY_PER_DAY}) m
+    """,
+    f"""
+    INSERT INTO daily_picks (user_id, match_id, predicted_winner, is_correct, points)
+    SELECT {U_BASE} + u, 'bench_' || d || '_' || m, 1 + (u + m) % 2, (u + m) % 2 = 0, ((u + m + 1) % 2)
+    FROM generate_series(1, {DAILY_DAYS}) d
+    CROSS JOIN generate_series(1, {DAILY_PER_DAY}) m
+    CROSS JOIN generate_series(1, {USERS // 5}) u
+    """,
+]
+
+ANALYZE_TABLES = ["tournaments", "users", "true_draw", "user_picks", "user_scores", "leaderboard", "daily_matches", "daily_picks"]
+
+T_ID = T_BASE + 7
+U_ID = U_BASE + 42
+DAY = date(2030, 1, 1 + 15)
+
+# (название, SQL, параметры, таблицы, по которым Seq Scan запрещён)
+HOT_QUERIES = [
+    (
+        "tournament: user picks",
+        "SELECT * FROM user_picks WHERE tournament_id = :tid AND user_id = :uid",
+        {"tid": T_ID, "uid": U_ID}, {"user_picks"},
+    ),
+    (
+        "tournament: true draw",
+        "SELECT * FROM true_draw WHERE tournament_id = :tid",
+        {"tid": T_ID}, {"true_draw"},
+    ),
+    (
+        "leaderboard: tournament ordering",
+        """
+        SELECT * FROM leaderboard WHERE tournament_id = :tid
+        ORDER BY score DESC, correct_picks DESC
+        """,
+        {"tid": T_ID}, {"leaderboard"},
+    ),
+    (
+        "leaderboard: finished picks per user",
+        """
+        SELECT up.user_id, COUNT(up.id) FROM user_picks up
+        JOIN true_draw td ON up.tournament_id = td.tournament_id
+                         AND up.round = td.round AND up.match_number = td.match_number
+        WHERE up.tournament_id = :tid AND td.winner IS NOT NULL AND up.predicted_winner IS NOT NULL
+        GROUP BY up.user_id
+        """,
+        {"tid": T_ID}, {"user_picks", "true_draw"},
+    ),
+    (
+        "leaderboard/list: my entry",
+        "SELECT * FROM leaderboard WHERE tournament_id = :tid AND user_id = :uid",
+        {"tid": T_ID, "uid": U_ID}, {"leaderboard"},
+    ),
+    (
+        "profile: finished picks for user in tournament",
+        """
+        SELECT COUNT(*) FROM user_picks up
+        JOIN true_draw td ON up.tournament_id = td.tournament_id
+                         AND up.round = td.round AND up.match_number = td.match_number
+        WHERE up.user_id = :uid AND up.tournament_id = :tid
+          AND td.winner IS NOT NULL AND up.predicted_winner IS NOT NULL
+        """,
+        {"tid": T_ID, "uid": U_ID}, {"user_picks", "true_draw"},
+    ),
+    (
+        "profile: rank in tournament",
+        "SELECT COUNT(*) FROM user_scores WHERE tournament_id = :tid AND score > :score",
+        {"tid": T_ID, "score": 50}, {"user_scores"},
+    ),
+    (
+        "daily: matches of the day",
+        "SELECT * FROM daily_matches WHERE match_date = :day ORDER BY start_time",
+        {"day": DAY}, {"daily_matches"},
+    ),
+    (
+        "daily: user picks of the day",
+        """
+        SELECT * FROM daily_picks
+        WHERE user_id = :uid AND match_id IN ('bench_15_1', 'bench_15_2', 'bench_15_3')
+        """,
+        {"uid": U_ID}, {"daily_picks"},
+    ),
+]
+
+
+def _seq_scans(plan_node: dict, found: list) -> list:
+    if plan_node.get("Node Type") == "Seq Scan":
+        found.append(plan_node.get("Relation Name"))
+    for child in plan_node.get("Plans", []):
+        _seq_scans(child, found)
+    return found
+
+
+def run() -> int:
+    failures = []
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            for stmt in SEED:
+                conn.execute(text(stmt))
+            for table in ANALYZE_TABLES:
+                conn.execute(text(f"ANALYZE {table}"))
+
+            for name, sql, params, guarded in HOT_QUERIES:
+                raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+                plan = raw if isinstance(raw, list) else json.loads(raw)
+                scanned = _seq_scans(plan[0]["Plan"], [])
+                bad = sorted(set(scanned) & guarded)
+                if bad:
+                    failures.append(name)
+                    logger.error(f"❌ {name}: Seq Scan on {', '.join(bad)}")
+                else:
+                    logger.info(f"✅ {name}")
+        finally:
+            trans.rollback()
+
+    if failures:
+        logger.error(f"{len(failures)}/{len(HOT_QUERIES)} hot queries fell back to a sequential scan")
+        return 1
+    logger.info(f"All {len(HOT_QUERIES)} hot queries use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
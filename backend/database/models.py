@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Boolean, BigInteger
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Date, Boolean, BigInteger, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from sqlalchemy.schema import UniqueConstraint
+from sqlalchemy.schema import UniqueConstraint, Index
 from database.db import Base
 import enum
 
@@ -59,6 +60,8 @@ class User(Base):
     first_name = Column(String)
     last_name = Column(String, nullable=True)
     username = Column(String, nullable=True)
+    # Заблокировал бота (рассылки его пропускают; сбрасывается на /start)
+    bot_blocked_at = Column(DateTime, nullable=True)
 
     user_picks = relationship("UserPick", back_populates="user")
     scores = relationship("UserScore", back_populates="user")
@@ -77,6 +80,10 @@ class UserPick(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    # Один прогноз на матч; префикс (tournament_id, user_id) закрывает выборку сетки юзера
+    __table_args__ = (
+        Index('unique_user_pick', 'tournament_id', 'user_id', 'round', 'match_number', unique=True),
+    )
     user = relationship("User", back_populates="user_picks")
     tournament = relationship("Tournament", back_populates="user_picks")
 
@@ -89,6 +96,11 @@ class UserScore(Base):
     correct_picks = Column(Integer, default=0)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        Index('unique_user_score', 'tournament_id', 'user_id', unique=True),
+        # Ранг в профиле: COUNT(*) WHERE tournament_id = ? AND score > ?
+        Index('ix_user_scores_tournament_score', 'tournament_id', 'score'),
+    )
     user = relationship("User", back_populates="scores")
     tournament = relationship("Tournament", back_populates="scores")
 
@@ -102,7 +114,10 @@ class Leaderboard(Base):
     correct_picks = Column(Integer)
     # УБРАЛИ total_picks ЧТОБЫ НЕ ПАДАЛО
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
-    
+
+    __table_args__ = (
+        Index('unique_leaderboard_entry', 'tournament_id', 'user_id', unique=True),
+    )
     user = relationship("User", back_populates="leaderboard_entries")
     tournament = relationship("Tournament", back_populates="leaderboard_entries")
 
@@ -113,6 +128,8 @@ class DailyMatch(Base):
     status = Column(String, default="PLANNED")
     round = Column(String, nullable=True)
     start_time = Column(DateTime)
+    # Дата матча (= start_time.date()), хранится отдельно ради индекса
+    match_date = Column(Date, nullable=True, index=True)
     player1 = Column(String)
     player2 = Column(String)
     score = Column(String, nullable=True)
@@ -128,6 +145,10 @@ class DailyPick(Base):
     is_correct = Column(Boolean, nullable=True)
     points = Column(Integer, default=0)
     created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index('unique_daily_pick', 'user_id', 'match_id', unique=True),
+    )
     user = relationship("User")
     match = relationship("DailyMatch", back_populates="picks")
 
@@ -137,4 +158,72 @@ class DailyLeaderboard(Base):
     total_points = Column(Integer, default=0)
     correct_picks = Column(Integer, default=0)
     total_picks = Column(Integer, default=0)
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+
+class Broadcast(Base):
+    """Рассылка бота (пишет и читает бот, сырым SQL). Очередь: scheduled -> running -> done."""
+    __tablename__ = "broadcasts"
+    id = Column(Integer, primary_key=True)
+    from_chat_id = Column(BigInteger, nullable=False)
+    message_id = Column(BigInteger, nullable=False)
+    created_by = Column(BigInteger, nullable=True)
+    status = Column(String, nullable=False, server_default="scheduled")
+    cursor = Column(BigInteger, nullable=False, server_default="0")
+    delivered = Column(Integer, nullable=False, server_default="0")
+    failed = Column(Integer, nullable=False, server_default="0")
+    blocked = Column(Integer, nullable=False, server_default="0")
+    retries = Column(Integer, nullable=False, server_default="0")
+    created_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+    # Очередь и аренда воркера бота (bot/broadcast.py)
+    scheduled_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    # Фильтр получателей (bot/segments.py); {} — все
+    segment = Column(JSONB, nullable=False, server_default="{}")
+
+    __table_args__ = (
+        Index('ix_broadcasts_queue', 'status', 'scheduled_at'),
+    )
+
+
+class BotFsm(Base):
+    """Состояние диалога бота (aiogram FSM, bot/fsm_storage.py): переживает рестарт."""
+    __tablename__ = "bot_fsm"
+    key = Column(String, primary_key=True)
+    state = Column(String, nullable=True)
+    data = Column(JSONB, nullable=False, server_default="{}")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class SyncRun(Base):
+    """Цикл синка из таблиц (пишет services/sync_runs сырым SQL): этапы, счётчики, листы."""
+    __tablename__ = "sync_runs"
+    id = Column(BigInteger, primary_key=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    duration_ms = Column(Integer, nullable=False)
+    stages = Column(JSONB, nullable=False, server_default="{}")
+    counters = Column(JSONB, nullable=False, server_default="{}")
+    sheets = Column(JSONB, nullable=False, server_default="[]")
+    error = Column(Text, nullable=True)
+
+    # История по типу синка (админка) и чистка по возрасту
+    __table_args__ = (
+        Index('ix_sync_runs_kind_started', 'kind', text('started_at DESC')),
+        Index('ix_sync_runs_started', 'started_at'),
+    )
+
+
+# === ИНДЕКСЫ ПОД ВЫРАЖЕНИЯ (объявляются после классов) ===
+# Лидерборд турнира: ORDER BY score DESC, correct_picks DESC
+Index('ix_leaderboard_tournament_score', Leaderboard.tournament_id, Leaderboard.score.desc(), Leaderboard.correct_picks.desc())
+# Массовые замены бота: ILIKE '%подстрока%' по именам — GIN по триграммам (pg_trgm, миграция 0009)
+Index('ix_user_picks_winner_trgm', UserPick.predicted_winner,
+      postgresql_using='gin', postgresql_ops={'predicted_winner': 'gin_trgm_ops'})
+Index('ix_user_picks_player1_trgm', UserPick.player1,
+      postgresql_using='gin', postgresql_ops={'player1': 'gin_trgm_ops'})
+Index('ix_user_picks_player2_trgm', UserPick.player2,
+      postgresql_using='gin', postgresql_ops={'player2': 'gin_trgm_ops'})
@@ -0,0 +1,9 @@
+"""
+Нагрузочный прогон мини-аппа против локального инстанса бэкенда.
+
+Данные — те же, что у бенчмарков (benchmarks.datagen), initData подписывается
+локально тем же токеном, что у бэкенда. Запуск из папки backend:
+    DATABASE_URL=postgresql://localhost/tennis_bench python -m benchmarks.datagen --users 2000
+    uvicorn main:app --port 8000                      # с тем же TELEGRAM_BOT_TOKEN
+    TELEGRAM_BOT_TOKEN=... python -m loadtest.run --users 2000 --profile tournament_open --think-scale 0
+"""
@@ -0,0 +1,37 @@
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+# ==========================================
+# ПОДПИСАННЫЙ initData ДЛЯ НАГРУЗКИ
+# ==========================================
+# Строка, которую мини-апп шлёт в Authorization, подписанная тем же токеном,
+# что у локального бэкенда: verify_telegram_data принимает её как настоящую.
+# Алгоритм из документации Telegram (Validating data received via the Mini App):
+#   secret = HMAC_SHA256(key="WebAppData", msg=bot_token)
+#   hash   = hex(HMAC_SHA256(key=secret, msg=data_check_string))
+# data_check_string — отсортированные строки "key=value" без hash, через "\n".
+
+
+def sign(bot_token: str, user: Dict, auth_date: Optional[int] = None) -> str:
+    fields = {
+        "auth_date": str(auth_date or int(time.time())),
+        "query_id": f"load{uuid.uuid4().hex[:16]}",
+        "user": json.dumps(user, ensure_ascii=False, separators=(",", ":")),
+    }
+    data_check_string = "\n".join(sorted(f"{k}={v}" for k, v in fields.items()))
+    secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+def for_user(bot_token: str, user_id: int) -> str:
+    """initData юзера из диапазона бенчмарка (имена как в benchmarks.datagen)."""
+    n = user_id % 100_000_000
+    return sign(bot_token, {
+        "id": user_id, "first_name": f"Bench {n}", "last_name": "",
+        "username": f"bench{n}", "language_code": "ru", "allows_write_to_pm": True,
+    })
@@ -0,0 +1,155 @@
+"""
+Профили трафика мини-аппа для нагрузочного прогона.
+
+Профиль — взвешенный набор сессий; сессия — шаги, которые один юзер делает подряд
+(с паузами think в секундах). В путях подстановки, каждая выбирается заново:
+    {active} {closed} {tournament}  турнир бенчмарка (ACTIVE / CLOSED / любой)
+    {peer}                          другой юзер бенчмарка
+    {today}                         день daily с незавершёнными матчами
+    {ids}                           CLOSED-турниры через запятую (combined)
+body "$bracket" — полная сетка ACTIVE-турнира со случайными выборами.
+
+Записанный профиль из access-лога uvicorn (доли маршрутов как на проде):
+    python -m loadtest.profiles --from-log access.log --out recorded.json
+    python -m loadtest.run --profile recorded.json
+"""
+import argparse
+import json
+import logging
+import re
+from collections import Counter
+from typing import Dict, List
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _get(path: str, think: float = 0.0) -> dict:
+    return {"method": "GET", "path": path, "think": think}
+
+def _save_bracket(think: float = 0.0) -> dict:
+    return {"method": "POST", "path": "/picks/bulk", "body": "$bracket", "think": think}
+
+
+# Открытие турнира: все заходят разом, смотрят сетку и сохраняют её несколько раз
+TOURNAMENT_OPEN = [
+    {"name": "fill_bracket", "weight": 1, "steps": [
+        _get("/tournaments"),
+        _get("/tournament/{active}", think=3),
+        _save_bracket(think=5),
+        _save_bracket(think=5),
+        _save_bracket(think=2),
+        _get("/tournament/{active}"),
+    ]},
+]
+
+# Лайв: фронт опрашивает матчи дня и лидерборды (POLL — интервал опроса)
+POLL = 10
+LIVE_POLLING = [
+    {"name": "poll_daily", "weight": 1, "steps": [
+        _get("/daily/matches?target_date={today}", think=POLL),
+        _get("/daily/matches?target_date={today}", think=POLL),
+        _get("/daily/leaderboard", think=1),
+        _get("/daily/matches?target_date={today}", think=POLL),
+    ]},
+    {"name": "poll_tournament", "weight": 1, "steps": [
+        _get("/leaderboard/tournament/{active}", think=POLL),
+        _get("/leaderboard/tournament/{active}", think=POLL),
+        _get("/tournament/{active}", think=POLL),
+    ]},
+]
+
+# Просмотр лидербордов: общий, свои турниры, чужие сетки, профиль
+LEADERBOARD_BROWSING = [
+    {"name": "browse", "weight": 1, "steps": [
+        _get("/leaderboard/", think=2),
+        _get("/leaderboard/list", think=2),
+        _get("/leaderboard/tournament/{closed}", think=3),
+        _get("/tournament/{closed}/user/{peer}", think=4),
+        _get("/tournament/{closed}/user/{peer}", think=4),
+        _get("/tournament/{closed}/user/{peer}", think=2),
+        _get("/users/profile/stats", think=2),
+        _get("/leaderboard/combined?ids={ids}"),
+    ]},
+]
+
+PROFILES: Dict[str, List[dict]] = {
+    "tournament_open": TOURNAMENT_OPEN,
+    "live_polling": LIVE_POLLING,
+    "leaderboard_browsing": LEADERBOARD_BROWSING,
+    # Обычный вечер во время турнира
+    "mixed": (
+        [dict(s, weight=2 * s["weight"]) for s in TOURNAMENT_OPEN]
+        + [dict(s, weight=5 * s["weight"]) for s in LIVE_POLLING]
+        + [dict(s, weight=3 * s["weight"]) for s in LEADERBOARD_BROWSING]
+    ),
+}
+
+
+def load(name_or_path: str) -> List[dict]:
+    """Встроенный профиль по имени или JSON-файл ({"sessions": [...]} или сразу список)."""
+    if name_or_path in PROFILES:
+        return PROFILES[name_or_path]
+    with open(name_or_path, encoding="utf-8") as f:
+        data = json.load(f)
+    sessions = data["sessions"] if isinstance(data, dict) else data
+    if not sessions:
+        raise SystemExit(f"Profile {name_or_path} has no sessions")
+    return sessions
+
+
+# ==========================================
+# ПРОФИЛЬ ИЗ ACCESS-ЛОГА
+# ==========================================
+
+_REQUEST_RE = re.compile(r'"(GET|POST) (\S+) HTTP/[\d.]+" (\d{3})')
+# Конкретные ID -> подстановки (в локальной базе боевых турниров и юзеров нет)
+_PATH_RULES = [
+    (re.compile(r"^/tournament/\d+/user/\d+"), "/tournament/{tournament}/user/{peer}"),
+    (re.compile(r"^/tournament/\d+"), "/tournament/{tournament}"),
+    (re.compile(r"^/leaderboard/tournament/\d+"), "/leaderboard/tournament/{tournament}"),
+    (re.compile(r"target_date=[^&]*"), "target_date={today}"),
+    (re.compile(r"ids=[^&]*"), "ids={ids}"),
+]
+# Стрим, ручной синк и служебные ручки в нагрузку не идут
+_SKIP = ("/live/", "/sync", "/ping", "/docs", "/openapi.json", "/auth/")
+
+def normalize(path: str) -> str:
+    for pattern, replacement in _PATH_RULES:
+        path = pattern.sub(replacement, path)
+    return path
+
+def from_access_log(lines) -> List[dict]:
+    """Каждый маршрут — сессия из одного запроса с весом = числу запросов в логе."""
+    counts: Counter = Counter()
+    for line in lines:
+        match = _REQUEST_RE.search(line)
+        if not match: continue
+        method, path, _ = match.groups()
+        if path == "/" or any(path.startswith(prefix) for prefix in _SKIP): continue
+        counts[(method, normalize(path))] += 1
+
+    sessions = []
+    for (method, path), count in counts.most_common():
+        step = {"method": method, "path": path, "think": 0.0}
+        if method == "POST":
+            if path != "/picks/bulk": continue  # тела запросов в логе нет — воспроизводим только сетку
+            step["body"] = "$bracket"
+        sessions.append({"name": f"{method} {path}", "weight": count, "steps": [step]})
+    return sessions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a traffic profile from a uvicorn access log")
+    parser.add_argument("--from-log", required=True)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    with open(args.from_log, encoding="utf-8", errors="replace") as f:
+        sessions = from_access_log(f)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"sessions": sessions}, f, ensure_ascii=False, indent=2)
+    total = sum(s["weight"] for s in sessions)
+    for s in sessions[:15]:
+        logger.info(f"📊 {s['name']:60} {s['weight'] / total:6.1%}")
+    logger.info(f"💾 {len(sessions)} routes, {total} requests -> {args.out}")
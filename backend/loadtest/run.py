@@ -0,0 +1,234 @@
+"""
+Нагрузочный прогон: профиль трафика мини-аппа против локального бэкенда
+ступенями растущей конкуренции. По каждой ступени — p50/p95/p99 и доля ошибок
+по маршрутам; ступень, где пропускная способность перестала расти или вышли
+за SLO, — точка насыщения текущей связки воркеров и пула соединений.
+
+    TELEGRAM_BOT_TOKEN=<токен локального бэкенда> python -m loadtest.run \\
+        --profile mixed --steps 1,5,10,25,50,100 --duration 30 --out load.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks import datagen
+from loadtest import initdata, profiles
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+# httpx пишет в INFO каждый запрос
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Насыщение: следующая ступень дала меньше +10% RPS
+MIN_RPS_GAIN = 0.10
+DEFAULT_SLO_P95_MS = 500
+DEFAULT_MAX_ERROR_RATE = 0.01
+
+
+# ==========================================
+# ДАННЫЕ БЕНЧМАРКА (ТЕ ЖЕ, ЧТО ЗАЛИЛ datagen)
+# ==========================================
+
+class Dataset:
+    def __init__(self, cfg: datagen.Config):
+        self.cfg = cfg
+        self.tournaments = datagen.tournaments(cfg)
+        rng = random.Random(cfg.seed)
+        draws = {t["id"]: datagen.true_draw(t, rng) for t in self.tournaments}
+        self.active = [t for t in self.tournaments if t["status"] == "ACTIVE"]
+        self.closed = [t for t in self.tournaments if t["status"] == "CLOSED"]
+        self.active_draws = {t["id"]: draws[t["id"]] for t in self.active}
+        self.today = (datagen.DAILY_START + timedelta(days=cfg.days - 1)).isoformat()
+        self.closed_ids = ",".join(str(t["id"]) for t in self.closed)
+
+    def user_id(self, n: int) -> int:
+        return datagen.U_BASE + 1 + n % self.cfg.users
+
+    def render(self, path: str, rng: random.Random) -> str:
+        values = {
+            "active": lambda: rng.choice(self.active)["id"],
+            "closed": lambda: rng.choice(self.closed)["id"],
+            "tournament": lambda: rng.choice(self.tournaments)["id"],
+            "peer": lambda: self.user_id(rng.randrange(self.cfg.users)),
+            "today": lambda: self.today,
+            "ids": lambda: self.closed_ids,
+        }
+        return re.sub(r"\{(\w+)\}", lambda m: str(values[m.group(1)]()), path)
+
+    def bracket(self, rng: random.Random) -> List[dict]:
+        t = rng.choice(self.active)
+        return [
+            {"tournament_id": t["id"], "round": p["round"], "match_number": p["match_number"],
+             "predicted_winner": p["predicted_winner"]}
+            for p in datagen.user_bracket(t, self.active_draws[t["id"]], rng)
+        ]
+
+
+# ==========================================
+# ВИРТУАЛЬНЫЕ ЮЗЕРЫ
+# ==========================================
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.statuses: Counter = Counter()
+
+    def add(self, route: str, status: str, seconds: float, ok: bool) -> None:
+        self.latencies[route].append(seconds)
+        self.statuses[status] += 1
+        if not ok: self.errors[route] += 1
+
+
+async def virtual_user(n: int, client: httpx.AsyncClient, data: Dataset, sessions: List[dict],
+                       deadline: float, think_scale: float, token: str, stats: Stats, seed: int) -> None:
+    rng = random.Random(seed * 100_003 + n)
+    headers = {"Authorization": initdata.for_user(token, data.user_id(n))}
+    weights = [s["weight"] for s in sessions]
+    while time.monotonic() < deadline:
+        session = rng.choices(sessions, weights)[0]
+        for step in session["steps"]:
+            if time.monotonic() >= deadline: return
+            method = step["method"]
+            route = f"{method} {step['path'].split('?')[0]}"
+            url = data.render(step["path"], rng)
+            body = data.bracket(rng) if step.get("body") == "$bracket" else None
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body, headers=headers)
+                status, ok = str(response.status_code), response.status_code < 400
+            except httpx.HTTPError as e:
+                status, ok = type(e).__name__, False
+            stats.add(route, status, time.perf_counter() - started, ok)
+            think = step.get("think", 0) * think_scale
+            if think:
+                await asyncio.sleep(min(rng.uniform(0.5 * think, 1.5 * think), max(0.0, deadline - time.monotonic())))
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))] * 1000
+
+def summarize(stats: Stats, concurrency: int, elapsed: float) -> dict:
+    routes = {}
+    total = errors = 0
+    for route, values in sorted(stats.latencies.items()):
+        values.sort()
+        total += len(values)
+        errors += stats.errors[route]
+        routes[route] = {
+            "count": len(values), "errors": stats.errors[route],
+            "error_rate": round(stats.errors[route] / len(values), 4),
+            "p50_ms": round(_percentile(values, 0.50), 2), "p95_ms": round(_percentile(values, 0.95), 2),
+            "p99_ms": round(_percentile(values, 0.99), 2), "max_ms": round(values[-1] * 1000, 2),
+        }
+    everything = sorted(v for values in stats.latencies.values() for v in values)
+    return {
+        "concurrency": concurrency, "duration_s": round(elapsed, 2), "requests": total,
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "p50_ms": round(_percentile(everything, 0.50), 2) if everything else None,
+        "p95_ms": round(_percentile(everything, 0.95), 2) if everything else None,
+        "p99_ms": round(_percentile(everything, 0.99), 2) if everything else None,
+        "statuses": dict(stats.statuses), "routes": routes,
+    }
+
+async def run_step(args, data: Dataset, sessions: List[dict], concurrency: int, token: str) -> dict:
+    stats = Stats()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            virtual_user(n, client, data, sessions, deadline, args.think_scale, token, stats, args.seed)
+            for n in range(concurrency)
+        ))
+        # Последние запросы могли закончиться позже дедлайна — делим на реальное время
+        elapsed = time.monotonic() - started
+    return summarize(stats, concurrency, elapsed)
+
+
+def find_saturation(steps: List[dict], slo_p95_ms: float, max_error_rate: float) -> Optional[dict]:
+    previous = None
+    for step in steps:
+        if step["error_rate"] > max_error_rate:
+            return {"concurrency": step["concurrency"], "reason": f"error rate {step['error_rate']:.2%}"}
+        if step["p95_ms"] is not None and step["p95_ms"] > slo_p95_ms:
+            return {"concurrency": step["concurrency"], "reason": f"p95 {step['p95_ms']}ms > {slo_p95_ms}ms"}
+        if previous and previous["rps"] and step["rps"] < previous["rps"] * (1 + MIN_RPS_GAIN):
+            return {"concurrency": step["concurrency"],
+                    "reason": f"rps {previous['rps']} -> {step['rps']} at x{step['concurrency'] / previous['concurrency']:.1f} users"}
+        previous = step
+    return None
+
+
+async def main(args) -> dict:
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        raise SystemExit("TELEGRAM_BOT_TOKEN must match the token of the backend under test")
+    sessions = profiles.load(args.profile)
+    data = Dataset(datagen.Config(users=args.users, per_size=args.per_size, days=args.days, seed=args.seed))
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        try:
+            await client.get("/ping")
+        except httpx.HTTPError as e:
+            raise SystemExit(f"Backend at {args.base_url} is not reachable: {e}")
+
+    steps = []
+    for concurrency in args.steps:
+        logger.info(f"🚀 {concurrency} users for {args.duration}s ({args.profile})")
+        result = await run_step(args, data, sessions, concurrency, token)
+        steps.append(result)
+        logger.info(
+            f"📈 c={concurrency}: {result['rps']} rps, p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+            f"p99={result['p99_ms']}ms, errors={result['error_rate']:.2%}"
+        )
+        for route, r in result["routes"].items():
+            logger.info(f"    {route:48} n={r['count']:<6} p50={r['p50_ms']:>8}ms p95={r['p95_ms']:>8}ms "
+                        f"p99={r['p99_ms']:>8}ms err={r['error_rate']:.2%}")
+
+    saturation = find_saturation(steps, args.slo_p95_ms, args.max_error_rate)
+    if saturation:
+        logger.info(f"🧱 Saturation at {saturation['concurrency']} users: {saturation['reason']}")
+    else:
+        logger.info("✅ No saturation within the tested steps")
+    return {
+        "suite": "loadtest", "started_at": datetime.now(timezone.utc).isoformat(), "base_url": args.base_url,
+        "profile": args.profile, "duration_s": args.duration, "think_scale": args.think_scale,
+        "slo_p95_ms": args.slo_p95_ms, "max_error_rate": args.max_error_rate,
+        "steps": steps, "saturation": saturation,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mini-app load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--profile", default="mixed", help=f"{', '.join(profiles.PROFILES)} или путь к JSON")
+    parser.add_argument("--steps", type=lambda v: [int(x) for x in v.split(",")], default=[1, 5, 10, 25, 50, 100])
+    parser.add_argument("--duration", type=float, default=30, help="секунд на ступень")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="множитель пауз (0 = без пауз, максимум давления)")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--slo-p95-ms", type=float, default=DEFAULT_SLO_P95_MS)
+    parser.add_argument("--max-error-rate", type=float, default=DEFAULT_MAX_ERROR_RATE)
+    parser.add_argument("--users", type=int, default=datagen.Config.users, help="как при datagen")
+    parser.add_argument("--per-size", type=int, default=datagen.Config.per_size)
+    parser.add_argument("--days", type=int, default=datagen.Config.days)
+    parser.add_argument("--seed", type=int, default=datagen.Config.seed)
+    parser.add_argument("--out", help="куда записать JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"💾 Saved {args.out}")
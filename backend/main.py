@@ -1,13 +1,16 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
+import time
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 # Импорты базы данных
-from database.db import init_db, engine
+from database.db import engine
 
 # Импорты Роутеров
-from routers import auth, tournaments, picks, users, leaderboard, daily
+from routers import auth, tournaments, picks, users, leaderboard, daily, live, admin
 
 # Импорты Сервисов Синхронизации
 # 1. Читают из Гугл Таблицы в БД (Bracket + Daily)
@@ -16,6 +19,15 @@ from services.sync_service import sync_google_sheets_with_db, sync_daily_challen
 # 2. Пишут В Гугл Таблицу из API (Парсер + Словарь)
 from services.tennis_service import update_google_sheet_from_api, load_dictionary_from_sheets
 
+# 3. Реестр турниров (in-process кэш таблицы tournaments)
+from services import tournament_registry
+
+# 4. Live-канал (SSE) и change-feed (Postgres LISTEN/NOTIFY)
+from services import live_hub, change_feed, rescoring
+
+# 5. Метрики запросов: время, число SQL и время БД, кэши
+from services import metrics
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -24,6 +36,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+metrics.instrument_engine(engine)
 
 # === CORS ===
 origins = [
@@ -41,15 +54,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# === MIDDLEWARE (Логирование запросов) ===
+# === MIDDLEWARE (Логирование запросов + метрики) ===
+def _route_path(request: Request) -> str:
+    # Шаблон маршрута (/tournament/{id}): по сырому пути метрики разъехались бы по ID
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
+    stats, token = metrics.begin_request()
+    started = time.perf_counter()
     try:
         response = await call_next(request)
-        return response
     except Exception as e:
         logger.error(f"Request failed: {e}")
+        metrics.record(request.method, _route_path(request), 500, time.perf_counter() - started, stats, None)
         raise
+    finally:
+        metrics.end_request(token)
+
+    elapsed = time.perf_counter() - started
+    size = response.headers.get("content-length")
+    metrics.record(request.method, _route_path(request), response.status_code, elapsed, stats, int(size) if size else None)
+    if metrics.DEBUG_HEADER_ALWAYS or request.headers.get("x-debug-stats") == "1":
+        response.headers["X-Request-Stats"] = metrics.debug_header(elapsed, stats)
+    return response
 
 # === ОСНОВНЫЕ РОУТЫ ===
 @app.get("/")
@@ -60,14 +89,21 @@ async def root():
 async def ping():
     return {"message": "pong"}
 
+# Prometheus text format: по маршрутам — гистограммы времени и числа SQL,
+# время в БД, размер ответов, попадания в кэши (services/metrics.py)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return metrics.render()
+
 # Ручной запуск синхронизации (Аварийная кнопка)
 # Если внешний парсер упал, можно дернуть этот ручку, 
 # и бэкенд сам обновит таблицу через update_google_sheet_from_api
 @app.get("/sync")
 async def manual_sync():
     logger.info("Manual Sync Triggered")
-    # 1. API -> Sheet (Синхронно, может заблокировать на пару сек, но для ручного теста ок)
-    update_google_sheet_from_api() 
+    # 1. API -> Sheet (в потоке: event loop не блокируется, запросы к API идут параллельно)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, update_google_sheet_from_api)
     # 2. Sheet -> DB (Daily) - теперь асинхронно
     await sync_daily_challenge(engine)
     # 3. Sheet -> DB (Bracket) - теперь асинхронно
@@ -81,6 +117,8 @@ app.include_router(picks.router, prefix="/picks", tags=["picks"])
 app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(leaderboard.router, prefix="/leaderboard", tags=["leaderboard"])
 app.include_router(daily.router, prefix="/daily", tags=["daily"])
+app.include_router(live.router, prefix="/live", tags=["live"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
 
 # === ПЛАНИРОВЩИК (SCHEDULER) ===
 scheduler = AsyncIOScheduler()
@@ -89,8 +127,14 @@ scheduler = AsyncIOScheduler()
 async def startup_event():
     logger.info("Application startup")
     
-    # 1. Инициализация таблиц БД
-    init_db()
+    # 1. Схему БД здесь НЕ создаём: миграции (alembic upgrade head)
+    # выполняются отдельным шагом деплоя, до старта воркеров.
+
+    # 1.1 Реестр турниров в памяти (дальше обновляется синком)
+    try:
+        tournament_registry.refresh()
+    except Exception as e:
+        logger.error(f"Failed to load tournament registry: {e}")
     
     # 2. Загружаем словарь имен при старте (для корректной работы ручного синка)
     try:
@@ -98,6 +142,12 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to load dictionary: {e}")
     
+    # 2.1 Change-feed: live-события для SSE, сброс кэшей, точечный пересчёт
+    # после правок в обход API (бот). Обработчики — до change_feed.start()
+    live_hub.start(asyncio.get_running_loop())
+    rescoring.start()
+    change_feed.start()
+    
     # --- РАСПИСАНИЕ ЗАДАЧ ---
     
     # [ОТКЛЮЧЕНО] 3. Daily Parser (API -> Google Sheet)
@@ -117,4 +167,9 @@ async def startup_event():
     # scheduler.add_job(load_dictionary_from_sheets, "interval", minutes=60)
     
     scheduler.start()
-    logger.info("Scheduler started: Daily Sync(2min) + Bracket(5min). Parser disabled (external).")
\ No newline at end of file
+    logger.info("Scheduler started: Daily Sync(2min) + Bracket(5min). Parser disabled (external).")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    change_feed.stop()
+    rescoring.stop()
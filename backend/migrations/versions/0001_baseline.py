@@ -0,0 +1,168 @@
+"""baseline: схема, которую раньше создавал Base.metadata.create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Боевая база уже создана через create_all, поэтому baseline создаёт
+# только отсутствующие таблицы. На свежей базе — создаёт всё.
+
+
+def _missing(table: str) -> bool:
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    if _missing("tournaments"):
+        op.create_table(
+            "tournaments",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String()),
+            sa.Column("dates", sa.String()),
+            sa.Column("status", sa.Enum("PLANNED", "ACTIVE", "CLOSED", "COMPLETED", name="tournamentstatus")),
+            sa.Column("sheet_name", sa.String(), nullable=True),
+            sa.Column("starting_round", sa.String()),
+            sa.Column("type", sa.String()),
+            sa.Column("start", sa.String()),
+            sa.Column("close", sa.String()),
+            sa.Column("tag", sa.String(), nullable=True),
+            sa.Column("surface", sa.String(), nullable=True),
+            sa.Column("defending_champion", sa.String(), nullable=True),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("matches_count", sa.String(), nullable=True),
+            sa.Column("month", sa.String(), nullable=True),
+            sa.Column("image_url", sa.String(), nullable=True),
+        )
+        op.create_index("ix_tournaments_id", "tournaments", ["id"])
+        op.create_index("ix_tournaments_name", "tournaments", ["name"])
+
+    if _missing("users"):
+        op.create_table(
+            "users",
+            sa.Column("user_id", sa.BigInteger(), primary_key=True),
+            sa.Column("first_name", sa.String()),
+            sa.Column("last_name", sa.String(), nullable=True),
+            sa.Column("username", sa.String(), nullable=True),
+        )
+        op.create_index("ix_users_user_id", "users", ["user_id"])
+
+    if _missing("true_draw"):
+        op.create_table(
+            "true_draw",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("tournament_id", sa.Integer(), sa.ForeignKey("tournaments.id")),
+            sa.Column("round", sa.String()),
+            sa.Column("match_number", sa.Integer()),
+            sa.Column("player1", sa.String()),
+            sa.Column("player2", sa.String()),
+            sa.Column("winner", sa.String(), nullable=True),
+            sa.Column("set1", sa.String(), nullable=True),
+            sa.Column("set2", sa.String(), nullable=True),
+            sa.Column("set3", sa.String(), nullable=True),
+            sa.Column("set4", sa.String(), nullable=True),
+            sa.Column("set5", sa.String(), nullable=True),
+            sa.UniqueConstraint("tournament_id", "round", "match_number", name="unique_match"),
+        )
+        op.create_index("ix_true_draw_id", "true_draw", ["id"])
+        op.create_index("ix_true_draw_tournament_id", "true_draw", ["tournament_id"])
+
+    if _missing("user_picks"):
+        op.create_table(
+            "user_picks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.user_id")),
+            sa.Column("tournament_id", sa.Integer(), sa.ForeignKey("tournaments.id")),
+            sa.Column("round", sa.String()),
+            sa.Column("match_number", sa.Integer()),
+            sa.Column("player1", sa.String()),
+            sa.Column("player2", sa.String()),
+            sa.Column("predicted_winner", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+        op.create_index("ix_user_picks_id", "user_picks", ["id"])
+        op.create_index("ix_user_picks_user_id", "user_picks", ["user_id"])
+        op.create_index("ix_user_picks_tournament_id", "user_picks", ["tournament_id"])
+
+    if _missing("user_scores"):
+        op.create_table(
+            "user_scores",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.user_id")),
+            sa.Column("tournament_id", sa.Integer(), sa.ForeignKey("tournaments.id")),
+            sa.Column("score", sa.Integer(), default=0),
+            sa.Column("correct_picks", sa.Integer(), default=0),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+        op.create_index("ix_user_scores_id", "user_scores", ["id"])
+        op.create_index("ix_user_scores_user_id", "user_scores", ["user_id"])
+        op.create_index("ix_user_scores_tournament_id", "user_scores", ["tournament_id"])
+
+    if _missing("leaderboard"):
+        op.create_table(
+            "leaderboard",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("tournament_id", sa.Integer(), sa.ForeignKey("tournaments.id")),
+            sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.user_id")),
+            sa.Column("rank", sa.Integer()),
+            sa.Column("score", sa.Integer()),
+            sa.Column("correct_picks", sa.Integer()),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+        op.create_index("ix_leaderboard_id", "leaderboard", ["id"])
+        op.create_index("ix_leaderboard_tournament_id", "leaderboard", ["tournament_id"])
+        op.create_index("ix_leaderboard_user_id", "leaderboard", ["user_id"])
+
+    if _missing("daily_matches"):
+        op.create_table(
+            "daily_matches",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("tournament", sa.String()),
+            sa.Column("status", sa.String()),
+            sa.Column("round", sa.String(), nullable=True),
+            sa.Column("start_time", sa.DateTime()),
+            sa.Column("player1", sa.String()),
+            sa.Column("player2", sa.String()),
+            sa.Column("score", sa.String(), nullable=True),
+            sa.Column("winner", sa.Integer(), nullable=True),
+        )
+        op.create_index("ix_daily_matches_id", "daily_matches", ["id"])
+
+    if _missing("daily_picks"):
+        op.create_table(
+            "daily_picks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.user_id")),
+            sa.Column("match_id", sa.String(), sa.ForeignKey("daily_matches.id")),
+            sa.Column("predicted_winner", sa.Integer()),
+            sa.Column("is_correct", sa.Boolean(), nullable=True),
+            sa.Column("points", sa.Integer(), default=0),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+        op.create_index("ix_daily_picks_id", "daily_picks", ["id"])
+        op.create_index("ix_daily_picks_user_id", "daily_picks", ["user_id"])
+        op.create_index("ix_daily_picks_match_id", "daily_picks", ["match_id"])
+
+    if _missing("daily_leaderboard"):
+        op.create_table(
+            "daily_leaderboard",
+            sa.Column("user_id", sa.BigInteger(), sa.ForeignKey("users.user_id"), primary_key=True),
+            sa.Column("total_points", sa.Integer(), default=0),
+            sa.Column("correct_picks", sa.Integer(), default=0),
+            sa.Column("total_picks", sa.Integer(), default=0),
+        )
+
+
+def downgrade() -> None:
+    for table in ["daily_leaderboard", "daily_picks", "daily_matches", "leaderboard",
+                  "user_scores", "user_picks", "true_draw", "users", "tournaments"]:
+        op.drop_table(table)
+    sa.Enum(name="tournamentstatus").drop(op.get_bind(), checkfirst=True)
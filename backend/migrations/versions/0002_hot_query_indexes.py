@@ -0,0 +1,62 @@
+"""составные индексы и уникальные ключи под горячие запросы
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Перед уникальными ключами оставляем только самую свежую запись (max id)
+DEDUPLICATE = [
+    """
+    DELETE FROM user_picks a USING user_picks b
+    WHERE a.tournament_id = b.tournament_id AND a.user_id = b.user_id
+      AND a.round = b.round AND a.match_number = b.match_number
+      AND a.id < b.id
+    """,
+    """
+    DELETE FROM user_scores a USING user_scores b
+    WHERE a.tournament_id = b.tournament_id AND a.user_id = b.user_id AND a.id < b.id
+    """,
+    """
+    DELETE FROM leaderboard a USING leaderboard b
+    WHERE a.tournament_id = b.tournament_id AND a.user_id = b.user_id AND a.id < b.id
+    """,
+    """
+    DELETE FROM daily_picks a USING daily_picks b
+    WHERE a.user_id = b.user_id AND a.match_id = b.match_id AND a.id < b.id
+    """,
+]
+
+# CONCURRENTLY: индексы строятся без блокировки записи посреди турнира.
+# Если сборка упала, Postgres оставляет INVALID-индекс — его нужно
+# удалить руками (DROP INDEX CONCURRENTLY ...) и повторить upgrade.
+INDEXES = [
+    ("unique_user_pick", "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS unique_user_pick ON user_picks (tournament_id, user_id, round, match_number)"),
+    ("unique_user_score", "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS unique_user_score ON user_scores (tournament_id, user_id)"),
+    ("ix_user_scores_tournament_score", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_scores_tournament_score ON user_scores (tournament_id, score)"),
+    ("unique_leaderboard_entry", "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS unique_leaderboard_entry ON leaderboard (tournament_id, user_id)"),
+    ("ix_leaderboard_tournament_score", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leaderboard_tournament_score ON leaderboard (tournament_id, score DESC, correct_picks DESC)"),
+    ("unique_daily_pick", "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS unique_daily_pick ON daily_picks (user_id, match_id)"),
+    # Функциональный индекс под фильтр func.date(start_time) == target_date
+    ("ix_daily_matches_start_date", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_daily_matches_start_date ON daily_matches (date(start_time))"),
+]
+
+
+def upgrade() -> None:
+    for stmt in DEDUPLICATE:
+        op.execute(stmt)
+    with op.get_context().autocommit_block():
+        for _, stmt in INDEXES:
+            op.execute(stmt)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
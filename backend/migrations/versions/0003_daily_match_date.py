@@ -0,0 +1,29 @@
+"""daily_matches.match_date: хранимая дата матча вместо date(start_time)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("daily_matches", sa.Column("match_date", sa.Date(), nullable=True))
+    op.execute("UPDATE daily_matches SET match_date = date(start_time) WHERE start_time IS NOT NULL")
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_daily_matches_match_date ON daily_matches (match_date)")
+        # Функциональный индекс больше не нужен: фильтр идёт по match_date
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_daily_matches_start_date")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_daily_matches_start_date ON daily_matches (date(start_time))")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_daily_matches_match_date")
+    op.drop_column("daily_matches", "match_date")
@@ -0,0 +1,74 @@
+"""change-feed: триггеры NOTIFY на true_draw, user_picks, daily_matches, daily_picks
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Аргументы функции: колонка-ключ (что пересчитывать/сбрасывать)
+# и необязательная колонка юзера. Payload читает services/change_feed.py.
+FUNCTION = """
+CREATE OR REPLACE FUNCTION notify_table_change() RETURNS trigger AS $$
+DECLARE
+    key_col text := TG_ARGV[0];
+    user_col text := TG_ARGV[1];
+    src text := current_setting('app.change_source', true);
+    rec jsonb;
+BEGIN
+    -- UPDATE шлёт и старый, и новый ключ; одинаковые payload Postgres схлопнет
+    FOREACH rec IN ARRAY (
+        CASE TG_OP
+            WHEN 'INSERT' THEN ARRAY[to_jsonb(NEW)]
+            WHEN 'DELETE' THEN ARRAY[to_jsonb(OLD)]
+            ELSE ARRAY[to_jsonb(OLD), to_jsonb(NEW)]
+        END
+    ) LOOP
+        PERFORM pg_notify('table_changes', json_build_object(
+            'table', TG_TABLE_NAME,
+            'key', rec ->> key_col,
+            'user', CASE WHEN user_col IS NULL THEN NULL ELSE (rec ->> user_col)::bigint END,
+            'source', NULLIF(src, '')
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# (таблица, аргументы функции)
+TABLES = [
+    ("true_draw", "'tournament_id'"),
+    ("user_picks", "'tournament_id'"),
+    ("daily_matches", "'match_date'"),
+    ("daily_picks", "'match_id', 'user_id'"),
+]
+
+
+def upgrade() -> None:
+    op.execute(FUNCTION)
+    for table, args in TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_feed
+            AFTER INSERT OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION notify_table_change({args})
+        """)
+        # Синк переписывает строки теми же значениями — такие UPDATE молчат
+        op.execute(f"""
+            CREATE TRIGGER {table}_change_feed_update
+            AFTER UPDATE ON {table}
+            FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+            EXECUTE FUNCTION notify_table_change({args})
+        """)
+
+
+def downgrade() -> None:
+    for table, _ in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_feed_update ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_feed ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_table_change()")
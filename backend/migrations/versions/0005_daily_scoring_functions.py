@@ -0,0 +1,199 @@
+"""daily-скоринг: SQL-функции с дельтами в daily_leaderboard
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Функции в БД, а не в Python: их вызывает и бэкенд (utils/daily_calculator),
+# и бот (отдельный контейнер без кода бэкенда).
+#
+# Инварианты daily_leaderboard (как у прежнего полного пересчёта):
+#   total_points  = SUM(points)
+#   correct_picks = COUNT(is_correct = true)
+#   total_picks   = COUNT(*)          -- все прогнозы юзера, включая несыгранные
+
+LB_ADD = """
+CREATE OR REPLACE FUNCTION daily_lb_add(p_user bigint, d_points int, d_correct int, d_total int)
+RETURNS void AS $$
+BEGIN
+    IF d_points = 0 AND d_correct = 0 AND d_total = 0 THEN
+        RETURN;
+    END IF;
+    INSERT INTO daily_leaderboard AS lb (user_id, total_points, correct_picks, total_picks)
+    VALUES (p_user, d_points, d_correct, d_total)
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_points = COALESCE(lb.total_points, 0) + EXCLUDED.total_points,
+        correct_picks = COALESCE(lb.correct_picks, 0) + EXCLUDED.correct_picks,
+        total_picks = COALESCE(lb.total_picks, 0) + EXCLUDED.total_picks;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Прогноз юзера (вставка или изменение) + сразу его очки, если матч сыгран.
+# Вставка через ON CONFLICT DO NOTHING: SELECT ... FOR UPDATE не блокирует
+# ещё не существующую строку, и два одновременных первых прогноза (двойной
+# тап) оба шли бы в INSERT — второй падал на unique_daily_pick. Теперь
+# проигравший ждёт коммита победителя и уходит в ветку UPDATE, дельта
+# в лидерборд применяется ровно один раз на каждое изменение.
+APPLY_PICK = """
+CREATE OR REPLACE FUNCTION daily_apply_pick(p_user bigint, p_match text, p_pick int)
+RETURNS boolean AS $$
+DECLARE
+    m daily_matches%ROWTYPE;
+    old_pick daily_picks%ROWTYPE;
+    new_correct boolean;
+    new_points int := 0;
+BEGIN
+    SELECT * INTO m FROM daily_matches WHERE id = p_match;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'daily match % not found', p_match;
+    END IF;
+    IF m.status = 'COMPLETED' AND m.winner IS NOT NULL THEN
+        new_correct := (p_pick = m.winner);
+        new_points := CASE WHEN new_correct THEN 1 ELSE 0 END;
+    END IF;
+
+    LOOP
+        INSERT INTO daily_picks (user_id, match_id, predicted_winner, is_correct, points, created_at)
+        VALUES (p_user, p_match, p_pick, new_correct, new_points, NOW())
+        ON CONFLICT (user_id, match_id) DO NOTHING
+        RETURNING * INTO old_pick;
+        IF FOUND THEN
+            PERFORM daily_lb_add(p_user, new_points, (new_correct IS TRUE)::int, 1);
+            RETURN true;
+        END IF;
+
+        SELECT * INTO old_pick FROM daily_picks
+        WHERE user_id = p_user AND match_id = p_match
+        FOR UPDATE;
+        IF FOUND THEN
+            UPDATE daily_picks
+            SET predicted_winner = p_pick, is_correct = new_correct, points = new_points
+            WHERE id = old_pick.id;
+            PERFORM daily_lb_add(
+                p_user,
+                new_points - COALESCE(old_pick.points, 0),
+                (new_correct IS TRUE)::int - (old_pick.is_correct IS TRUE)::int,
+                0
+            );
+            RETURN false;
+        END IF;
+        -- строку успели удалить между INSERT и SELECT (матч убран синком) — ещё раз
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Результат матча поменялся: пересчёт его прогнозов, дельты по юзерам.
+# Трогает только прогнозы, у которых реально меняется is_correct.
+RESCORE_MATCH = """
+CREATE OR REPLACE FUNCTION daily_rescore_match(p_match text)
+RETURNS int AS $$
+DECLARE
+    changed int;
+BEGIN
+    WITH m AS (
+        SELECT id, (status = 'COMPLETED' AND winner IS NOT NULL) AS done, winner
+        FROM daily_matches WHERE id = p_match
+    ), old AS (
+        SELECT dp.id, dp.user_id,
+               COALESCE(dp.points, 0) AS old_points,
+               (dp.is_correct IS TRUE)::int AS old_correct,
+               CASE WHEN m.done THEN dp.predicted_winner = m.winner END AS new_correct
+        FROM daily_picks dp JOIN m ON dp.match_id = m.id
+        WHERE dp.is_correct IS DISTINCT FROM (CASE WHEN m.done THEN dp.predicted_winner = m.winner END)
+        FOR UPDATE OF dp
+    ), upd AS (
+        UPDATE daily_picks dp
+        SET is_correct = old.new_correct,
+            points = CASE WHEN old.new_correct THEN 1 ELSE 0 END
+        FROM old WHERE dp.id = old.id
+        RETURNING old.user_id,
+                  (CASE WHEN old.new_correct THEN 1 ELSE 0 END) - old.old_points AS d_points,
+                  (old.new_correct IS TRUE)::int - old.old_correct AS d_correct
+    ), agg AS (
+        SELECT user_id, SUM(d_points)::int AS d_points, SUM(d_correct)::int AS d_correct, COUNT(*) AS n
+        FROM upd GROUP BY user_id
+    ), lb_delta AS (
+        -- data-modifying CTE выполняется всегда, даже если её не читают
+        INSERT INTO daily_leaderboard AS lb (user_id, total_points, correct_picks, total_picks)
+        SELECT user_id, d_points, d_correct, 0 FROM agg
+        ON CONFLICT (user_id) DO UPDATE SET
+            total_points = COALESCE(lb.total_points, 0) + EXCLUDED.total_points,
+            correct_picks = COALESCE(lb.correct_picks, 0) + EXCLUDED.correct_picks
+    )
+    SELECT COALESCE(SUM(n), 0) INTO changed FROM agg;
+    RETURN changed;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Матчи удалены из таблицы: их прогнозы уходят, вклад вычитается
+DELETE_MATCH_PICKS = """
+CREATE OR REPLACE FUNCTION daily_delete_match_picks(p_matches text[])
+RETURNS int AS $$
+DECLARE
+    removed int;
+BEGIN
+    WITH del AS (
+        DELETE FROM daily_picks WHERE match_id = ANY(p_matches)
+        RETURNING user_id, COALESCE(points, 0) AS points, (is_correct IS TRUE)::int AS correct
+    ), agg AS (
+        SELECT user_id, SUM(points)::int AS points, SUM(correct)::int AS correct, COUNT(*)::int AS n
+        FROM del GROUP BY user_id
+    ), lb_delta AS (
+        UPDATE daily_leaderboard lb
+        SET total_points = COALESCE(lb.total_points, 0) - agg.points,
+            correct_picks = COALESCE(lb.correct_picks, 0) - agg.correct,
+            total_picks = COALESCE(lb.total_picks, 0) - agg.n
+        FROM agg WHERE lb.user_id = agg.user_id
+    )
+    SELECT COALESCE(SUM(n), 0) INTO removed FROM agg;
+    RETURN removed;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Стартовая точка для дельт: один раз приводим всё к инвариантам
+RECONCILE = [
+    """
+    UPDATE daily_picks dp
+    SET is_correct = (dp.predicted_winner = dm.winner),
+        points = CASE WHEN dp.predicted_winner = dm.winner THEN 1 ELSE 0 END
+    FROM daily_matches dm
+    WHERE dp.match_id = dm.id AND dm.status = 'COMPLETED' AND dm.winner IS NOT NULL
+    """,
+    "DELETE FROM daily_leaderboard",
+    """
+    INSERT INTO daily_leaderboard (user_id, total_points, correct_picks, total_picks)
+    SELECT user_id, COALESCE(SUM(points), 0), COUNT(CASE WHEN is_correct = true THEN 1 END), COUNT(*)
+    FROM daily_picks
+    GROUP BY user_id
+    """,
+]
+
+FUNCTIONS = [
+    ("daily_lb_add(bigint, int, int, int)", LB_ADD),
+    ("daily_apply_pick(bigint, text, int)", APPLY_PICK),
+    ("daily_rescore_match(text)", RESCORE_MATCH),
+    ("daily_delete_match_picks(text[])", DELETE_MATCH_PICKS),
+]
+
+
+def upgrade() -> None:
+    for _, ddl in FUNCTIONS:
+        op.execute(ddl)
+    for stmt in RECONCILE:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    for signature, _ in reversed(FUNCTIONS):
+        op.execute(f"DROP FUNCTION IF EXISTS {signature}")
@@ -0,0 +1,43 @@
+"""рассылки бота: таблица broadcasts с прогрессом, users.bot_blocked_at
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Юзер заблокировал бота: в рассылки не попадает, пока снова не нажмёт /start
+    op.add_column("users", sa.Column("bot_blocked_at", sa.DateTime(), nullable=True))
+
+    op.create_table(
+        "broadcasts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("from_chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("message_id", sa.BigInteger(), nullable=False),
+        sa.Column("created_by", sa.BigInteger(), nullable=True),
+        # running -> done; running после рестарта бота = продолжить с cursor
+        sa.Column("status", sa.String(), nullable=False, server_default="running"),
+        # Все получатели с user_id <= cursor уже обработаны
+        sa.Column("cursor", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("delivered", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("blocked", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("retries", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_broadcasts_status", "broadcasts", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_broadcasts_status", table_name="broadcasts")
+    op.drop_table("broadcasts")
+    op.drop_column("users", "bot_blocked_at")
@@ -0,0 +1,44 @@
+"""очередь рассылок в broadcasts (расписание, аренда, чанки) и FSM бота в bot_fsm
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # scheduled -> running -> done. Running-задачу держит воркер бота, пока не истекла аренда
+    # (locked_until); после чанка аренда снимается и задачу берёт следующий опрос.
+    op.add_column("broadcasts", sa.Column("scheduled_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+    op.add_column("broadcasts", sa.Column("locked_by", sa.String(), nullable=True))
+    op.add_column("broadcasts", sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True))
+    op.alter_column("broadcasts", "status", server_default="scheduled")
+    op.drop_index("ix_broadcasts_status", table_name="broadcasts")
+    op.create_index("ix_broadcasts_queue", "broadcasts", ["status", "scheduled_at"])
+
+    # Состояния диалогов бота (aiogram FSM): переживают рестарт и деплой
+    op.create_table(
+        "bot_fsm",
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("state", sa.String(), nullable=True),
+        sa.Column("data", postgresql.JSONB(), nullable=False, server_default="{}"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("bot_fsm")
+    op.drop_index("ix_broadcasts_queue", table_name="broadcasts")
+    op.create_index("ix_broadcasts_status", "broadcasts", ["status"])
+    op.alter_column("broadcasts", "status", server_default="running")
+    op.drop_column("broadcasts", "locked_until")
+    op.drop_column("broadcasts", "locked_by")
+    op.drop_column("broadcasts", "scheduled_at")
@@ -0,0 +1,23 @@
+"""broadcasts.segment: фильтр получателей рассылки (считается в SQL)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # {} — все; {"active_days": 7}, {"tournament_id": 12}, {"daily": true} — условия через AND
+    op.add_column("broadcasts", sa.Column("segment", postgresql.JSONB(), nullable=False, server_default="{}"))
+
+
+def downgrade() -> None:
+    op.drop_column("broadcasts", "segment")
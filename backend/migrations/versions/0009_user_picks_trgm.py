@@ -0,0 +1,35 @@
+"""pg_trgm-индексы по именам в user_picks (массовые замены бота)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+# Замены бота ищут по подстроке (ILIKE '%Q / LL%'): btree такое не берёт,
+# а GIN по триграммам — да. Три колонки под OR -> BitmapOr трёх индексов,
+# tournament_id сужает через BitmapAnd с ix_user_picks_tournament_id.
+# CREATE EXTENSION нужны права владельца БД (или trusted-расширение в PG 13+).
+INDEXES = [
+    ("ix_user_picks_winner_trgm", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_picks_winner_trgm ON user_picks USING gin (predicted_winner gin_trgm_ops)"),
+    ("ix_user_picks_player1_trgm", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_picks_player1_trgm ON user_picks USING gin (player1 gin_trgm_ops)"),
+    ("ix_user_picks_player2_trgm", "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_picks_player2_trgm ON user_picks USING gin (player2 gin_trgm_ops)"),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for _, stmt in INDEXES:
+            op.execute(stmt)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,43 @@
+"""история циклов синка: таблица sync_runs (этапы, счётчики, листы)
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_runs",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        # tournaments | daily
+        sa.Column("kind", sa.String(), nullable=False),
+        # ok | partial | error | skipped
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_ms", sa.Integer(), nullable=False),
+        # {этап: мс}
+        sa.Column("stages", postgresql.JSONB(), nullable=False, server_default="{}"),
+        # {rows_read, rows_changed, rows_skipped, tournaments_rescored, ...}
+        sa.Column("counters", postgresql.JSONB(), nullable=False, server_default="{}"),
+        # По листам турниров: [{tournament_id, sheet, rows, changed, read_ms, upsert_ms, rescore_ms}]
+        sa.Column("sheets", postgresql.JSONB(), nullable=False, server_default="[]"),
+        sa.Column("error", sa.Text(), nullable=True),
+    )
+    # Админка: последние циклы по типу; ретеншн: DELETE по started_at
+    op.create_index("ix_sync_runs_kind_started", "sync_runs", ["kind", sa.text("started_at DESC")])
+    op.create_index("ix_sync_runs_started", "sync_runs", ["started_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sync_runs_started", table_name="sync_runs")
+    op.drop_index("ix_sync_runs_kind_started", table_name="sync_runs")
+    op.drop_table("sync_runs")
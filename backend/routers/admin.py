@@ -0,0 +1,35 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from config import ADMIN_IDS
+from utils.auth import get_current_user
+from services import sync_runs
+
+router = APIRouter()
+
+
+def require_admin(user: dict = Depends(get_current_user)) -> dict:
+    if user["id"] not in ADMIN_IDS:
+        raise HTTPException(status_code=403, detail="Admins only")
+    return user
+
+
+# ==========================================
+# ИСТОРИЯ СИНКА (sync_runs)
+# ==========================================
+
+@router.get("/sync-runs")
+def list_sync_runs(
+    kind: Optional[str] = Query(None, pattern="^(tournaments|daily)$"),
+    limit: int = Query(50, ge=1, le=500),
+    _: dict = Depends(require_admin),
+):
+    """Последние циклы синка: этапы, счётчики, строки по листам."""
+    return sync_runs.recent(kind, limit)
+
+@router.get("/sync-runs/summary")
+def sync_runs_summary(
+    hours: int = Query(24, ge=1, le=24 * sync_runs.RETENTION_DAYS),
+    _: dict = Depends(require_admin),
+):
+    """Перцентили длительности, средние этапов и самые медленные листы за окно."""
+    return sync_runs.summary(hours)
@@ -8,13 +8,25 @@ from datetime import datetime, date, timedelta
 from database.db import get_db
 from database import models
 from utils.auth import get_current_user
+from services import daily_cache, change_feed, metrics
+from utils import daily_calculator
 from pydantic import BaseModel
 
 router = APIRouter() 
 
 # --- КЭШ ---
+# Лидерборд считается из очков daily_picks. Сбрасывают его изменения прогнозов
+# от синка, пересчёта, бота и ручного SQL (source NULL). Прогнозы из API
+# (source 'api') — на несыгранные матчи, очков не меняют и кэш не трогают;
+# прогноз на уже сыгранный матч API помечает 'api_scored'.
 _leaderboard_cache: dict[str, Tuple[float, List[dict]]] = {}
-CACHE_TTL = 60 
+CACHE_TTL = 300 
+
+def _evict_leaderboard(change: dict) -> None:
+    if change.get("source") != "api":
+        _leaderboard_cache.clear()
+
+change_feed.on_change(["daily_picks"], _evict_leaderboard)
 
 # --- ID "БОГОВ" ДЛЯ DAILY ---
 GOD_DAILY_USERS = [1097762641, 8148191986, 7679429681, 8348181797]
@@ -34,6 +46,8 @@ class DailyMatchResponse(BaseModel):
     score: Optional[str] = None
     winner: Optional[int] = None
     my_pick: Optional[int] = None 
+    # status подменён на PLANNED (god mode): live-события не должны его перетирать
+    is_god: bool = False
 
 class DailyLeaderboardEntry(BaseModel):
     rank: int
@@ -51,46 +65,26 @@ def get_daily_matches(
     user: dict = Depends(get_current_user)
 ):
     user_id = user["id"]
-    query = db.query(models.DailyMatch)
-    
-    if target_date:
-        query = query.filter(func.date(models.DailyMatch.start_time) == target_date)
-    
-    matches = query.order_by(models.DailyMatch.start_time).all()
-    
-    match_ids = [m.id for m in matches]
-    user_picks = db.query(models.DailyPick).filter(
-        models.DailyPick.user_id == user_id,
-        models.DailyPick.match_id.in_(match_ids)
-    ).all()
-    
-    picks_map = {p.match_id: p.predicted_winner for p in user_picks}
-    
+
+    # Список матчей дня — общий кэш для всех юзеров
+    matches = daily_cache.get_day_matches(target_date, db)
+    match_ids = [m["id"] for m in matches]
+    picks_map = daily_cache.get_user_picks(user_id, target_date, match_ids, db)
+
+    # === GOD MODE (VISUAL) ===
+    # Для избранного юзера подменяем статус на PLANNED,
+    # чтобы кнопки на фронтенде были активны (не disabled)
+    is_god = user_id in GOD_DAILY_USERS
+    # =========================
+
     result = []
     for m in matches:
-        time_str = "--:--"
-        if m.start_time:
-            time_str = m.start_time.strftime("%H:%M")
-
-        # === GOD MODE (VISUAL) ===
-        # Для избранного юзера подменяем статус на PLANNED,
-        # чтобы кнопки на фронтенде были активны (не disabled)
-        final_status = m.status
-        if user_id in GOD_DAILY_USERS:
-            final_status = "PLANNED"
-        # =========================
-
-        result.append({
-            "id": m.id,
-            "tournament": m.tournament,
-            "start_time": time_str, 
-            "status": final_status, 
-            "player1": m.player1,
-            "player2": m.player2,
-            "score": m.score,
-            "winner": m.winner,
-            "my_pick": picks_map.get(m.id)
-        })
+        item = dict(m)
+        if is_god:
+            item["status"] = "PLANNED"
+            item["is_god"] = True
+        item["my_pick"] = picks_map.get(m["id"])
+        result.append(item)
         
     return result
 
@@ -120,32 +114,11 @@ def make_daily_pick(
                      raise HTTPException(status_code=400, detail="Time expired")
     # ========================
 
-    existing_pick = db.query(models.DailyPick).filter(
-        models.DailyPick.user_id == user_id,
-        models.DailyPick.match_id == pick_data.match_id
-    ).first()
-    
-    if existing_pick:
-        existing_pick.predicted_winner = pick_data.winner
-        # Если матч завершен, сразу пересчитываем "правильность" для этого пика
-        # (чтобы админ сразу видел результат, если меняет задним числом)
-        if match.winner is not None:
-            existing_pick.is_correct = (pick_data.winner == match.winner)
-            existing_pick.points = 1 if existing_pick.is_correct else 0
-    else:
-        new_pick = models.DailyPick(
-            user_id=user_id,
-            match_id=pick_data.match_id,
-            predicted_winner=pick_data.winner
-        )
-        # То же самое для нового пика
-        if match.winner is not None:
-            new_pick.is_correct = (pick_data.winner == match.winner)
-            new_pick.points = 1 if new_pick.is_correct else 0
-            
-        db.add(new_pick)
-        
+    # Прогноз + очки (если матч уже сыгран) + дельта лидерборда — одной функцией
+    change_feed.set_source(db, "api" if match.winner is None else "api_scored")
+    daily_calculator.apply_pick(user_id, pick_data.match_id, pick_data.winner, db)
     db.commit()
+    daily_cache.invalidate_user_picks(user_id, match.match_date)
     return {"status": "ok", "message": "Pick saved"}
 
 # === УНИВЕРСАЛЬНЫЙ ЛИДЕРБОРД ===
@@ -162,7 +135,27 @@ def get_daily_leaderboard(
     if cache_key in _leaderboard_cache:
         timestamp, data = _leaderboard_cache[cache_key]
         if current_time - timestamp < CACHE_TTL:
+            metrics.cache_lookup("daily_leaderboard", True)
             return data
+    metrics.cache_lookup("daily_leaderboard", False)
+
+    if not tournament_filter:
+        # Общий зачёт: daily_leaderboard держится в актуальном виде дельтами
+        # (utils/daily_calculator), агрегировать все прогнозы не нужно
+        results = db.query(
+            models.DailyLeaderboard.user_id,
+            models.User.username,
+            models.User.first_name,
+            models.User.last_name,
+            models.DailyLeaderboard.total_points.label("points"),
+            models.DailyLeaderboard.correct_picks.label("correct_picks")
+        ).join(models.User, models.DailyLeaderboard.user_id == models.User.user_id)\
+         .filter(models.DailyLeaderboard.correct_picks > 0)\
+         .order_by(desc("points"))\
+         .all()
+        leaderboard = _rank_rows(results)
+        _leaderboard_cache[cache_key] = (current_time, leaderboard)
+        return leaderboard
 
     query = db.query(
         models.DailyPick.user_id,
@@ -175,14 +168,18 @@ def get_daily_leaderboard(
      .join(models.User, models.DailyPick.user_id == models.User.user_id)\
      .filter(models.DailyPick.is_correct == True) 
     
-    if tournament_filter:
-        search_term = f"%{tournament_filter}%"
-        query = query.filter(models.DailyMatch.tournament.ilike(search_term))
+    search_term = f"%{tournament_filter}%"
+    query = query.filter(models.DailyMatch.tournament.ilike(search_term))
     
     results = query.group_by(models.DailyPick.user_id, models.User.user_id)\
                    .order_by(desc("points"))\
                    .all()
     
+    leaderboard = _rank_rows(results)
+    _leaderboard_cache[cache_key] = (current_time, leaderboard)
+    return leaderboard
+
+def _rank_rows(results) -> List[dict]:
     leaderboard = []
     current_rank = 1
     
@@ -200,6 +197,4 @@ def get_daily_leaderboard(
             "total_points": row.points,
             "correct_picks": row.correct_picks
         })
-        
-    _leaderboard_cache[cache_key] = (current_time, leaderboard)
     return leaderboard
\ No newline at end of file
@@ -7,13 +7,30 @@ import time
 from database.db import get_db
 from database import models
 from utils.auth import get_current_user
+from services import tournament_registry, change_feed, metrics
 
 router = APIRouter()
 
 # --- СИСТЕМА КЭШИРОВАНИЯ ---
 # Структура: { "ключ_запроса": (timestamp, data) }
+# Сбрасывается по change-feed (пересчёт, правки сетки/прогнозов),
+# TTL — страховка на случай пропущенного события.
 _lb_cache: Dict[str, Tuple[float, List[dict]]] = {}
-CACHE_TTL = 60  # Время жизни кэша: 60 секунд
+CACHE_TTL = 300  # Время жизни кэша: 5 минут
+
+def _evict_tournament(change: dict) -> None:
+    tid = change.get("key")
+    # Статистика total_picks считается из true_draw/user_picks
+    _lb_cache.pop(f"tourn_{tid}", None)
+    if change.get("table") != "leaderboard":
+        return
+    # Очки поменялись: глобальный и комбинированные с этим турниром
+    _lb_cache.pop("global", None)
+    for key in list(_lb_cache):
+        if key.startswith("comb_") and tid in key[len("comb_"):].split(","):
+            _lb_cache.pop(key, None)
+
+change_feed.on_change(["true_draw", "user_picks", "leaderboard"], _evict_tournament)
 
 # --- 1. ГЛОБАЛЬНЫЙ ЛИДЕРБОРД ---
 @router.get("/", response_model=List[dict])
@@ -25,7 +42,9 @@ def get_global_leaderboard(db: Session = Depends(get_db)):
     if cache_key in _lb_cache:
         timestamp, data = _lb_cache[cache_key]
         if current_time - timestamp < CACHE_TTL:
+            metrics.cache_lookup("leaderboard", True)
             return data
+    metrics.cache_lookup("leaderboard", False)
 
     results = db.query(
         models.User.username,
@@ -73,9 +92,10 @@ def get_tournaments_with_ranks(
     user: dict = Depends(get_current_user)
 ):
     user_id = user["id"]
-    tournaments = db.query(models.Tournament).filter(
-        models.Tournament.status.in_(["ACTIVE", "COMPLETED", "CLOSED"])
-    ).order_by(models.Tournament.id.desc()).all()
+    tournaments = [
+        t for t in reversed(tournament_registry.all_tournaments())
+        if t.status in ("ACTIVE", "COMPLETED", "CLOSED")
+    ]
     
     result = []
     for t in tournaments:
@@ -111,7 +131,9 @@ def get_tournament_leaderboard(tournament_id: int, db: Session = Depends(get_db)
     if cache_key in _lb_cache:
         timestamp, data = _lb_cache[cache_key]
         if current_time - timestamp < CACHE_TTL:
+            metrics.cache_lookup("leaderboard", True)
             return data
+    metrics.cache_lookup("leaderboard", False)
 
     # Логика расчета (если кэша нет)
     lb_results = db.query(models.Leaderboard, models.User)\
@@ -175,7 +197,9 @@ def get_combined_leaderboard(ids: str, db: Session = Depends(get_db)):
     if cache_key in _lb_cache:
         timestamp, data = _lb_cache[cache_key]
         if current_time - timestamp < CACHE_TTL:
+            metrics.cache_lookup("leaderboard", True)
             return data
+    metrics.cache_lookup("leaderboard", False)
 
     try:
         tournament_ids = [int(i) for i in ids.split(",")]
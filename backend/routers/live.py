@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import date
+import asyncio
+import json
+import logging
+
+from services import live_hub
+from utils.auth import get_current_user_from_query
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Пустой комментарий раз в N секунд, чтобы прокси не рвали "тихое" соединение
+HEARTBEAT_SECONDS = 15
+
+
+@router.get("/stream")
+async def live_stream(
+    request: Request,
+    tournament_id: Optional[int] = Query(None),
+    day: Optional[date] = Query(None),
+    user: dict = Depends(get_current_user_from_query)
+):
+    """
+    Server-Sent Events: изменения матчей турнира и/или дня.
+    События: matches (счёт/статус/победитель), leaderboard (изменившиеся строки),
+    removed (удалённые матчи дня).
+    Авторизация как у /daily/matches, но initData передаётся в ?auth=
+    (EventSource не умеет слать заголовок Authorization).
+    """
+    topics = []
+    if tournament_id is not None:
+        topics.append(live_hub.tournament_topic(tournament_id))
+    if day is not None:
+        topics.append(live_hub.day_topic(day))
+    if not topics:
+        raise HTTPException(status_code=400, detail="Specify tournament_id and/or day")
+
+    queue = live_hub.subscribe(topics)
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                data = dict(message["data"], topic=message["topic"])
+                yield f"event: {message['event']}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        finally:
+            live_hub.unsubscribe(topics, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -9,35 +9,17 @@ from schemas import Tournament, TrueDraw, UserPick
 from utils.auth import get_current_user
 from utils.bracket import generate_bracket
 from utils.bracket_status import enrich_bracket_with_status, reconstruct_fantasy_bracket
+from services import tournament_registry
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.get("/tournaments", response_model=List[dict])
-def get_tournaments(db: Session = Depends(get_db)):
+def get_tournaments():
     logger.info("Fetching all tournaments")
-    # Сортировка: Старые (1) -> Новые (100)
-    tournaments = db.query(models.Tournament).order_by(models.Tournament.id.asc()).all()
-    
-    return [
-        {
-            "id": t.id,
-            "name": t.name,
-            "status": t.status,
-            "dates": t.dates,
-            "start": t.start,
-            "close": t.close,
-            "tag": t.tag,
-            "surface": t.surface,
-            "defending_champion": t.defending_champion,
-            "description": t.description,
-            "matches_count": t.matches_count,
-            "month": t.month,
-            "image_url": t.image_url
-        }
-        for t in tournaments
-    ]
+    # Сортировка: Старые (1) -> Новые (100). Список уже сериализован в реестре.
+    return tournament_registry.list_payload()
 
 
 @router.get("/tournament/{id}", response_model=dict)
@@ -47,7 +29,7 @@ def get_tournament_by_id(
     user: dict = Depends(get_current_user)
 ):
     logger.info(f"Fetching tournament with id={id}")
-    tournament = db.query(models.Tournament).filter(models.Tournament.id == id).first()
+    tournament = tournament_registry.get(id)
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
     
@@ -59,10 +41,8 @@ def get_tournament_by_id(
     # Список ID турниров для тестов (добавлены 52 и 53)
     TEST_TOURNAMENTS = [116, 29, 52, 53]
 
-    # Изначальный статус из базы
-    status_val = tournament.status
-    status_str = status_val.value if hasattr(status_val, 'value') else str(status_val)
-    status_str = status_str.upper()
+    # Изначальный статус из базы (уже нормализован в реестре)
+    status_str = tournament.status
 
     # ЕСЛИ это тестер и нужный турнир -> ПРИНУДИТЕЛЬНО ставим ACTIVE
     if user_id in TESTERS and id in TEST_TOURNAMENTS:
@@ -75,13 +55,7 @@ def get_tournament_by_id(
         models.UserPick.user_id == user_id
     ).all()
     
-    all_rounds = ['R128', 'R64', 'R32', 'R16', 'QF', 'SF', 'F', 'Champion']
-    start_round_clean = tournament.starting_round.strip() if tournament.starting_round else "R32"
-    try:
-        starting_index = all_rounds.index(start_round_clean)
-    except ValueError:
-        starting_index = 2
-    rounds = all_rounds[starting_index:]
+    rounds = list(tournament.rounds)
     
     bracket = generate_bracket(tournament, true_draws, user_picks, rounds)
     
@@ -150,13 +124,12 @@ def get_other_user_tournament(
     """
     logger.info(f"User {user['id']} requesting bracket of {target_user_id} for tournament {id}")
     
-    tournament = db.query(models.Tournament).filter(models.Tournament.id == id).first()
+    tournament = tournament_registry.get(id)
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
     
     # Проверка статуса (безопасность на уровне API)
-    status_val = tournament.status
-    status_str = str(status_val.value if hasattr(status_val, 'value') else status_val).upper()
+    status_str = tournament.status
     
     # Если турнир идет (ACTIVE) и смотрят чужую сетку - запрещаем
     if status_str == "ACTIVE" and target_user_id != user['id']:
@@ -169,13 +142,7 @@ def get_other_user_tournament(
         models.UserPick.user_id == target_user_id 
     ).all()
     
-    all_rounds = ['R128', 'R64', 'R32', 'R16', 'QF', 'SF', 'F', 'Champion']
-    start_round_clean = tournament.starting_round.strip() if tournament.starting_round else "R32"
-    try:
-        starting_index = all_rounds.index(start_round_clean)
-    except ValueError:
-        starting_index = 2
-    rounds = all_rounds[starting_index:]
+    rounds = list(tournament.rounds)
     
     bracket = generate_bracket(tournament, true_draws, user_picks, rounds)
     
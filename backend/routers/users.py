@@ -5,6 +5,7 @@ from typing import List
 from database.db import get_db
 from database import models
 from utils.auth import get_current_user
+from services import tournament_registry
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -56,7 +57,7 @@ def get_profile_stats(db: Session = Depends(get_db), user: dict = Depends(get_cu
     user_scores = db.query(models.UserScore).filter(models.UserScore.user_id == user_id).all()
     
     for score in user_scores:
-        t = db.query(models.Tournament).filter(models.Tournament.id == score.tournament_id).first()
+        t = tournament_registry.get(score.tournament_id)
         if not t: continue
 
         # Ранг в турнире
@@ -0,0 +1,158 @@
+import json
+import logging
+import select
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import text
+
+from database.db import engine
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CHANGE-FEED: POSTGRES LISTEN/NOTIFY
+# ==========================================
+# Одно LISTEN-соединение на воркер, на нём слушаются все каналы.
+#
+# Канал TABLE_CHANNEL наполняют триггеры (миграция 0004) на true_draw,
+# user_picks, daily_matches, daily_picks и публикаторы приложения
+# (notify_change). Payload: {"table", "key", "user", "source"}.
+# source — кто писал (set_source): 'sync', 'api', 'api_scored', 'rescore', 'bot'
+# ('api_scored' — прогноз на уже сыгранный матч: очки поменялись сразу).
+# (daily-правки бота идут через daily_apply_pick и уже посчитаны).
+# NULL = запись в обход скоринга (правки бота в сетке, ручной SQL) -> нужен пересчёт.
+# Массовые замены бота пишут пачки как 'bot' и в конце шлют одно событие с NULL.
+#
+# Одинаковые payload в одной транзакции Postgres схлопывает сам,
+# поэтому массовый UPDATE по турниру даёт одно событие.
+#
+# Лидер: воркер, который держит advisory lock на своём LISTEN-соединении.
+# Сброс кэшей делают все воркеры, пересчёт — только лидер.
+
+TABLE_CHANNEL = "table_changes"
+LEADER_LOCK_KEY = 7_401_031
+RECONNECT_DELAY = 5
+
+ChangeHandler = Callable[[dict], None]
+
+_channel_handlers: Dict[str, List[Callable[[str], None]]] = {}
+_table_handlers: Dict[str, List[ChangeHandler]] = {}
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_is_leader = False
+
+
+# --- ПОДПИСКА ---
+
+def on_channel(channel: str, handler: Callable[[str], None]) -> None:
+    """Сырой payload канала (вызывается из потока слушателя)."""
+    _channel_handlers.setdefault(channel, []).append(handler)
+
+def on_change(tables: List[str], handler: ChangeHandler) -> None:
+    """Изменения таблиц (вызывается из потока слушателя — не блокировать)."""
+    for table in tables:
+        _table_handlers.setdefault(table, []).append(handler)
+
+def is_leader() -> bool:
+    return _is_leader
+
+
+# --- ПУБЛИКАЦИЯ ---
+
+def set_source(conn, source: str) -> None:
+    """
+    Помечает текущую транзакцию: триггеры положат source в payload.
+    conn — Connection или Session.
+    """
+    conn.execute(text("SELECT set_config('app.change_source', :src, true)"), {"src": source})
+
+def notify_change(conn, table: str, key, source: str, user_id: Optional[int] = None) -> None:
+    """
+    Публикатор уровня приложения (для таблиц без триггеров).
+    Уходит вместе с коммитом транзакции conn.
+    """
+    payload = json.dumps({"table": table, "key": str(key), "user": user_id, "source": source})
+    conn.execute(text("SELECT pg_notify(:ch, :payload)"), {"ch": TABLE_CHANNEL, "payload": payload})
+
+
+# --- СЛУШАТЕЛЬ ---
+
+def _dispatch_table_change(payload: str) -> None:
+    try:
+        change = json.loads(payload)
+    except ValueError:
+        return
+    for handler in _table_handlers.get(change.get("table"), ()):
+        try:
+            handler(change)
+        except Exception as e:
+            logger.error(f"Change handler error ({change.get('table')}): {e}")
+
+def _dispatch(channel: str, payload: str) -> None:
+    for handler in _channel_handlers.get(channel, ()):
+        try:
+            handler(payload)
+        except Exception as e:
+            logger.error(f"Channel handler error ({channel}): {e}")
+
+def _try_lead(cur) -> None:
+    global _is_leader
+    if _is_leader: return
+    cur.execute("SELECT pg_try_advisory_lock(%s)", (LEADER_LOCK_KEY,))
+    _is_leader = bool(cur.fetchone()[0])
+    if _is_leader:
+        logger.info("👑 Change-feed leader: this worker runs recomputation")
+
+def _listen_forever() -> None:
+    global _is_leader
+    while not _stop.is_set():
+        conn = None
+        try:
+            # Отдельное соединение вне пула: LISTEN и advisory lock живут всё время работы воркера
+            dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+            conn = psycopg2.connect(dsn)
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                for channel in _channel_handlers:
+                    cur.execute(f"LISTEN {channel};")
+                _try_lead(cur)
+            logger.info(f"📡 Listening on {', '.join(_channel_handlers)}")
+
+            last_lead_attempt = time.time()
+            while not _stop.is_set():
+                if not _is_leader and time.time() - last_lead_attempt > 30:
+                    with conn.cursor() as cur:
+                        _try_lead(cur)
+                    last_lead_attempt = time.time()
+
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    _dispatch(notify.channel, notify.payload)
+        except Exception as e:
+            logger.error(f"Change-feed listener error: {e}. Reconnecting in {RECONNECT_DELAY}s")
+            time.sleep(RECONNECT_DELAY)
+        finally:
+            # Лок держался соединением: оно закрыто -> лидерство потеряно
+            _is_leader = False
+            if conn is not None:
+                try: conn.close()
+                except Exception: pass
+
+def start() -> None:
+    """Запускать после регистрации всех обработчиков (каналы слушаются при подключении)."""
+    global _thread
+    if TABLE_CHANNEL not in _channel_handlers:
+        on_channel(TABLE_CHANNEL, _dispatch_table_change)
+    _stop.clear()
+    _thread = threading.Thread(target=_listen_forever, name="change-feed", daemon=True)
+    _thread.start()
+
+def stop() -> None:
+    _stop.set()
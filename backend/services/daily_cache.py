@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import models
+from services import change_feed, metrics
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# КЭШ DAILY: ДЕНЬ -> СПИСОК МАТЧЕЙ
+# ==========================================
+# Список матчей дня общий для всех юзеров. Сбрасывается синком
+# (_sync_daily_logic) только для дней, где реально что-то поменялось.
+# Прогнозы юзера лежат отдельно: (user_id, день) -> {match_id: pick}.
+# Другие воркеры и записи в обход API (бот) доходят через change-feed.
+# TTL — страховка на случай пропущенного события.
+#
+# Поколения: каждый сброс увеличивает счётчик ключа. Запрос запоминает его
+# до чтения из БД и кладёт результат, только если счётчик не сдвинулся —
+# иначе снимок, прочитанный до коммита синка/прогноза, жил бы ещё целый TTL.
+
+DAY_TTL = 120
+PICKS_TTL = 60
+MAX_PICK_ENTRIES = 20000
+
+# Ключ дня None = "все матчи" (запрос без target_date)
+DayKey = Optional[date]
+
+_lock = threading.Lock()
+_day_cache: Dict[DayKey, Tuple[float, List[dict]]] = {}
+_pick_cache: "OrderedDict[Tuple[int, DayKey], Tuple[float, Dict[str, int]]]" = OrderedDict()
+_day_gen: Dict[DayKey, int] = {}
+# Прогнозы сбрасываются и по юзеру (его прогноз), и по дню (матчи удалены)
+_user_pick_gen: Dict[int, int] = {}
+_day_pick_gen: Dict[DayKey, int] = {}
+
+
+def _bump(gens: dict, key) -> None:
+    gens[key] = gens.get(key, 0) + 1
+
+def _pick_gen(user_id: int, day: DayKey) -> Tuple[int, int]:
+    return (_user_pick_gen.get(user_id, 0), _day_pick_gen.get(day, 0))
+
+
+def serialize_match(m: models.DailyMatch) -> dict:
+    time_str = "--:--"
+    if m.start_time:
+        time_str = m.start_time.strftime("%H:%M")
+    return {
+        "id": m.id,
+        "tournament": m.tournament,
+        "start_time": time_str,
+        "status": m.status,
+        "player1": m.player1,
+        "player2": m.player2,
+        "score": m.score,
+        "winner": m.winner,
+    }
+
+def get_day_matches(target_date: DayKey, db: Session) -> List[dict]:
+    """
+    Матчи дня (отсортированы по времени). Элементы общие — не мутировать.
+    """
+    now = time.time()
+    cached = _day_cache.get(target_date)
+    if cached and now - cached[0] < DAY_TTL:
+        metrics.cache_lookup("daily_day", True)
+        return cached[1]
+    metrics.cache_lookup("daily_day", False)
+    with _lock:
+        gen = _day_gen.get(target_date, 0)
+
+    query = db.query(models.DailyMatch)
+    if target_date:
+        query = query.filter(models.DailyMatch.match_date == target_date)
+    matches = [serialize_match(m) for m in query.order_by(models.DailyMatch.start_time).all()]
+
+    with _lock:
+        if _day_gen.get(target_date, 0) == gen:
+            _day_cache[target_date] = (now, matches)
+    return matches
+
+def get_user_picks(user_id: int, target_date: DayKey, match_ids: List[str], db: Session) -> Dict[str, int]:
+    """
+    Карта прогнозов юзера на день: {match_id: predicted_winner}.
+    """
+    key = (user_id, target_date)
+    now = time.time()
+    with _lock:
+        cached = _pick_cache.get(key)
+        if cached and now - cached[0] < PICKS_TTL:
+            _pick_cache.move_to_end(key)
+            metrics.cache_lookup("daily_picks", True)
+            return cached[1]
+        gen = _pick_gen(user_id, target_date)
+    metrics.cache_lookup("daily_picks", False)
+
+    picks_map: Dict[str, int] = {}
+    if match_ids:
+        rows = db.query(models.DailyPick.match_id, models.DailyPick.predicted_winner).filter(
+            models.DailyPick.user_id == user_id,
+            models.DailyPick.match_id.in_(match_ids)
+        ).all()
+        picks_map = {row.match_id: row.predicted_winner for row in rows}
+
+    with _lock:
+        if _pick_gen(user_id, target_date) != gen:
+            return picks_map
+        _pick_cache[key] = (now, picks_map)
+        _pick_cache.move_to_end(key)
+        while len(_pick_cache) > MAX_PICK_ENTRIES:
+            _pick_cache.popitem(last=False)
+    return picks_map
+
+
+# --- ИНВАЛИДАЦИЯ ---
+
+def invalidate_days(days: Iterable[DayKey], drop_picks: bool = False) -> None:
+    """
+    Сбрасывает списки матчей для указанных дней.
+    Список "все матчи" сбрасывается всегда, если что-то поменялось.
+    drop_picks=True — ещё и прогнозы всех юзеров на эти дни
+    (нужно, когда матчи удалены вместе с прогнозами).
+    """
+    days = set(days)
+    if not days: return
+    changed_count = len(days - {None})
+    days.add(None)
+    with _lock:
+        for d in days:
+            _day_cache.pop(d, None)
+            _bump(_day_gen, d)
+        if drop_picks:
+            for d in days:
+                _bump(_day_pick_gen, d)
+            stale = [k for k in _pick_cache if k[1] in days]
+            for k in stale:
+                del _pick_cache[k]
+    logger.info(f"🧹 Daily cache invalidated for {changed_count} day(s)")
+
+def invalidate_user_picks(user_id: int, day: DayKey) -> None:
+    with _lock:
+        _bump(_user_pick_gen, user_id)
+        _pick_cache.pop((user_id, day), None)
+        _pick_cache.pop((user_id, None), None)
+
+def invalidate_user(user_id: int) -> None:
+    """Все дни юзера (когда известен только матч, а не день)."""
+    with _lock:
+        _bump(_user_pick_gen, user_id)
+        for k in [k for k in _pick_cache if k[0] == user_id]:
+            del _pick_cache[k]
+
+
+# --- CHANGE-FEED ---
+
+def _on_match_change(change: dict) -> None:
+    day = change.get("key")
+    try:
+        day = date.fromisoformat(day) if day else None
+    except ValueError:
+        return
+    with _lock:
+        for d in (day, None):
+            _day_cache.pop(d, None)
+            _bump(_day_gen, d)
+
+def _on_pick_change(change: dict) -> None:
+    if change.get("user") is not None:
+        invalidate_user(int(change["user"]))
+
+change_feed.on_change(["daily_matches"], _on_match_change)
+change_feed.on_change(["daily_picks"], _on_pick_change)
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import text
+
+from database.db import engine
+from services import change_feed
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# LIVE-КАНАЛ (SSE) ПОВЕРХ POSTGRES LISTEN/NOTIFY
+# ==========================================
+# Синк после коммита публикует ТОЛЬКО изменения (матчи + строки лидерборда)
+# через pg_notify. Каждый воркер получает их через общее LISTEN-соединение
+# change_feed и раздаёт своим подписчикам (очереди SSE-клиентов).
+# Так работает и при нескольких воркерах/инстансах.
+
+CHANNEL = "live_updates"
+# Лимит payload у NOTIFY — 8000 байт, оставляем запас
+MAX_PAYLOAD = 7000
+CLIENT_QUEUE_SIZE = 100
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+
+def tournament_topic(tournament_id: int) -> str:
+    return f"tournament:{tournament_id}"
+
+def day_topic(day: date) -> str:
+    return f"day:{day.isoformat()}"
+
+
+# --- ПОДПИСКА (event loop) ---
+
+def subscribe(topics: Iterable[str]) -> asyncio.Queue:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+    for topic in topics:
+        _subscribers.setdefault(topic, set()).add(queue)
+    return queue
+
+def unsubscribe(topics: Iterable[str], queue: asyncio.Queue) -> None:
+    for topic in topics:
+        subs = _subscribers.get(topic)
+        if not subs: continue
+        subs.discard(queue)
+        if not subs:
+            del _subscribers[topic]
+
+def subscribers_count() -> int:
+    return sum(len(s) for s in _subscribers.values())
+
+def _dispatch(message: dict) -> None:
+    for queue in list(_subscribers.get(message.get("topic"), ())):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Медленный клиент: пропускаем событие, он доберёт данные обычным запросом
+            pass
+
+
+# --- ПУБЛИКАЦИЯ (вызывается из потоков синка) ---
+
+def _chunks(items: List[dict]) -> Iterable[List[dict]]:
+    chunk, size = [], 0
+    for item in items:
+        item_size = len(json.dumps(item, ensure_ascii=False, default=str).encode("utf-8"))
+        if chunk and size + item_size > MAX_PAYLOAD:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(item)
+        size += item_size
+    if chunk:
+        yield chunk
+
+def publish(topic: str, event: str, key: str, items: List[dict]) -> None:
+    """
+    Рассылает список изменений во все воркеры. Большие списки режутся на части.
+    """
+    if not items: return
+    try:
+        with engine.begin() as conn:
+            for chunk in _chunks(items):
+                payload = json.dumps({"topic": topic, "event": event, "data": {key: chunk}}, ensure_ascii=False, default=str)
+                conn.execute(text("SELECT pg_notify(:ch, :payload)"), {"ch": CHANNEL, "payload": payload})
+    except Exception as e:
+        logger.error(f"Live publish error ({topic}): {e}")
+
+def publish_tournament_update(tournament_id: int, matches: List[dict], leaderboard_rows: List[dict]) -> None:
+    topic = tournament_topic(tournament_id)
+    publish(topic, "matches", "matches", matches)
+    publish(topic, "leaderboard", "rows", leaderboard_rows)
+
+def publish_day_update(day: date, matches: List[dict], removed_ids: List[str]) -> None:
+    topic = day_topic(day)
+    publish(topic, "matches", "matches", matches)
+    publish(topic, "removed", "ids", [{"id": m_id} for m_id in removed_ids])
+
+
+# --- ПРИЁМ (поток change-feed -> event loop) ---
+
+def _on_notify(payload: str) -> None:
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        return
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_dispatch, message)
+
+def start(loop: asyncio.AbstractEventLoop) -> None:
+    """Регистрирует канал в change-feed (до change_feed.start())."""
+    global _loop
+    _loop = loop
+    change_feed.on_channel(CHANNEL, _on_notify)
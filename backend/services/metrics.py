@@ -0,0 +1,171 @@
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# МЕТРИКИ ЗАПРОСОВ (GET /metrics)
+# ==========================================
+# На каждый HTTP-запрос middleware в main.py заводит RequestStats в contextvar.
+# Синхронные роуты FastAPI выполняет в потоке с копией контекста, поэтому
+# события движка (before/after_cursor_execute) и кэши роутеров пишут в тот же
+# объект: число SQL, время в БД, попадания в кэши.
+# После ответа всё сводится по шаблону маршрута (/tournament/{id}, а не /tournament/42):
+# гистограммы времени и числа запросов, суммарное время БД, размер ответа.
+#
+# Метрики — на процесс: при нескольких воркерах uvicorn каждый отдаёт свои.
+# Отладочный заголовок X-Request-Stats — по заголовку X-Debug-Stats: 1
+# в запросе или для всех при METRICS_DEBUG_HEADER=1.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_MS", "1000")) / 1000
+MANY_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", "50"))  # больше — похоже на N+1
+DEBUG_HEADER_ALWAYS = os.getenv("METRICS_DEBUG_HEADER") == "1"
+# Маршруты, которые в гистограммы не идут (SSE живёт минутами, /metrics — сам себя)
+SKIP_ROUTES = {"/metrics", "/live/stream"}
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "caches")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.caches: Dict[str, str] = {}
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def begin_request() -> Tuple[RequestStats, object]:
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+def cache_lookup(name: str, hit: bool) -> None:
+    """Отметка кэша роутера/сервиса для текущего запроса (вне запроса — no-op)."""
+    stats = _current.get()
+    if stats is not None:
+        stats.caches[name] = "hit" if hit else "miss"
+
+
+# --- SQL: счётчик и время по событиям движка ---
+
+# Время старта — в контексте выполнения самого запроса, а не в стеке на
+# соединении: after_cursor_execute не вызывается, если запрос упал, и запись
+# в conn.info осталась бы на пуловом соединении навсегда.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None: return
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Агрегаты по маршрутам ---
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        result, cumulative = [], 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            result.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        result.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        result.append(f"{name}_sum{{{labels}}} {self.total:.6f}")
+        result.append(f"{name}_count{{{labels}}} {self.count}")
+        return result
+
+
+class _RouteMetrics:
+    __slots__ = ("latency", "queries", "db_seconds", "response_bytes", "statuses", "caches")
+
+    def __init__(self):
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.queries = _Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.response_bytes = 0
+        self.statuses: Dict[int, int] = {}
+        self.caches: Dict[Tuple[str, str], int] = {}
+
+_lock = threading.Lock()
+_routes: Dict[Tuple[str, str], _RouteMetrics] = {}
+
+
+def record(method: str, route: str, status: int, seconds: float, stats: RequestStats,
+           response_bytes: Optional[int]) -> None:
+    if route in SKIP_ROUTES: return
+    with _lock:
+        m = _routes.get((method, route))
+        if m is None:
+            m = _routes[(method, route)] = _RouteMetrics()
+        m.latency.observe(seconds)
+        m.queries.observe(stats.queries)
+        m.db_seconds += stats.db_seconds
+        if response_bytes: m.response_bytes += response_bytes
+        m.statuses[status] = m.statuses.get(status, 0) + 1
+        for cache, result in stats.caches.items():
+            m.caches[(cache, result)] = m.caches.get((cache, result), 0) + 1
+
+    if seconds >= SLOW_REQUEST_SECONDS or stats.queries >= MANY_QUERIES:
+        logger.warning(
+            f"🐢 Slow request {method} {route}: {seconds * 1000:.0f}ms, "
+            f"{stats.queries} SQL / {stats.db_seconds * 1000:.0f}ms in DB"
+        )
+
+def debug_header(seconds: float, stats: RequestStats) -> str:
+    parts = [f"time={seconds * 1000:.1f}ms", f"sql={stats.queries}", f"db={stats.db_seconds * 1000:.1f}ms"]
+    if stats.caches:
+        parts.append("cache=" + ",".join(f"{name}:{result}" for name, result in sorted(stats.caches.items())))
+    return "; ".join(parts)
+
+def render() -> str:
+    with _lock:
+        snapshot = list(_routes.items())
+        lines = []
+        for (method, route), m in sorted(snapshot):
+            labels = f'method="{method}",route="{route}"'
+            lines += m.latency.lines("http_request_duration_seconds", labels)
+            lines += m.queries.lines("http_request_db_queries", labels)
+            lines.append(f"http_request_db_seconds_total{{{labels}}} {m.db_seconds:.6f}")
+            lines.append(f"http_response_bytes_total{{{labels}}} {m.response_bytes}")
+            for status, count in sorted(m.statuses.items()):
+                lines.append(f'http_requests_total{{{labels},status="{status}"}} {count}')
+            for (cache, result), count in sorted(m.caches.items()):
+                lines.append(f'http_cache_lookups_total{{{labels},cache="{cache}",result="{result}"}} {count}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from database.db import SessionLocal
+from services import change_feed, live_hub
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# ТОЧЕЧНЫЙ ПЕРЕСЧЁТ ПО CHANGE-FEED
+# ==========================================
+# Реагирует только на записи в обход скоринга (source = NULL):
+# правки бота в user_picks (массовые замены — одним событием по турниру),
+# ручной SQL по true_draw / daily_picks.
+# Синк и API пересчитывают сами. Работает только на воркере-лидере.
+# События копятся DEBOUNCE_SECONDS: массовая замена в боте = один пересчёт.
+
+DEBOUNCE_SECONDS = 3
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+# tournament_id -> время, когда пора считать
+_pending_tournaments: Dict[int, float] = {}
+# match_id -> user_ids, плюс общий дедлайн
+_pending_daily: Dict[str, Set[int]] = {}
+_daily_due: Optional[float] = None
+
+
+def _needs_rescore(change: dict) -> bool:
+    return change.get("source") is None and change_feed.is_leader()
+
+def _on_bracket_change(change: dict) -> None:
+    if not _needs_rescore(change): return
+    try: tid = int(change["key"])
+    except (KeyError, TypeError, ValueError): return
+    with _lock:
+        _pending_tournaments.setdefault(tid, time.time() + DEBOUNCE_SECONDS)
+    _wake.set()
+
+def _on_daily_pick_change(change: dict) -> None:
+    global _daily_due
+    if not _needs_rescore(change) or not change.get("key"): return
+    with _lock:
+        users = _pending_daily.setdefault(change["key"], set())
+        if change.get("user") is not None:
+            users.add(int(change["user"]))
+        if _daily_due is None:
+            _daily_due = time.time() + DEBOUNCE_SECONDS
+    _wake.set()
+
+
+def _rescore_tournament(tid: int) -> None:
+    from utils.score_calculator import update_tournament_leaderboard
+    db = SessionLocal()
+    try:
+        changed_rows = update_tournament_leaderboard(tid, db) or []
+    finally:
+        db.close()
+    live_hub.publish_tournament_update(tid, [], changed_rows)
+
+def _rescore_daily(pending: Dict[str, Set[int]]) -> None:
+    from utils.daily_calculator import rescore_picks
+    user_ids = set()
+    for users in pending.values():
+        user_ids |= users
+    db = SessionLocal()
+    try:
+        rescore_picks(list(pending), list(user_ids), db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Daily rescore error: {e}")
+    finally:
+        db.close()
+
+def _run() -> None:
+    global _daily_due
+    while not _stop.is_set():
+        _wake.wait(timeout=1)
+        _wake.clear()
+        now = time.time()
+        with _lock:
+            due_tournaments = [tid for tid, due in _pending_tournaments.items() if due <= now]
+            for tid in due_tournaments:
+                del _pending_tournaments[tid]
+            daily = None
+            if _daily_due is not None and _daily_due <= now:
+                daily = dict(_pending_daily)
+                _pending_daily.clear()
+                _daily_due = None
+
+        for tid in due_tournaments:
+            logger.info(f"🔁 [T{tid}] Rescoring after external change")
+            try: _rescore_tournament(tid)
+            except Exception as e: logger.error(f"Rescore error T{tid}: {e}")
+        if daily:
+            _rescore_daily(daily)
+
+def start() -> None:
+    """Регистрирует обработчики в change-feed (до change_feed.start())."""
+    global _thread
+    change_feed.on_change(["true_draw", "user_picks"], _on_bracket_change)
+    change_feed.on_change(["daily_picks"], _on_daily_pick_change)
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="rescoring", daemon=True)
+    _thread.start()
+
+def stop() -> None:
+    _stop.set()
+    _wake.set()
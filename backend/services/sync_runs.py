@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from database.db import engine
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# ИСТОРИЯ ЦИКЛОВ СИНКА (sync_runs)
+# ==========================================
+# Каждый цикл _sync_tournaments_logic / _sync_daily_logic ведёт SyncRun:
+#   stage("auth"/"read"/...)  — время этапа (повторы одного этапа суммируются)
+#   count("rows_read", n)     — счётчики строк/турниров
+#   sheet({...})              — строка по листу турнира (медленные листы видно сразу)
+# finish() пишет цикл одной строкой в sync_runs и одной строкой в лог.
+# Статус: ok | partial (часть листов/турниров с ошибкой) | error | skipped.
+# Запись истории не должна ронять синк: ошибки только логируются.
+# Старше RETENTION_DAYS удаляется не чаще раза в PRUNE_INTERVAL.
+
+RETENTION_DAYS = int(os.getenv("SYNC_RUNS_RETENTION_DAYS", "14"))
+PRUNE_INTERVAL = 3600
+
+_last_prune = 0.0
+
+
+class _Timer:
+    __slots__ = ("ms",)
+
+    def __init__(self):
+        self.ms = 0.0
+
+
+class SyncRun:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.sheets: List[dict] = []
+        self._finished = False
+
+    @contextmanager
+    def stage(self, name: str):
+        """with run.stage("read") as t: ... — t.ms после выхода (для строки по листу)."""
+        timer = _Timer()
+        started = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            timer.ms = (time.perf_counter() - started) * 1000
+            self.stages[name] = self.stages.get(name, 0.0) + timer.ms
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def sheet(self, entry: dict) -> None:
+        self.sheets.append(entry)
+
+    def finish(self, status: str = "ok", error: Optional[str] = None) -> None:
+        if self._finished: return
+        self._finished = True
+        duration_ms = int((time.perf_counter() - self._started) * 1000)
+        stages = {name: round(ms, 1) for name, ms in self.stages.items()}
+
+        stage_str = " ".join(f"{name}={ms / 1000:.2f}s" for name, ms in stages.items())
+        counter_str = " ".join(f"{name}={n}" for name, n in self.counters.items())
+        log = logger.error if status == "error" else logger.info
+        parts = [f"📊 Sync {self.kind} [{status}] {duration_ms / 1000:.2f}s", stage_str, counter_str, error]
+        log(" | ".join(part for part in parts if part))
+        try:
+            _save(self, status, duration_ms, stages, error)
+        except Exception as e:
+            logger.error(f"Sync run history write failed: {e}")
+
+
+def start(kind: str) -> SyncRun:
+    return SyncRun(kind)
+
+
+def _save(run: SyncRun, status: str, duration_ms: int, stages: dict, error: Optional[str]) -> None:
+    global _last_prune
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO sync_runs (kind, status, started_at, duration_ms, stages, counters, sheets, error)
+            VALUES (:kind, :status, :started_at, :duration_ms,
+                    CAST(:stages AS JSONB), CAST(:counters AS JSONB), CAST(:sheets AS JSONB), :error)
+        """), {
+            "kind": run.kind, "status": status, "started_at": run.started_at, "duration_ms": duration_ms,
+            "stages": json.dumps(stages), "counters": json.dumps(run.counters),
+            "sheets": json.dumps(run.sheets, ensure_ascii=False), "error": error[:2000] if error else None,
+        })
+        now = time.time()
+        if now - _last_prune > PRUNE_INTERVAL:
+            _last_prune = now
+            deleted = conn.execute(text(
+                "DELETE FROM sync_runs WHERE started_at < now() - make_interval(days => :days)"
+            ), {"days": RETENTION_DAYS}).rowcount
+            if deleted:
+                logger.info(f"🧹 sync_runs: {deleted} run(s) older than {RETENTION_DAYS}d removed")
+
+
+# ==========================================
+# ЧТЕНИЕ (админка)
+# ==========================================
+
+def recent(kind: Optional[str], limit: int) -> List[dict]:
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT id, kind, status, started_at, duration_ms, stages, counters, sheets, error
+            FROM sync_runs
+            WHERE CAST(:kind AS TEXT) IS NULL OR kind = :kind
+            ORDER BY started_at DESC
+            LIMIT :limit
+        """), {"kind": kind, "limit": limit}).mappings().all()
+    return [dict(row) for row in rows]
+
+def summary(hours: int) -> dict:
+    """За окно: перцентили длительности по типу, средние этапов и самые медленные листы."""
+    with engine.connect() as conn:
+        kinds = conn.execute(text("""
+            SELECT kind, COUNT(*) AS runs,
+                   COUNT(*) FILTER (WHERE status = 'error') AS errors,
+                   COUNT(*) FILTER (WHERE status = 'partial') AS partial,
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms) AS p50_ms,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms) AS p95_ms,
+                   MAX(duration_ms) AS max_ms
+            FROM sync_runs
+            WHERE started_at > now() - make_interval(hours => :hours)
+            GROUP BY kind
+        """), {"hours": hours}).mappings().all()
+        stages = conn.execute(text("""
+            SELECT r.kind, s.key AS stage, AVG(s.value::float) AS avg_ms, MAX(s.value::float) AS max_ms
+            FROM sync_runs r, jsonb_each_text(r.stages) s
+            WHERE r.started_at > now() - make_interval(hours => :hours)
+            GROUP BY r.kind, s.key
+            ORDER BY r.kind, avg_ms DESC
+        """), {"hours": hours}).mappings().all()
+        sheets = conn.execute(text("""
+            SELECT (e->>'tournament_id')::int AS tournament_id, e->>'sheet' AS sheet, COUNT(*) AS runs,
+                   AVG((e->>'read_ms')::float) AS avg_read_ms,
+                   AVG((e->>'upsert_ms')::float) AS avg_upsert_ms,
+                   AVG((e->>'rescore_ms')::float) AS avg_rescore_ms,
+                   MAX((e->>'total_ms')::float) AS max_total_ms
+            FROM sync_runs r, jsonb_array_elements(r.sheets) e
+            WHERE r.kind = 'tournaments' AND r.started_at > now() - make_interval(hours => :hours)
+            GROUP BY 1, 2
+            ORDER BY AVG((e->>'total_ms')::float) DESC
+            LIMIT 10
+        """), {"hours": hours}).mappings().all()
+
+    result = {"hours": hours, "kinds": {}}
+    for row in kinds:
+        result["kinds"][row["kind"]] = {
+            "runs": row["runs"], "errors": row["errors"], "partial": row["partial"],
+            "p50_ms": round(row["p50_ms"]), "p95_ms": round(row["p95_ms"]), "max_ms": row["max_ms"],
+            "stages": {},
+        }
+    for row in stages:
+        if row["kind"] in result["kinds"]:
+            result["kinds"][row["kind"]]["stages"][row["stage"]] = {
+                "avg_ms": round(row["avg_ms"], 1), "max_ms": round(row["max_ms"], 1),
+            }
+    result["slowest_sheets"] = [
+        {k: (round(v, 1) if isinstance(v, float) else v) for k, v in dict(row).items()} for row in sheets
+    ]
+    return result
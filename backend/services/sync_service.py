@@ -11,12 +11,13 @@ from datetime import datetime
 import re
 import pytz 
 
+from config import DAILY_DIRECT_INGEST
 from database.db import SessionLocal
+from services import tournament_registry, daily_cache, live_hub, change_feed, sync_runs
 from database.models import (
     DailyMatch, DailyPick, DailyLeaderboard 
 )
-# process_match_results больше не нужен здесь, убираем импорт
-# from utils.daily_calculator import process_match_results 
+from utils import daily_calculator
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -103,216 +104,287 @@ def get_match_rows(round_name: str, draw_size: int):
     for i in range(count): indices.append(start_idx + (i * step))
     return indices
 
+def _true_draw_change(row) -> dict:
+    """Строка true_draw из RETURNING -> событие для live-канала."""
+    return {
+        "round": row.round,
+        "match_number": row.match_number,
+        "player1": row.player1,
+        "player2": row.player2,
+        "winner": row.winner,
+        "scores": [sc for sc in [row.set1, row.set2, row.set3, row.set4, row.set5] if sc]
+    }
+
 # ==========================================
 # 1. СИНХРОНИЗАЦИЯ ТУРНИРОВ (BRACKET)
 # ==========================================
 
 def _sync_tournaments_logic(engine: Engine) -> None:
+    run = sync_runs.start("tournaments")
+    try:
+        status, error = _sync_tournaments(engine, run)
+    except Exception as e:
+        run.finish("error", str(e))
+        raise
+    run.finish(status, error)
+
+def _sync_tournaments(engine: Engine, run: sync_runs.SyncRun):
+    """Цикл синка турниров; возвращает (статус, ошибка) для sync_runs."""
     try:
-        client = get_google_sheets_client()
-        sheet = client.open_by_key(os.getenv("GOOGLE_SHEET_ID"))
+        with run.stage("auth"):
+            client = get_google_sheets_client()
+            sheet = client.open_by_key(os.getenv("GOOGLE_SHEET_ID"))
     except Exception as e:
         logger.error(f"Sheet connect error: {e}")
-        return
+        return "error", f"Sheet connect error: {e}"
 
     with engine.connect() as conn:
         try:
-            rows = sheet.worksheet("tournaments").get_all_values()
-        except: return
+            with run.stage("read_index"):
+                rows = sheet.worksheet("tournaments").get_all_values()
+        except Exception as e:
+            return "error", f"tournaments sheet: {e}"
+        run.count("rows_read", len(rows) - 1)
 
         tournaments_to_sync = []
         now = datetime.now(pytz.UTC)
 
-        for row in rows[1:]:
-            if len(row) < 1: continue
-            tid_str = str(row[0]).strip()
-            if not tid_str.isdigit(): continue
-            row += [""] * (16 - len(row))
+        with run.stage("upsert_tournaments"):
+            for row in rows[1:]:
+                if len(row) < 1: continue
+                tid_str = str(row[0]).strip()
+                if not tid_str.isdigit():
+                    run.count("rows_skipped")
+                    continue
+                row += [""] * (16 - len(row))
 
-            with conn.begin_nested():
-                try:
-                    tid = int(tid_str)
-                    name = row[1]
-                    dates = row[2]
-                    status_raw = str(row[3]).upper().strip()
-                    sheet_name = row[4]
-                    s_round = row[5]
-                    t_type = row[6]
-                    start = row[7]
-                    close = row[8]
-                    tag = row[9]
-                    surface = row[10]
-                    defending = row[11]
-                    info = row[12]
-                    matches_count = row[13]
-                    month_val = row[14]
-                    img_url = row[15]
-
-                    status = status_raw
-                    start_dt = parse_datetime(start)
-                    close_dt = parse_datetime(close)
+                with conn.begin_nested():
+                    try:
+                        tid = int(tid_str)
+                        name = row[1]
+                        dates = row[2]
+                        status_raw = str(row[3]).upper().strip()
+                        sheet_name = row[4]
+                        s_round = row[5]
+                        t_type = row[6]
+                        start = row[7]
+                        close = row[8]
+                        tag = row[9]
+                        surface = row[10]
+                        defending = row[11]
+                        info = row[12]
+                        matches_count = row[13]
+                        month_val = row[14]
+                        img_url = row[15]
+
+                        status = status_raw
+                        start_dt = parse_datetime(start)
+                        close_dt = parse_datetime(close)
                     
-                    if status in ["COMPLETED", "CLOSED"]: pass 
-                    elif close_dt and now >= close_dt: status = "CLOSED"
-                    elif start_dt and now >= start_dt and sheet_name and sheet_name.strip(): status = "ACTIVE"
-                    else: status = "PLANNED"
-
-                    conn.execute(text("""
-                        INSERT INTO tournaments (
-                            id, name, dates, status, sheet_name, starting_round, type, start, close, tag,
-                            surface, defending_champion, description, matches_count, month, image_url
-                        )
-                        VALUES (:id, :name, :dates, :status, :sheet, :sr, :type, :start, :close, :tag,
-                                :surf, :defend, :desc, :mc, :month, :img)
-                        ON CONFLICT (id) DO UPDATE SET 
-                        name=EXCLUDED.name, dates=EXCLUDED.dates, status=EXCLUDED.status, 
-                        sheet_name=EXCLUDED.sheet_name, starting_round=EXCLUDED.starting_round,
-                        type=EXCLUDED.type, start=EXCLUDED.start, close=EXCLUDED.close, tag=EXCLUDED.tag,
-                        surface=EXCLUDED.surface, defending_champion=EXCLUDED.defending_champion,
-                        description=EXCLUDED.description, matches_count=EXCLUDED.matches_count,
-                        month=EXCLUDED.month, image_url=EXCLUDED.image_url
-                    """), {
-                        "id": tid, "name": name, "dates": dates, "status": status, 
-                        "sheet": sheet_name, "sr": s_round, "type": t_type, 
-                        "start": start, "close": close, "tag": tag,
-                        "surf": surface, "defend": defending, "desc": info, 
-                        "mc": matches_count, "month": month_val, "img": img_url
-                    })
+                        if status in ["COMPLETED", "CLOSED"]: pass 
+                        elif close_dt and now >= close_dt: status = "CLOSED"
+                        elif start_dt and now >= start_dt and sheet_name and sheet_name.strip(): status = "ACTIVE"
+                        else: status = "PLANNED"
+
+                        conn.execute(text("""
+                            INSERT INTO tournaments (
+                                id, name, dates, status, sheet_name, starting_round, type, start, close, tag,
+                                surface, defending_champion, description, matches_count, month, image_url
+                            )
+                            VALUES (:id, :name, :dates, :status, :sheet, :sr, :type, :start, :close, :tag,
+                                    :surf, :defend, :desc, :mc, :month, :img)
+                            ON CONFLICT (id) DO UPDATE SET 
+                            name=EXCLUDED.name, dates=EXCLUDED.dates, status=EXCLUDED.status, 
+                            sheet_name=EXCLUDED.sheet_name, starting_round=EXCLUDED.starting_round,
+                            type=EXCLUDED.type, start=EXCLUDED.start, close=EXCLUDED.close, tag=EXCLUDED.tag,
+                            surface=EXCLUDED.surface, defending_champion=EXCLUDED.defending_champion,
+                            description=EXCLUDED.description, matches_count=EXCLUDED.matches_count,
+                            month=EXCLUDED.month, image_url=EXCLUDED.image_url
+                        """), {
+                            "id": tid, "name": name, "dates": dates, "status": status, 
+                            "sheet": sheet_name, "sr": s_round, "type": t_type, 
+                            "start": start, "close": close, "tag": tag,
+                            "surf": surface, "defend": defending, "desc": info, 
+                            "mc": matches_count, "month": month_val, "img": img_url
+                        })
                     
-                    draw_size = 32
-                    s_round_clean = s_round.strip().upper()
-                    if s_round_clean == "R128": draw_size = 128
-                    elif s_round_clean == "R64": draw_size = 64
-                    elif s_round_clean == "R32": draw_size = 32
-                    else:
-                        t_type_lower = t_type.lower()
-                        if "1000" in t_type_lower: draw_size = 64
-                        elif "slam" in t_type_lower or "тбш" in tag.lower(): draw_size = 128
+                        draw_size = tournament_registry.get_draw_size(s_round, t_type, tag)
                     
-                    if status in ["ACTIVE", "CLOSED"]:
-                        tournaments_to_sync.append((tid, sheet_name, draw_size, status))
+                        if status in ["ACTIVE", "CLOSED"]:
+                            tournaments_to_sync.append((tid, sheet_name, draw_size, status))
                         
-                except Exception as e:
-                    logger.error(f"Row parsing error ID={tid_str}: {e}")
-        conn.commit()
+                    except Exception as e:
+                        logger.error(f"Row parsing error ID={tid_str}: {e}")
+                        run.count("errors")
+            conn.commit()
+
+        # Реестр турниров в памяти перечитываем сразу после апсерта
+        with run.stage("registry"):
+            try:
+                tournament_registry.refresh()
+            except Exception as e:
+                logger.error(f"Tournament registry refresh error: {e}")
 
         for tid, sheet_name, draw_size, status in tournaments_to_sync:
              try:
                 try:
-                    ws = sheet.worksheet(sheet_name)
-                    data = ws.get_all_values()
-                except: 
+                    with run.stage("read") as read_t:
+                        ws = sheet.worksheet(sheet_name)
+                        data = ws.get_all_values()
+                except Exception:
                     logger.warning(f"Sheet {sheet_name} not found for T{tid}")
+                    run.count("sheets_missing")
                     continue
-                
+                run.count("rows_read", len(data) - 1)
                 if len(data) < 10:
                     logger.warning(f"🛑 SAFETY BRAKE: Sheet '{sheet_name}' (T{tid}) is too small. Skipping.")
+                    run.count("sheets_skipped")
                     continue
 
                 if len(data) < 2: continue
-                headers = data[0]
-                cols = {h.strip(): i for i, h in enumerate(headers) if h.strip()}
-                rounds_order = ["R128", "R64", "R32", "R16", "QF", "SF", "F"]
+                with run.stage("upsert") as upsert_t:
+                    changed_matches = []
+                    headers = data[0]
+                    cols = {h.strip(): i for i, h in enumerate(headers) if h.strip()}
+                    rounds_order = ["R128", "R64", "R32", "R16", "QF", "SF", "F"]
                 
-                champion = None
-                if "Champion" in cols and len(data) > 1:
-                    champ_col = cols["Champion"]
-                    for r_idx in range(1, len(data)):
-                        if champ_col < len(data[r_idx]):
-                            raw_val = data[r_idx][champ_col]
-                            val = clean_sheet_value(raw_val) 
-                            if val: 
-                                champion = val
-                                break
+                    champion = None
+                    if "Champion" in cols and len(data) > 1:
+                        champ_col = cols["Champion"]
+                        for r_idx in range(1, len(data)):
+                            if champ_col < len(data[r_idx]):
+                                raw_val = data[r_idx][champ_col]
+                                val = clean_sheet_value(raw_val) 
+                                if val: 
+                                    champion = val
+                                    break
                 
-                with conn.begin_nested():
-                    for round_name in rounds_order:
-                        if round_name not in cols: continue
-                        col_idx = cols[round_name]
-                        row_indices = get_match_rows(round_name, draw_size)
+                    # Синк пересчитывает очки сам: триггеры пометят события как 'sync'
+                    change_feed.set_source(conn, "sync")
+                    with conn.begin_nested():
+                        for round_name in rounds_order:
+                            if round_name not in cols: continue
+                            col_idx = cols[round_name]
+                            row_indices = get_match_rows(round_name, draw_size)
                         
-                        for i, r_idx in enumerate(row_indices):
-                            match_number = i + 1
-                            if r_idx + 1 >= len(data): continue
-                            row1 = data[r_idx]; row2 = data[r_idx+1]
+                            for i, r_idx in enumerate(row_indices):
+                                match_number = i + 1
+                                if r_idx + 1 >= len(data): continue
+                                row1 = data[r_idx]; row2 = data[r_idx+1]
                             
-                            raw_p1 = row1[col_idx] if col_idx < len(row1) else ""
-                            raw_p2 = row2[col_idx] if col_idx < len(row2) else ""
+                                raw_p1 = row1[col_idx] if col_idx < len(row1) else ""
+                                raw_p2 = row2[col_idx] if col_idx < len(row2) else ""
                             
-                            p1 = clean_sheet_value(raw_p1) or ""
-                            p2 = clean_sheet_value(raw_p2) or ""
+                                p1 = clean_sheet_value(raw_p1) or ""
+                                p2 = clean_sheet_value(raw_p2) or ""
                             
-                            winner = None
+                                winner = None
                             
-                            if p1 and p2:
-                                if p2.lower() == "bye": winner = p1
-                                elif p1.lower() == "bye": winner = p2
-                                elif round_name != "F":
-                                    curr_r_idx_list = rounds_order.index(round_name)
-                                    next_round_name = None
-                                    for k in range(curr_r_idx_list + 1, len(rounds_order)):
-                                        if rounds_order[k] in cols: next_round_name = rounds_order[k]; break
+                                if p1 and p2:
+                                    if p2.lower() == "bye": winner = p1
+                                    elif p1.lower() == "bye": winner = p2
+                                    elif round_name != "F":
+                                        curr_r_idx_list = rounds_order.index(round_name)
+                                        next_round_name = None
+                                        for k in range(curr_r_idx_list + 1, len(rounds_order)):
+                                            if rounds_order[k] in cols: next_round_name = rounds_order[k]; break
                                     
-                                    if next_round_name:
-                                        next_col = cols[next_round_name]
-                                        next_round_indices = get_match_rows(next_round_name, draw_size)
-                                        target_match_idx = i // 2
-                                        if target_match_idx < len(next_round_indices):
-                                            next_r_start = next_round_indices[target_match_idx]
-                                            candidates = []
-                                            if next_r_start < len(data) and next_col < len(data[next_r_start]): 
-                                                candidates.append(clean_sheet_value(data[next_r_start][next_col]))
-                                            if next_r_start + 1 < len(data) and next_col < len(data[next_r_start+1]): 
-                                                candidates.append(clean_sheet_value(data[next_r_start+1][next_col]))
+                                        if next_round_name:
+                                            next_col = cols[next_round_name]
+                                            next_round_indices = get_match_rows(next_round_name, draw_size)
+                                            target_match_idx = i // 2
+                                            if target_match_idx < len(next_round_indices):
+                                                next_r_start = next_round_indices[target_match_idx]
+                                                candidates = []
+                                                if next_r_start < len(data) and next_col < len(data[next_r_start]): 
+                                                    candidates.append(clean_sheet_value(data[next_r_start][next_col]))
+                                                if next_r_start + 1 < len(data) and next_col < len(data[next_r_start+1]): 
+                                                    candidates.append(clean_sheet_value(data[next_r_start+1][next_col]))
                                             
-                                            for cand in candidates:
-                                                if not cand: continue
-                                                if is_same_player(p1, cand): winner = p1; break
-                                                elif is_same_player(p2, cand): winner = p2; break
+                                                for cand in candidates:
+                                                    if not cand: continue
+                                                    if is_same_player(p1, cand): winner = p1; break
+                                                    elif is_same_player(p2, cand): winner = p2; break
                             
-                            if round_name == "F" and champion:
-                                if p1 and is_same_player(p1, champion): winner = p1
-                                elif p2 and is_same_player(p2, champion): winner = p2
+                                if round_name == "F" and champion:
+                                    if p1 and is_same_player(p1, champion): winner = p1
+                                    elif p2 and is_same_player(p2, champion): winner = p2
                             
-                            scores = []
-                            for s_off in range(1, 6):
-                                sc_idx = col_idx + s_off
-                                if sc_idx >= len(row1): scores.append(None); continue
-                                if sc_idx < len(headers) and headers[sc_idx].strip() in rounds_order: scores.append(None); continue
-                                s1_val = clean_sheet_value(row1[sc_idx])
-                                s2_val = clean_sheet_value(row2[sc_idx])
-                                if s1_val and s2_val: scores.append(f"{s1_val}-{s2_val}")
-                                else: scores.append(None)
-                            s1, s2, s3, s4, s5 = (scores + [None]*5)[:5]
+                                scores = []
+                                for s_off in range(1, 6):
+                                    sc_idx = col_idx + s_off
+                                    if sc_idx >= len(row1): scores.append(None); continue
+                                    if sc_idx < len(headers) and headers[sc_idx].strip() in rounds_order: scores.append(None); continue
+                                    s1_val = clean_sheet_value(row1[sc_idx])
+                                    s2_val = clean_sheet_value(row2[sc_idx])
+                                    if s1_val and s2_val: scores.append(f"{s1_val}-{s2_val}")
+                                    else: scores.append(None)
+                                s1, s2, s3, s4, s5 = (scores + [None]*5)[:5]
                             
-                            conn.execute(text("""
-                                INSERT INTO true_draw (tournament_id, round, match_number, player1, player2, winner, set1, set2, set3, set4, set5)
-                                VALUES (:tid, :rnd, :mn, :p1, :p2, :win, :s1, :s2, :s3, :s4, :s5)
+                                # Пишем только если строка новая или реально изменилась:
+                                # RETURNING вернёт её только в этом случае
+                                changed_row = conn.execute(text("""
+                                    INSERT INTO true_draw (tournament_id, round, match_number, player1, player2, winner, set1, set2, set3, set4, set5)
+                                    VALUES (:tid, :rnd, :mn, :p1, :p2, :win, :s1, :s2, :s3, :s4, :s5)
+                                    ON CONFLICT (tournament_id, round, match_number) DO UPDATE
+                                    SET player1=EXCLUDED.player1, player2=EXCLUDED.player2, winner=EXCLUDED.winner,
+                                        set1=EXCLUDED.set1, set2=EXCLUDED.set2, set3=EXCLUDED.set3, set4=EXCLUDED.set4, set5=EXCLUDED.set5
+                                    WHERE (true_draw.player1, true_draw.player2, true_draw.winner,
+                                           true_draw.set1, true_draw.set2, true_draw.set3, true_draw.set4, true_draw.set5)
+                                          IS DISTINCT FROM
+                                          (EXCLUDED.player1, EXCLUDED.player2, EXCLUDED.winner,
+                                           EXCLUDED.set1, EXCLUDED.set2, EXCLUDED.set3, EXCLUDED.set4, EXCLUDED.set5)
+                                    RETURNING round, match_number, player1, player2, winner, set1, set2, set3, set4, set5
+                                """), {
+                                    "tid": tid, "rnd": round_name, "mn": match_number, 
+                                    "p1": p1, "p2": p2, "win": winner, 
+                                    "s1": s1, "s2": s2, "s3": s3, "s4": s4, "s5": s5
+                                }).fetchone()
+                                if changed_row:
+                                    changed_matches.append(_true_draw_change(changed_row))
+                        if champion:
+                            changed_row = conn.execute(text("""
+                                INSERT INTO true_draw (tournament_id, round, match_number, player1, player2, winner)
+                                VALUES (:tid, 'Champion', 1, :name, NULL, :name)
                                 ON CONFLICT (tournament_id, round, match_number) DO UPDATE
-                                SET player1=EXCLUDED.player1, player2=EXCLUDED.player2, winner=EXCLUDED.winner,
-                                    set1=EXCLUDED.set1, set2=EXCLUDED.set2, set3=EXCLUDED.set3, set4=EXCLUDED.set4, set5=EXCLUDED.set5
-                            """), {
-                                "tid": tid, "rnd": round_name, "mn": match_number, 
-                                "p1": p1, "p2": p2, "win": winner, 
-                                "s1": s1, "s2": s2, "s3": s3, "s4": s4, "s5": s5
-                            })
-                    if champion:
-                        conn.execute(text("""
-                            INSERT INTO true_draw (tournament_id, round, match_number, player1, player2, winner)
-                            VALUES (:tid, 'Champion', 1, :name, NULL, :name)
-                            ON CONFLICT (tournament_id, round, match_number) DO UPDATE
-                            SET winner=EXCLUDED.winner, player1=EXCLUDED.player1
-                        """), {"tid": tid, "name": champion})
+                                SET winner=EXCLUDED.winner, player1=EXCLUDED.player1
+                                WHERE (true_draw.winner, true_draw.player1) IS DISTINCT FROM (EXCLUDED.winner, EXCLUDED.player1)
+                                RETURNING round, match_number, player1, player2, winner, set1, set2, set3, set4, set5
+                            """), {"tid": tid, "name": champion}).fetchone()
+                            if changed_row:
+                                changed_matches.append(_true_draw_change(changed_row))
                 
-                conn.commit()
+                    conn.commit()
                 # Пересчет очков БРЕКЕТА (отдельная утилита)
                 from utils.score_calculator import update_tournament_leaderboard as update_bracket_scores
-                db_session = SessionLocal()
-                try: update_bracket_scores(tid, db_session)
-                except Exception as ex: logger.error(str(ex))
-                finally: db_session.close()
-             except Exception as e: logger.error(f"Sync error T{tid}: {e}")
+                changed_lb_rows = []
+                with run.stage("rescore") as rescore_t:
+                    db_session = SessionLocal()
+                    try:
+                        changed_lb_rows = update_bracket_scores(tid, db_session) or []
+                        run.count("tournaments_rescored")
+                        run.count("leaderboard_rows_changed", len(changed_lb_rows))
+                    except Exception as ex:
+                        run.count("errors")
+                        logger.error(str(ex))
+                    finally: db_session.close()
+
+                # LIVE: изменившиеся матчи сетки + затронутые строки лидерборда
+                with run.stage("publish"):
+                    live_hub.publish_tournament_update(tid, changed_matches, changed_lb_rows)
+
+                run.count("tournaments_synced")
+                run.count("rows_changed", len(changed_matches))
+                run.sheet({
+                    "tournament_id": tid, "sheet": sheet_name, "rows": len(data), "changed": len(changed_matches),
+                    "read_ms": round(read_t.ms, 1), "upsert_ms": round(upsert_t.ms, 1),
+                    "rescore_ms": round(rescore_t.ms, 1), "total_ms": round(read_t.ms + upsert_t.ms + rescore_t.ms, 1),
+                })
+             except Exception as e:
+                 run.count("errors")
+                 logger.error(f"Sync error T{tid}: {e}")
         conn.commit()
+    return ("partial" if run.counters.get("errors") else "ok"), None
 
 async def sync_google_sheets_with_db(engine: Engine) -> None:
     loop = asyncio.get_running_loop()
@@ -323,120 +395,186 @@ async def sync_google_sheets_with_db(engine: Engine) -> None:
 # ==========================================
 
 def _sync_daily_logic(engine: Engine) -> None:
+    run = sync_runs.start("daily")
+    try:
+        status, error = _sync_daily(engine, run)
+    except Exception as e:
+        run.finish("error", str(e))
+        raise
+    run.finish(status, error)
+
+def _sync_daily(engine: Engine, run: sync_runs.SyncRun):
+    """Цикл синка daily; возвращает (статус, ошибка) для sync_runs."""
+    # DAILY_DIRECT_INGEST: матчи в БД пишет парсер (tennis_parser.db_ingest),
+    # отсюда — только ручной слой: строки M (значения из таблицы) и удаление X.
+    overlay_only = DAILY_DIRECT_INGEST
     try:
-        client = get_google_sheets_client()
-        sheet = client.open_by_key(os.getenv("GOOGLE_SHEET_ID"))
+        with run.stage("auth"):
+            client = get_google_sheets_client()
+            sheet = client.open_by_key(os.getenv("GOOGLE_SHEET_ID"))
         try:
             ws = sheet.worksheet("DAILY_MATCHES")
-        except:
-            return
-        rows = ws.get_all_values()
+        except Exception:
+            return "skipped", "DAILY_MATCHES not found"
+        with run.stage("read"):
+            rows = ws.get_all_values()
     except Exception as e:
         logger.error(f"Google Sheet error: {e}")
-        return
+        return "error", f"Google Sheet error: {e}"
 
-    if len(rows) < 2: return
+    run.count("rows_read", max(0, len(rows) - 1))
+    if len(rows) < 2: return "skipped", None
     session = SessionLocal()
     
     try:
+        change_feed.set_source(session, "sync")
         valid_sheet_ids = set()
         ids_to_delete = set()
+        # Дни, в которых что-то поменялось -> сбрасываем кэш только для них
+        changed_days = set()
+        removed_days = set()
+        # Изменения для live-канала: день -> матчи / удалённые ID
+        live_changed = {}
+        live_removed = {}
+        # Матчи, у которых поменялся результат -> точечный пересчёт прогнозов
+        rescore_ids = []
+
+        # Все матчи одним запросом (вместо SELECT на каждую строку таблицы)
+        with run.stage("load_db"):
+            db_matches = {m.id: m for m in session.query(DailyMatch).all()}
         
-        # 1. ОБНОВЛЯЕМ МАТЧИ
-        for row in rows[1:]:
-            while len(row) < 10: row.append("")
-            m_id = str(row[0]).strip()
-            if not m_id: continue
-            
-            manual_block = str(row[9]).strip().upper()
-            if manual_block == "X":
-                ids_to_delete.add(m_id)
-                continue 
+        with run.stage("upsert"):
+            # 1. ОБНОВЛЯЕМ МАТЧИ
+            for row in rows[1:]:
+                while len(row) < 10: row.append("")
+                m_id = str(row[0]).strip()
+                if not m_id:
+                    run.count("rows_skipped")
+                    continue
             
-            valid_sheet_ids.add(m_id)
+                manual_block = str(row[9]).strip().upper()
+                if manual_block == "X":
+                    ids_to_delete.add(m_id)
+                    run.count("rows_blocked")
+                    continue 
             
-            tour_name = row[1].strip()
-            status_raw = row[2].strip().upper()
-            round_name = row[3].strip()
-            time_str = row[4].strip()
-            p1 = row[5].strip()
-            p2 = row[6].strip()
-            score_text = row[7].strip()
-            winner_raw = row[8].strip()
-
-            match_date = None
-            if time_str:
-                try: match_date = datetime.strptime(time_str, "%d.%m.%Y %H:%M")
-                except: pass
+                valid_sheet_ids.add(m_id)
+                if overlay_only and manual_block != "M":
+                    run.count("rows_skipped")
+                    continue
             
-            winner_val = None
-            if winner_raw == "1": winner_val = 1
-            elif winner_raw == "2": winner_val = 2
+                tour_name = row[1].strip()
+                status_raw = row[2].strip().upper()
+                round_name = row[3].strip()
+                time_str = row[4].strip()
+                p1 = row[5].strip()
+                p2 = row[6].strip()
+                score_text = row[7].strip()
+                winner_raw = row[8].strip()
+
+                match_date = None
+                if time_str:
+                    try: match_date = datetime.strptime(time_str, "%d.%m.%Y %H:%M")
+                    except: pass
             
-            if status_raw == "LIVE":
                 winner_val = None
-            elif winner_val is not None:
-                status_raw = "COMPLETED"
-
-            match = session.query(DailyMatch).filter(DailyMatch.id == m_id).first()
-            if not match:
-                match = DailyMatch(
-                    id=m_id, tournament=tour_name, status=status_raw, round=round_name,
-                    start_time=match_date, player1=p1, player2=p2, score=score_text, winner=winner_val
-                )
-                session.add(match)
-            else:
-                match.tournament = tour_name
-                match.status = status_raw
-                match.round = round_name
-                match.start_time = match_date
-                match.player1 = p1
-                match.player2 = p2
-                match.score = score_text
-                match.winner = winner_val
+                if winner_raw == "1": winner_val = 1
+                elif winner_raw == "2": winner_val = 2
             
+                if status_raw == "LIVE":
+                    winner_val = None
+                elif winner_val is not None:
+                    status_raw = "COMPLETED"
+
+                match_day = match_date.date() if match_date else None
+                new_values = (tour_name, status_raw, round_name, match_date, p1, p2, score_text, winner_val)
+
+                match = db_matches.get(m_id)
+                if not match:
+                    match = DailyMatch(
+                        id=m_id, tournament=tour_name, status=status_raw, round=round_name,
+                        start_time=match_date, match_date=match_day,
+                        player1=p1, player2=p2, score=score_text, winner=winner_val
+                    )
+                    session.add(match)
+                    db_matches[m_id] = match
+                    changed_days.add(match_day)
+                    live_changed.setdefault(match_day, []).append(match)
+                    run.count("rows_inserted")
+                else:
+                    old_values = (match.tournament, match.status, match.round, match.start_time,
+                                  match.player1, match.player2, match.score, match.winner)
+                    if old_values != new_values or match.match_date != match_day:
+                        if (match.status, match.winner) != (status_raw, winner_val):
+                            rescore_ids.append(m_id)
+                        changed_days.add(match.match_date)
+                        changed_days.add(match_day)
+                        match.tournament = tour_name
+                        match.status = status_raw
+                        match.round = round_name
+                        match.start_time = match_date
+                        match.match_date = match_day
+                        match.player1 = p1
+                        match.player2 = p2
+                        match.score = score_text
+                        match.winner = winner_val
+                        live_changed.setdefault(match_day, []).append(match)
+                        run.count("rows_changed")
+
             session.flush()
 
         # 2. УДАЛЯЕМ ЛИШНЕЕ
-        db_matches = session.query(DailyMatch).all()
         matches_to_remove = []
         
-        for db_m in db_matches:
-            if db_m.id in ids_to_delete or db_m.id not in valid_sheet_ids:
+        for db_m in db_matches.values():
+            # В режиме overlay пропавшие из таблицы матчи удаляет парсер (по данным API)
+            missing = db_m.id not in valid_sheet_ids and not overlay_only
+            if db_m.id in ids_to_delete or missing:
                 matches_to_remove.append(db_m.id)
+                removed_days.add(db_m.match_date)
+                live_removed.setdefault(db_m.match_date, []).append(db_m.id)
         
         if matches_to_remove:
-            session.execute(text("DELETE FROM daily_picks WHERE match_id IN :ids"), {"ids": tuple(matches_to_remove)})
-            session.execute(text("DELETE FROM daily_matches WHERE id IN :ids"), {"ids": tuple(matches_to_remove)})
+            # Прогнозы уходят вместе с вычетом их вклада из лидерборда
+            with run.stage("delete"):
+                daily_calculator.delete_match_picks(matches_to_remove, session)
+                session.execute(text("DELETE FROM daily_matches WHERE id IN :ids"), {"ids": tuple(matches_to_remove)})
+            run.count("matches_removed", len(matches_to_remove))
             
-        # 3. ПОДСЧЕТ ОЧКОВ (ЛОГИКА БЕЗ ORM)
-        # Сначала проставляем статус прогнозам
-        # is_correct = (predicted == winner)
-        session.execute(text("""
-            UPDATE daily_picks dp
-            SET is_correct = (dp.predicted_winner = dm.winner),
-                points = CASE WHEN dp.predicted_winner = dm.winner THEN 1 ELSE 0 END
-            FROM daily_matches dm
-            WHERE dp.match_id = dm.id
-              AND dm.status = 'COMPLETED'
-              AND dm.winner IS NOT NULL
-        """))
-
-        # 4. ПОЛНЫЙ ПЕРЕСЧЕТ ЛИДЕРБОРДА (ATOMIC)
-        session.execute(text("DELETE FROM daily_leaderboard"))
-        session.execute(text("""
-            INSERT INTO daily_leaderboard (user_id, total_points, correct_picks, total_picks)
-            SELECT user_id, COALESCE(SUM(points), 0), COUNT(CASE WHEN is_correct = true THEN 1 END), COUNT(*)
-            FROM daily_picks 
-            GROUP BY user_id
-        """))
+        # 3. ПОДСЧЕТ ОЧКОВ: только матчи с изменившимся результатом,
+        # дельты в daily_leaderboard (без полного пересчёта)
+        removed_set = set(matches_to_remove)
+        rescored = 0
+        with run.stage("rescore"):
+            for m_id in rescore_ids:
+                if m_id not in removed_set:
+                    rescored += daily_calculator.rescore_match(m_id, session)
+        if rescored:
+            logger.info(f"🎯 Daily rescore: {len(rescore_ids)} match(es), {rescored} pick(s)")
+        run.count("matches_rescored", len(rescore_ids))
+        run.count("picks_rescored", rescored)
             
-        session.commit()
+        with run.stage("commit"):
+            session.commit()
+
+        with run.stage("publish"):
+            # 4. СБРОС КЭША DAILY (только затронутые дни)
+            daily_cache.invalidate_days(changed_days)
+            daily_cache.invalidate_days(removed_days, drop_picks=True)
+
+            # 5. LIVE: только изменившиеся матчи, по дням
+            removed_ids = set(matches_to_remove)
+            for day in set(live_changed) | set(live_removed):
+                if day is None: continue
+                changed = [daily_cache.serialize_match(m) for m in live_changed.get(day, []) if m.id not in removed_ids]
+                live_hub.publish_day_update(day, changed, live_removed.get(day, []))
     except Exception as e:
         session.rollback()
         logger.error(f"Daily Sync DB Error: {e}")
+        return "error", f"Daily Sync DB Error: {e}"
     finally:
         session.close()
+    return "ok", None
 
 async def sync_daily_challenge(engine: Engine) -> None:
     loop = asyncio.get_running_loop()
@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from database.db import SessionLocal
+from database import models
+from utils.score_calculator import get_tournament_weights
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# РЕЕСТР ТУРНИРОВ (IN-PROCESS)
+# ==========================================
+# Все турниры грузятся из БД один раз и живут в памяти процесса.
+# Обновляется после каждого апсерта в _sync_tournaments_logic,
+# поэтому роутеры не ходят в таблицу tournaments на каждый запрос.
+
+ALL_ROUNDS = ("R128", "R64", "R32", "R16", "QF", "SF", "F", "Champion")
+
+# Не чаще одного перечитывания на "промах" (неизвестный ID) за этот интервал
+MISS_RELOAD_INTERVAL = 30
+
+
+@dataclass(frozen=True)
+class TournamentInfo:
+    id: int
+    name: str
+    dates: Optional[str]
+    status: str
+    sheet_name: Optional[str]
+    starting_round: Optional[str]
+    type: Optional[str]
+    start: Optional[str]
+    close: Optional[str]
+    tag: Optional[str]
+    surface: Optional[str]
+    defending_champion: Optional[str]
+    description: Optional[str]
+    matches_count: Optional[str]
+    month: Optional[str]
+    image_url: Optional[str]
+
+    # --- Предрасчитанное ---
+    rounds: Tuple[str, ...]
+    weights: Mapping[str, int]
+
+    def to_list_item(self) -> dict:
+        """Формат элемента для GET /tournaments."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "dates": self.dates,
+            "start": self.start,
+            "close": self.close,
+            "tag": self.tag,
+            "surface": self.surface,
+            "defending_champion": self.defending_champion,
+            "description": self.description,
+            "matches_count": self.matches_count,
+            "month": self.month,
+            "image_url": self.image_url
+        }
+
+
+# --- ХЕЛПЕРЫ (используются и синком) ---
+
+def status_to_str(status_val) -> str:
+    return str(status_val.value if hasattr(status_val, 'value') else status_val).upper()
+
+def get_rounds(starting_round: Optional[str]) -> Tuple[str, ...]:
+    start_round_clean = starting_round.strip() if starting_round else "R32"
+    try:
+        starting_index = ALL_ROUNDS.index(start_round_clean)
+    except ValueError:
+        starting_index = 2
+    return ALL_ROUNDS[starting_index:]
+
+def get_draw_size(starting_round: Optional[str], t_type: Optional[str], tag: Optional[str]) -> int:
+    s_round_clean = (starting_round or "").strip().upper()
+    if s_round_clean == "R128": return 128
+    if s_round_clean == "R64": return 64
+    if s_round_clean == "R32": return 32
+
+    t_type_lower = (t_type or "").lower()
+    if "1000" in t_type_lower: return 64
+    if "slam" in t_type_lower or "тбш" in (tag or "").lower(): return 128
+    return 32
+
+def _build_info(t: models.Tournament) -> TournamentInfo:
+    return TournamentInfo(
+        id=t.id,
+        name=t.name,
+        dates=t.dates,
+        status=status_to_str(t.status),
+        sheet_name=t.sheet_name,
+        starting_round=t.starting_round,
+        type=t.type,
+        start=t.start,
+        close=t.close,
+        tag=t.tag,
+        surface=t.surface,
+        defending_champion=t.defending_champion,
+        description=t.description,
+        matches_count=t.matches_count,
+        month=t.month,
+        image_url=t.image_url,
+        rounds=get_rounds(t.starting_round),
+        weights=MappingProxyType(dict(get_tournament_weights(t)))
+    )
+
+
+# --- СОСТОЯНИЕ ---
+_lock = threading.Lock()
+_by_id: Dict[int, TournamentInfo] = {}
+_ordered: Tuple[TournamentInfo, ...] = ()
+_list_payload: List[dict] = []
+_loaded = False
+_last_miss_reload = 0.0
+
+
+def refresh(db=None) -> None:
+    """
+    Перечитывает все турниры из БД и атомарно подменяет реестр.
+    """
+    global _by_id, _ordered, _list_payload, _loaded
+
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        rows = db.query(models.Tournament).order_by(models.Tournament.id.asc()).all()
+        infos = tuple(_build_info(t) for t in rows)
+    finally:
+        if own_session:
+            db.close()
+
+    with _lock:
+        _by_id = {info.id: info for info in infos}
+        _ordered = infos
+        _list_payload = [info.to_list_item() for info in infos]
+        _loaded = True
+    logger.info(f"🗂 Tournament registry loaded: {len(infos)}")
+
+def _ensure_loaded() -> None:
+    # Параллельная первая загрузка безвредна: побеждает последняя подмена
+    if not _loaded:
+        refresh()
+
+def get(tournament_id: int) -> Optional[TournamentInfo]:
+    global _last_miss_reload
+    _ensure_loaded()
+    info = _by_id.get(tournament_id)
+    if info is None:
+        # Турнир мог появиться в БД из другого процесса — перечитываем, но редко
+        now = time.time()
+        if now - _last_miss_reload > MISS_RELOAD_INTERVAL:
+            _last_miss_reload = now
+            try:
+                refresh()
+            except Exception as e:
+                logger.error(f"Tournament registry reload failed: {e}")
+            info = _by_id.get(tournament_id)
+    return info
+
+def all_tournaments() -> Tuple[TournamentInfo, ...]:
+    """Все турниры, отсортированные по id (старые -> новые)."""
+    _ensure_loaded()
+    return _ordered
+
+def list_payload() -> List[dict]:
+    """Готовый (уже сериализованный) ответ для GET /tournaments."""
+    _ensure_loaded()
+    return _list_payload
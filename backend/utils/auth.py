@@ -1,5 +1,5 @@
 import os
-from fastapi import Header, HTTPException, status
+from fastapi import Header, HTTPException, Query, status
 from init_data_py import InitData
 
 def verify_telegram_data(init_data_raw: str) -> dict:
@@ -33,15 +33,14 @@ def verify_telegram_data(init_data_raw: str) -> dict:
     except Exception:
         return None
 
-async def get_current_user(authorization: str = Header(default=None)):
-    if not authorization:
+def _user_from_init_data(init_data_raw: str, missing_detail: str) -> dict:
+    if not init_data_raw:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header missing",
+            detail=missing_detail,
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    init_data_raw = authorization
     user_data = verify_telegram_data(init_data_raw)
     if not user_data:
         raise HTTPException(
@@ -50,4 +49,13 @@ async def get_current_user(authorization: str = Header(default=None)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return user_data
\ No newline at end of file
+    return user_data
+
+async def get_current_user(authorization: str = Header(default=None)):
+    return _user_from_init_data(authorization, "Authorization header missing")
+
+async def get_current_user_from_query(auth: str = Query(default=None)):
+    """
+    То же по параметру ?auth=<initData>: EventSource не умеет слать заголовки.
+    """
+    return _user_from_init_data(auth, "auth query parameter missing")
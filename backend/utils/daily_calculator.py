@@ -1,85 +1,87 @@
 from sqlalchemy.orm import Session
-from database.models import DailyMatch, DailyPick, DailyLeaderboard
+from sqlalchemy import text
+from typing import Iterable, List
+from services import change_feed
 import logging
 
 logger = logging.getLogger(__name__)
 
-def process_match_results(match_id: str, db: Session):
+# ==========================================
+# DAILY: ЕДИНЫЙ СЕРВИС ПОДСЧЁТА ОЧКОВ
+# ==========================================
+# Все пути записи (API, бот, синк) идут через SQL-функции из миграции 0005:
+# они меняют прогнозы и сразу применяют дельты к строкам daily_leaderboard
+# затронутых юзеров — без глобального пересчёта.
+# Коммит — на вызывающей стороне (функции работают в её транзакции).
+
+def apply_pick(user_id: int, match_id: str, predicted_winner: int, db: Session) -> bool:
     """
-    1. Находит матч по ID.
-    2. Проверяет, завершен ли он.
-    3. Находит все прогнозы на этот матч, которые еще не посчитаны.
-    4. Начисляет баллы и обновляет общий Лидерборд.
+    Сохраняет прогноз юзера и, если матч уже сыгран, сразу его очки.
+    Возвращает True, если прогноз новый.
     """
-    # 1. Получаем матч
-    match = db.query(DailyMatch).filter(DailyMatch.id == match_id).first()
-    
-    if not match:
-        logger.warning(f"Match {match_id} not found during calculation")
-        return
-    
-    # Проверка: считаем только если матч реально завершен и есть победитель
-    if match.status != "COMPLETED" or match.winner is None:
-        return
-
-    # 2. Ищем прогнозы, которые еще НЕ имеют статуса (is_correct is None)
-    pending_picks = db.query(DailyPick).filter(
-        DailyPick.match_id == match_id,
-        DailyPick.is_correct.is_(None)
-    ).all()
+    return bool(db.execute(
+        text("SELECT daily_apply_pick(:uid, :mid, :pick)"),
+        {"uid": user_id, "mid": match_id, "pick": predicted_winner}
+    ).scalar())
 
-    if not pending_picks:
-        return # Нечего считать
-
-    logger.info(f"Calculating scores for Daily Match {match_id}. Picks: {len(pending_picks)}")
-
-    # === ОПТИМИЗАЦИЯ И ЗАЩИТА ОТ ДУБЛЕЙ ===
-    # Сначала загружаем существующие записи лидерборда для этих пользователей
-    user_ids = [p.user_id for p in pending_picks]
-    existing_lbs = db.query(DailyLeaderboard).filter(DailyLeaderboard.user_id.in_(user_ids)).all()
-    
-    # Создаем словарь для быстрого поиска: {user_id: объект_лидерборда}
-    lb_map = {lb.user_id: lb for lb in existing_lbs}
-
-    count_correct = 0
+def rescore_match(match_id: str, db: Session) -> int:
+    """
+    Результат матча поменялся (или откатился): пересчёт его прогнозов.
+    Возвращает число прогнозов, у которых изменился is_correct.
+    """
+    return db.execute(text("SELECT daily_rescore_match(:mid)"), {"mid": match_id}).scalar() or 0
 
-    for pick in pending_picks:
-        # 3. Сравнение
-        is_win = (pick.predicted_winner == match.winner)
-        
-        # Обновляем сам пик
-        pick.is_correct = is_win
-        pick.points = 1 if is_win else 0
-        
-        if is_win:
-            count_correct += 1
+def delete_match_picks(match_ids: Iterable[str], db: Session) -> int:
+    """Удаляет прогнозы на матчи и вычитает их вклад из лидерборда."""
+    match_ids = list(match_ids)
+    if not match_ids:
+        return 0
+    return db.execute(
+        text("SELECT daily_delete_match_picks(:mids)"), {"mids": match_ids}
+    ).scalar() or 0
 
-        # 4. Обновляем Лидерборд
-        # Проверяем, есть ли юзер в нашей "карте" (в БД или только что создан)
-        if pick.user_id in lb_map:
-            lb_entry = lb_map[pick.user_id]
-        else:
-            # Если нет - создаем нового
-            lb_entry = DailyLeaderboard(
-                user_id=pick.user_id,
-                total_points=0,
-                correct_picks=0,
-                total_picks=0
-            )
-            db.add(lb_entry)
-            # ВАЖНО: Добавляем в карту, чтобы если этот юзер встретится снова в этом цикле,
-            # мы не пытались создать его второй раз (это и вызывало ошибку!)
-            lb_map[pick.user_id] = lb_entry
-        
-        # Накидываем статистику
-        lb_entry.total_picks += 1
-        if is_win:
-            lb_entry.total_points += 1
-            lb_entry.correct_picks += 1
-            
+def process_match_results(match_id: str, db: Session):
+    """
+    Начисляет баллы за матч и обновляет лидерборд (дельтами).
+    """
     try:
+        changed = rescore_match(match_id, db)
         db.commit()
-        logger.info(f"Finished calculation for {match_id}. Correct: {count_correct}/{len(pending_picks)}")
+        if changed:
+            logger.info(f"Finished calculation for {match_id}. Picks rescored: {changed}")
     except Exception as e:
         logger.error(f"Error committing match results: {e}")
         db.rollback()
+
+def rescore_picks(match_ids: List[str], user_ids: List[int], db: Session) -> None:
+    """
+    Ремонт после правок в обход приложения (ручной SQL):
+    is_correct/points для прогнозов на эти матчи и строки daily_leaderboard
+    этих юзеров заново из daily_picks (старые значения неизвестны — дельты не посчитать).
+    """
+    if not match_ids and not user_ids:
+        return
+    change_feed.set_source(db, "rescore")
+    if match_ids:
+        db.execute(text("""
+            UPDATE daily_picks dp
+            SET is_correct = (dp.predicted_winner = dm.winner),
+                points = CASE WHEN dp.predicted_winner = dm.winner THEN 1 ELSE 0 END
+            FROM daily_matches dm
+            WHERE dp.match_id = dm.id
+              AND dm.id IN :mids
+              AND dm.status = 'COMPLETED'
+              AND dm.winner IS NOT NULL
+              AND dp.is_correct IS DISTINCT FROM (dp.predicted_winner = dm.winner)
+        """), {"mids": tuple(match_ids)})
+    if user_ids:
+        db.execute(text("DELETE FROM daily_leaderboard WHERE user_id IN :uids"), {"uids": tuple(user_ids)})
+        db.execute(text("""
+            INSERT INTO daily_leaderboard (user_id, total_points, correct_picks, total_picks)
+            SELECT user_id, COALESCE(SUM(points), 0), COUNT(CASE WHEN is_correct = true THEN 1 END), COUNT(*)
+            FROM daily_picks
+            WHERE user_id IN :uids
+            GROUP BY user_id
+        """), {"uids": tuple(user_ids)})
+    db.commit()
+    logger.info(f"Daily rescore: {len(match_ids)} match(es), {len(user_ids)} user(s)")
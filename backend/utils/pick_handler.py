@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from database import models
 from fastapi import HTTPException
+from services import tournament_registry, change_feed
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,12 +16,12 @@ def save_picks_bulk_transaction(picks_data: list, db: Session, user_id: int):
 
     # 1. Проверка турнира
     t_id = picks_data[0].tournament_id
-    tournament = db.query(models.Tournament).filter(models.Tournament.id == t_id).first()
+    tournament = tournament_registry.get(t_id)
     
     if not tournament:
         raise HTTPException(status_code=404, detail="Tournament not found")
         
-    status_str = str(tournament.status.value if hasattr(tournament.status, 'value') else tournament.status)
+    status_str = tournament.status
     
     # === GOD MODE: ТЕСТЕРЫ ===
     TESTERS = [1783228089, 1009165444, 360269274, 8148191986, 7679429681, 8348181797]
@@ -84,9 +85,12 @@ def save_picks_bulk_transaction(picks_data: list, db: Session, user_id: int):
                     predicted_winner=pick.predicted_winner
                 )
                 db.add(new_pick)
+                # Повтор того же матча в одном запросе -> UPDATE (unique_user_pick)
+                existing_map[key] = new_pick
                 inserts_count += 1
                 result_objs.append(new_pick)
 
+        change_feed.set_source(db, "api")
         db.commit()
         
         if updates_count > 0 or inserts_count > 0:
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from database import models
+from services import change_feed
 from datetime import datetime
 import re
 import logging
@@ -68,16 +69,26 @@ def calculate_score_for_user(user_picks, true_draws_map, weights):
 
     return score, correct
 
-def update_tournament_leaderboard(tournament_id: int, db: Session):
+def update_tournament_leaderboard(tournament_id: int, db: Session) -> list:
+    """
+    Полный пересчёт очков турнира.
+    Возвращает строки лидерборда, которые изменились (для live-канала).
+    """
     start_time = time.time()
     # logger.info(f"🚀 [T{tournament_id}] Calculating scores...")
     
     try:
-        # 1. Загружаем данные
-        tournament = db.query(models.Tournament).filter(models.Tournament.id == tournament_id).first()
-        if not tournament: return
-
-        weights = get_tournament_weights(tournament)
+        # 1. Загружаем данные: турнир — из реестра (веса уже посчитаны),
+        # из БД только если реестр его ещё не знает
+        from services import tournament_registry
+        info = tournament_registry.get(tournament_id)
+        if info is not None:
+            weights, status_str = info.weights, info.status
+        else:
+            tournament = db.query(models.Tournament).filter(models.Tournament.id == tournament_id).first()
+            if not tournament: return []
+            weights = get_tournament_weights(tournament)
+            status_str = str(tournament.status.value if hasattr(tournament.status, 'value') else tournament.status)
         true_draws = db.query(models.TrueDraw).filter_by(tournament_id=tournament_id).all()
         
         # === 🛡️ ПРЕДОХРАНИТЕЛЬ (SAFETY VALVE) ===
@@ -87,11 +98,9 @@ def update_tournament_leaderboard(tournament_id: int, db: Session):
         # Если победителей нет, А турнир уже идет (или завершен)
         # Значит, данные "сломались" или не загрузились.
         # МЫ ЗАПРЕЩАЕМ ОБНУЛЯТЬ ОЧКИ.
-        status_str = str(tournament.status.value if hasattr(tournament.status, 'value') else tournament.status)
-        
         if winners_count == 0 and status_str in ["ACTIVE", "COMPLETED", "CLOSED"]:
             logger.warning(f"⚠️ [T{tournament_id}] SAFETY STOP: No winners found in DB, but tournament is {status_str}. Skipping update to prevent zeroing scores.")
-            return
+            return []
         # ========================================
 
         true_draws_map = {(m.round, m.match_number): m for m in true_draws}
@@ -144,6 +153,19 @@ def update_tournament_leaderboard(tournament_id: int, db: Session):
                 "updated_at": now_time
             })
 
+        # Что поменялось относительно прошлого пересчёта
+        previous = {
+            row.user_id: (row.rank, row.score, row.correct_picks)
+            for row in db.query(models.Leaderboard.user_id, models.Leaderboard.rank,
+                                models.Leaderboard.score, models.Leaderboard.correct_picks)
+                         .filter(models.Leaderboard.tournament_id == tournament_id)
+        }
+        changed_rows = [
+            {"user_id": r["user_id"], "rank": r["rank"], "score": r["score"], "correct_picks": r["correct_picks"]}
+            for r in final_leaderboard_rows
+            if previous.get(r["user_id"]) != (r["rank"], r["score"], r["correct_picks"])
+        ]
+
         # 4. ЗАПИСЬ (Только если проверки пройдены)
         db.execute(text("DELETE FROM leaderboard WHERE tournament_id = :tid"), {"tid": tournament_id})
         if final_leaderboard_rows:
@@ -153,11 +175,15 @@ def update_tournament_leaderboard(tournament_id: int, db: Session):
         if user_score_updates:
             db.bulk_insert_mappings(models.UserScore, user_score_updates)
 
+        # Таблицы без триггеров: кэши лидербордов во всех воркерах сбросятся по событию
+        change_feed.notify_change(db, "leaderboard", tournament_id, "rescore")
         db.commit()
         
         elapsed = time.time() - start_time
         logger.info(f"✅ [T{tournament_id}] Updated {len(final_leaderboard_rows)} rows in {elapsed:.2f}s")
+        return changed_rows
 
     except Exception as e:
         logger.error(f"❌ Calculation Error: {e}")
-        db.rollback()
\ No newline at end of file
+        db.rollback()
+        return []
\ No newline at end of file
@@ -15,6 +15,17 @@ const waitForTelegram = async () => {
     return '';
 };
 
+const toDateStr = (d: Date) => {
+    const year = d.getFullYear();
+    const month = String(d.getMonth() + 1).padStart(2, '0');
+    const day = String(d.getDate()).padStart(2, '0');
+    return `${year}-${month}-${day}`;
+};
+
+// Интервал опроса: при живом SSE-канале опрос — только страховка
+const POLL_INTERVAL = 30000;
+const POLL_INTERVAL_WITH_LIVE = 120000;
+
 export function useDailyChallenge() {
   const [matches, setMatches] = useState<DailyMatch[]>([]);
   const [isLoading, setIsLoading] = useState(true);
@@ -22,6 +33,9 @@ export function useDailyChallenge() {
   const [dayStatus, setDayStatus] = useState<'PLANNED' | 'ACTIVE' | 'COMPLETED'>('PLANNED');
   const [selectedDate, setSelectedDate] = useState<Date>(new Date());
 
+  const [isLiveConnected, setIsLiveConnected] = useState(false);
+  const dateStr = toDateStr(selectedDate);
+
   const isFirstLoad = useRef(true);
   const debounceRefs = useRef<Record<string, NodeJS.Timeout>>({});
 
@@ -32,11 +46,6 @@ export function useDailyChallenge() {
 
       try {
           const initData = await waitForTelegram();
-          
-          const year = selectedDate.getFullYear();
-          const month = String(selectedDate.getMonth() + 1).padStart(2, '0');
-          const day = String(selectedDate.getDate()).padStart(2, '0');
-          const dateStr = `${year}-${month}-${day}`;
 
           // === АНТИ-КЭШ ХАК ===
           // Добавляем timestamp, чтобы браузер не отдавал старую версию
@@ -59,32 +68,100 @@ export function useDailyChallenge() {
           const data: DailyMatch[] = await res.json();
           setMatches(data);
 
-          const hasLive = data.some(m => m.status === 'LIVE');
-          const allFinished = data.length > 0 && data.every(m => m.status === 'COMPLETED');
-          
-          if (hasLive) setDayStatus('ACTIVE');
-          else if (allFinished) setDayStatus('COMPLETED');
-          else setDayStatus('PLANNED');
-
       } catch (e) {
           console.error(e);
       } finally {
           setIsLoading(false);
           isFirstLoad.current = false;
       }
-  }, [selectedDate]);
+  }, [dateStr]);
+
+  // Статус дня считаем от текущего списка (после опроса и после live-событий)
+  useEffect(() => {
+      const hasLive = matches.some(m => m.status === 'LIVE');
+      const allFinished = matches.length > 0 && matches.every(m => m.status === 'COMPLETED');
+
+      if (hasLive) setDayStatus('ACTIVE');
+      else if (allFinished) setDayStatus('COMPLETED');
+      else setDayStatus('PLANNED');
+  }, [matches]);
 
   useEffect(() => {
       isFirstLoad.current = true;
       fetchMatches();
-      
-      // Обновляем данные каждые 30 секунд, чтобы ловить LIVE статусы
+  }, [fetchMatches]);
+
+  // Опрос как страховка: редкий, если live-канал подключен
+  useEffect(() => {
       const intervalId = setInterval(() => {
           fetchMatches();
-      }, 30000);
-      
+      }, isLiveConnected ? POLL_INTERVAL_WITH_LIVE : POLL_INTERVAL);
+
       return () => clearInterval(intervalId);
-  }, [fetchMatches]);
+  }, [fetchMatches, isLiveConnected]);
+
+  // === LIVE (SSE) ===
+  // Сервер присылает только изменившиеся матчи дня (счёт, статус, победитель)
+  useEffect(() => {
+      if (typeof window === 'undefined' || !('EventSource' in window)) return;
+
+      let source: EventSource | null = null;
+      let cancelled = false;
+
+      const connect = async () => {
+          // EventSource не шлёт заголовки — initData идёт параметром
+          const initData = await waitForTelegram();
+          if (cancelled || !initData) return;
+
+          source = new EventSource(`/api/live/stream?day=${dateStr}&auth=${encodeURIComponent(initData)}`);
+          source.onopen = () => setIsLiveConnected(true);
+          source.onerror = () => setIsLiveConnected(false);
+
+          source.addEventListener('matches', (event) => {
+              const { matches: changed } = JSON.parse((event as MessageEvent).data) as { matches: DailyMatch[] };
+              setMatches(prev => {
+                  const isGod = prev.some(m => m.is_god);
+                  const changedMap = new Map(changed.map(m => [m.id, m]));
+                  const merged = prev.map(m => {
+                      const upd = changedMap.get(m.id);
+                      if (!upd) return m;
+                      changedMap.delete(m.id);
+                      // my_pick приходит только из персонального запроса — сохраняем свой;
+                      // подменённый статус (god mode) тоже не трогаем, иначе кнопки погаснут
+                      return {
+                          ...m,
+                          ...upd,
+                          my_pick: m.my_pick,
+                          is_god: m.is_god,
+                          status: m.is_god ? m.status : upd.status,
+                      };
+                  });
+                  const added = Array.from(changedMap.values()).map(m => ({
+                      ...m,
+                      my_pick: null,
+                      is_god: isGod,
+                      status: isGod ? 'PLANNED' as const : m.status,
+                  }));
+                  if (added.length === 0) return merged;
+                  return [...merged, ...added].sort((a, b) => a.start_time.localeCompare(b.start_time));
+              });
+          });
+
+          source.addEventListener('removed', (event) => {
+              const { ids } = JSON.parse((event as MessageEvent).data) as { ids: { id: string }[] };
+              const removed = new Set(ids.map(i => i.id));
+              setMatches(prev => prev.filter(m => !removed.has(m.id)));
+          });
+      };
+
+      connect();
+
+      return () => {
+          cancelled = true;
+          source?.close();
+          setIsLiveConnected(false);
+      };
+  }, [dateStr]);
 
   const makePick = useCallback(async (matchId: string, winner: 1 | 2) => {
       impact('medium');
@@ -161,5 +161,6 @@ export interface DailyMatch {
   player2: string;
   score?: string;         // "6-4, 2-1"
   winner?: 1 | 2;         // 1 или 2
-  my_pick?: 1 | 2;        // Выбор юзера (если есть)
+  my_pick?: 1 | 2 | null; // Выбор юзера (если есть)
+  is_god?: boolean;       // status подменён сервером (god mode) — live его не трогает
 }
\ No newline at end of file
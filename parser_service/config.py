@@ -9,6 +9,10 @@ TENNIS_API_KEY = os.getenv("TENNIS_API_KEY")
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
 GOOGLE_CREDENTIALS = os.getenv("GOOGLE_CREDENTIALS")
 
+# Прямая запись матчей в daily_matches (помимо таблицы)
+DAILY_DIRECT_INGEST = os.getenv("DAILY_DIRECT_INGEST", "").lower() in ("1", "true", "yes")
+DATABASE_URL = os.getenv("DATABASE_URL")
+
 # Проверяем, что ключи на месте
 if not TENNIS_API_KEY:
     print("WARNING: TENNIS_API_KEY is missing!")
@@ -17,4 +21,7 @@ if not GOOGLE_SHEET_ID:
     print("WARNING: GOOGLE_SHEET_ID is missing!")
     
 if not GOOGLE_CREDENTIALS:
-    print("WARNING: GOOGLE_CREDENTIALS is missing!")
\ No newline at end of file
+    print("WARNING: GOOGLE_CREDENTIALS is missing!")
+
+if DAILY_DIRECT_INGEST and not DATABASE_URL:
+    print("WARNING: DAILY_DIRECT_INGEST is on, but DATABASE_URL is missing!")
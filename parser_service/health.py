@@ -0,0 +1,103 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# HEALTH / METRICS КОНТЕЙНЕРА ПАРСЕРА
+# ==========================================
+# GET /health  — 200, если последний цикл был недавно (иначе 503: цикл завис/падает)
+# GET /metrics — текстовый формат Prometheus: длительности стадий, счётчики циклов
+
+# Цикл считается зависшим, если успешного не было дольше STALE_FACTOR интервалов
+STALE_FACTOR = 3
+
+_lock = threading.Lock()
+_state: Dict[str, float] = {
+    "started_at": time.time(),
+    "cycles_total": 0,
+    "cycle_errors_total": 0,
+    "overruns_total": 0,
+    "last_success_at": 0.0,
+    "last_cycle_seconds": 0.0,
+    "interval_seconds": 0.0,
+}
+_last_stats: Dict[str, float] = {}
+
+# Ошибки, которые update_google_sheet_from_api ловит сам и возвращает в stats
+ERROR_KEYS = ("fetch_errors", "sheet_errors", "ingest_errors")
+
+
+def cycle_failed(stats: Optional[Dict[str, float]]) -> bool:
+    """Упал с исключением (stats=None), не получил данных API или не записал их."""
+    return stats is None or any(stats.get(key) for key in ERROR_KEYS)
+
+def record_cycle(duration: float, stats: Optional[Dict[str, float]], interval: float, overrun: bool) -> None:
+    with _lock:
+        _state["cycles_total"] += 1
+        _state["last_cycle_seconds"] = duration
+        _state["interval_seconds"] = interval
+        if overrun: _state["overruns_total"] += 1
+        if cycle_failed(stats):
+            _state["cycle_errors_total"] += 1
+        else:
+            _state["last_success_at"] = time.time()
+        if stats is not None:
+            _last_stats.clear()
+            _last_stats.update(stats)
+
+def is_healthy() -> bool:
+    with _lock:
+        interval = _state["interval_seconds"] or 120
+        last = _state["last_success_at"] or _state["started_at"]
+    return time.time() - last < STALE_FACTOR * interval + 60
+
+def render_metrics() -> str:
+    with _lock:
+        state, stats = dict(_state), dict(_last_stats)
+    lines = [
+        f"parser_cycles_total {state['cycles_total']}",
+        f"parser_cycle_errors_total {state['cycle_errors_total']}",
+        f"parser_cycle_overruns_total {state['overruns_total']}",
+        f"parser_cycle_seconds {state['last_cycle_seconds']:.3f}",
+        f"parser_interval_seconds {state['interval_seconds']:.0f}",
+        f"parser_last_success_timestamp {state['last_success_at']:.0f}",
+    ]
+    for stage in ("fetch", "process", "ingest", "sheet"):
+        lines.append(f'parser_stage_seconds{{stage="{stage}"}} {stats.get(stage, 0.0):.3f}')
+    for key in ("matches", "live", "changed", "written") + ERROR_KEYS:
+        lines.append(f"parser_last_{key} {stats.get(key, 0)}")
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/health":
+            healthy = is_healthy()
+            body = json.dumps({"ok": healthy}).encode("utf-8")
+            self._reply(200 if healthy else 503, "application/json", body)
+        elif self.path == "/metrics":
+            self._reply(200, "text/plain; version=0.0.4", render_metrics().encode("utf-8"))
+        else:
+            self._reply(404, "text/plain", b"not found")
+
+    def _reply(self, code: int, content_type: str, body: bytes):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        # Пробы дёргают каждые несколько секунд — не засоряем лог
+        pass
+
+
+def start(port: int) -> None:
+    server = ThreadingHTTPServer(("0.0.0.0", port), _Handler)
+    threading.Thread(target=server.serve_forever, name="health", daemon=True).start()
+    logger.info(f"🩺 Health/metrics on :{port} (/health, /metrics)")
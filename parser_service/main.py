@@ -1,10 +1,13 @@
-import time
-import schedule
 import logging
+import os
+import signal
 import sys
+import threading
+import time
 
 # Импортируем нашу функцию обновления
 from tennis_service import update_google_sheet_from_api, load_dictionary_from_sheets
+import health
 
 # Настройка логов
 logging.basicConfig(
@@ -14,34 +17,80 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def job():
+# ==========================================
+# ЦИКЛ ПАРСЕРА
+# ==========================================
+# Следующий цикл планируется от конца предыдущего, поэтому циклы не
+# накладываются и не копятся: затянувшийся цикл просто сдвигает следующий.
+# Интервал адаптивный: есть LIVE-матчи — чаще, нет — реже.
+LIVE_INTERVAL = int(os.getenv("PARSER_LIVE_INTERVAL", "30"))
+IDLE_INTERVAL = int(os.getenv("PARSER_IDLE_INTERVAL", "120"))
+ERROR_INTERVAL = 60
+DICTIONARY_INTERVAL = 3600
+METRICS_PORT = int(os.getenv("PARSER_METRICS_PORT", "8080"))
+
+_stop = threading.Event()
+
+
+def job(interval: float) -> float:
+    """Один цикл синка. Возвращает паузу до следующего."""
     logger.info("⏳ Starting scheduled update...")
+    started = time.perf_counter()
     try:
-        update_google_sheet_from_api()
-        logger.info("✅ Update finished successfully.")
+        stats = update_google_sheet_from_api()
     except Exception as e:
         logger.error(f"❌ Error during update: {e}")
+        stats = None
+    duration = time.perf_counter() - started
+
+    failed = health.cycle_failed(stats)
+    if failed:
+        next_interval = ERROR_INTERVAL
+    else:
+        next_interval = LIVE_INTERVAL if stats["live"] else IDLE_INTERVAL
+    if stats is not None:
+        errors = ", ".join(f"{key}={stats[key]}" for key in health.ERROR_KEYS if stats.get(key))
+        (logger.warning if failed else logger.info)(
+            f"{'⚠️ Update failed' if failed else '✅ Update finished'} in {duration:.1f}s "
+            f"(fetch {stats['fetch']:.1f}s, process {stats['process']:.2f}s, ingest {stats['ingest']:.1f}s, "
+            f"sheet {stats['sheet']:.1f}s; "
+            f"live: {stats['live']}{'; ' + errors if errors else ''}) -> next in {next_interval}s"
+        )
+
+    overrun = duration > interval
+    if overrun:
+        logger.warning(f"🐢 Cycle took {duration:.1f}s, longer than interval {interval}s")
+    health.record_cycle(duration, stats, next_interval, overrun)
+    return next_interval
+
+def _shutdown(signum, frame):
+    logger.info("🛑 Stopping parser...")
+    _stop.set()
+
 
 if __name__ == "__main__":
     logger.info("🚀 Starting Tennis Parser Service...")
-    
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+    health.start(METRICS_PORT)
+
     # 1. Загружаем словарь имен при старте
     try:
         load_dictionary_from_sheets()
     except Exception as e:
         logger.error(f"Initial dictionary load failed: {e}")
+    dictionary_loaded_at = time.monotonic()
 
-    # 2. Делаем первый прогон сразу при запуске
-    job()
-
-    # 3. Настраиваем расписание
-    # Обновлять матчи каждые 2 минуты
-    schedule.every(2).minutes.do(job)
-    
-    # Обновлять словарь имен раз в час
-    schedule.every(1).hours.do(load_dictionary_from_sheets)
+    # 2. Вечный цикл: первый прогон сразу, дальше — по адаптивному интервалу
+    interval = IDLE_INTERVAL
+    while not _stop.is_set():
+        # Словарь имен — раз в час, между циклами
+        if time.monotonic() - dictionary_loaded_at >= DICTIONARY_INTERVAL:
+            try:
+                load_dictionary_from_sheets()
+            except Exception as e:
+                logger.error(f"Dictionary reload failed: {e}")
+            dictionary_loaded_at = time.monotonic()
 
-    # 4. Вечный цикл
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+        interval = job(interval)
+        _stop.wait(interval)
@@ -0,0 +1,17 @@
+"""
+Общий парсер матчей (Tennis API -> лист DAILY_MATCHES).
+
+Используется и parser_service (синк по расписанию), и бэкендом (ручной /sync).
+Модули:
+    core              — чистое преобразование событий API в строки матчей
+    tennis_api        — async-клиент API
+    fixture_cache     — кэш расписания по дням
+    daily_sheet_writer, google_client — запись в Google Sheets
+    service           — синк целиком (configure / load_dictionary_from_sheets / update_google_sheet_from_api)
+    fake_api, bench   — офлайн-прогоны на записанных фикстурах
+    tests             — pytest для core, fixture_cache, daily_sheet_writer
+                        (python -m pytest tennis_parser из корня репо)
+
+Пакет лежит в корне репозитория: образы собираются из корня
+(docker build -f backend/Dockerfile .), локально — PYTHONPATH=<корень репо>.
+"""
@@ -0,0 +1,66 @@
+"""
+Бенчмарк process_matches на записанном дампе полного дня.
+
+Записать дамп с боевого API:
+    PYTHONPATH=. TENNIS_API_RECORD_DIR=fixtures python parser_service/main.py
+
+Прогнать (все get_fixtures_*.json + get_livescore.json из папки — как за один цикл):
+    python -m tennis_parser.bench --dir fixtures --repeat 50
+
+"cold" — кэш решений по турнирам сбрасывается перед каждым прогоном (первый цикл
+после рестарта), "warm" — как в установившемся режиме.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+
+from tennis_parser import core
+from tennis_parser.tennis_api import fixture_name
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger(__name__)
+
+
+def load_events(fixtures_dir: str) -> list:
+    events = []
+    paths = sorted(glob.glob(os.path.join(fixtures_dir, "get_fixtures_*.json")))
+    live_path = os.path.join(fixtures_dir, fixture_name({"method": "get_livescore"}))
+    if os.path.exists(live_path): paths.append(live_path)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        events.extend((data.get("result") or []) if isinstance(data, dict) else data)
+    return events
+
+def run(events: list, repeat: int, cold: bool) -> list:
+    timings = []
+    for _ in range(repeat):
+        if cold: core._tournament_decisions.clear()
+        started = time.perf_counter()
+        core.process_matches(events)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="process_matches benchmark")
+    parser.add_argument("--dir", default="fixtures", help="папка с записанными ответами API")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    events = load_events(args.dir)
+    if not events:
+        raise SystemExit(f"No recorded events in {args.dir}")
+    accepted = len(core.process_matches(events))
+    logger.info(f"📦 {len(events)} events, {accepted} accepted, {len(core._tournament_decisions)} tournament decisions")
+
+    for label, cold in (("cold", True), ("warm", False)):
+        t = run(events, args.repeat, cold)
+        p50 = t[len(t) // 2]
+        logger.info(
+            f"⏱️ {label}: p50={p50 * 1000:.2f}ms min={t[0] * 1000:.2f}ms max={t[-1] * 1000:.2f}ms "
+            f"({len(events) / p50:,.0f} events/s)"
+        )
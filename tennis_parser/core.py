@@ -0,0 +1,214 @@
+import hashlib
+import json
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+# ==========================================
+# ЧИСТОЕ ЯДРО ПАРСЕРА
+# ==========================================
+# События API -> нормализованные строки матчей. Без сети, таблиц и глобального
+# состояния (кроме кэша решений по турнирам), поэтому гоняется офлайн:
+# бенчмарк (python -m tennis_parser.bench) и прогоны на записанных фикстурах.
+
+# Матчи раньше этой даты не синкаются
+LIMIT_DATE = date(2026, 1, 17)
+
+ROUND_MAP = {
+    "1/32-finals": "R64", "1/16-finals": "R32", "1/8-finals": "R16",
+    "Quarter-finals": "QF", "Semi-finals": "SF", "Final": "F",
+    "Qualification": "Q", "Preliminary": "Q"
+}
+
+# Типы, которые мы игнорируем
+INVALID_TYPES = ["Doubles", "Challenger", "ITF", "Boys", "Girls", "Juniors"]
+
+# Турниры, которые мы игнорируем (Командные)
+EXCLUDED_TOURNAMENTS = ["davis cup", "billie jean king cup", "world group"]
+
+# Матчеры фильтров компилируются один раз (списки выше — источник правды)
+_EXCLUDED_RE = re.compile("|".join(map(re.escape, EXCLUDED_TOURNAMENTS)))
+_INVALID_RE = re.compile("|".join(map(re.escape, INVALID_TYPES)))
+_SINGLES_RE = re.compile("Singles|United Cup")
+_MAJOR_RE = re.compile("Atp|Wta|Open|Slam|Cup")
+_QUAL_ROUND_RE = re.compile("qual|prelim")
+_CANCELLED_RE = re.compile("can|int|walk|w/o")
+_COMPLETED_RE = re.compile("fin|aft|ret")
+_LIVE_RE = re.compile("live|set|game")
+
+# Решения по турнирам: (tournament_key, название, тип) -> t_clean или None (отбросить).
+# Матчей в дне сотни, турниров — десятки: классификация считается раз на турнир.
+_tournament_decisions: Dict[tuple, Optional[str]] = {}
+TOURNAMENT_MEMO_MAX = 5000
+
+
+# === СЛОВАРЬ ИМЁН ===
+def parse_dictionary(rows: List[list]) -> Dict[str, str]:
+    """Строки листа DICTIONARY -> {имя в нижнем регистре: "флаг Имя"}."""
+    new_dict = {}
+    for row in rows[1:]:
+        if len(row) <= 9: continue
+
+        full_eng = row[0].strip()
+        short_eng = row[3].strip()
+        flag = row[5].strip()
+        rus_name = row[9].strip()
+
+        if rus_name:
+            final_str = f"{flag} {rus_name}".strip()
+            if full_eng: new_dict[full_eng.lower()] = final_str
+            if short_eng: new_dict[short_eng.lower()] = final_str
+    return new_dict
+
+def dictionary_version(player_dict: Dict[str, str]) -> str:
+    # Обработанные строки в fixture_cache валидны только для этой версии
+    return hashlib.md5(json.dumps(sorted(player_dict.items()), ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+
+
+# === РУЧНЫЕ БЛОКИ (колонка J DAILY_MATCHES) ===
+def sheet_overlay(rows: List[list]) -> Dict[str, str]:
+    """{match_id: "M"/"X"} — матчи, помеченные вручную."""
+    overlay = {}
+    for row in rows[1:]:
+        if len(row) < 10: continue
+        flag = str(row[9]).strip().upper()
+        m_id = str(row[0]).strip()
+        if m_id and flag in ("M", "X"):
+            overlay[m_id] = flag
+    return overlay
+
+
+# === ДАТЫ СИНКА ===
+def sync_dates(now: Optional[datetime] = None) -> List[str]:
+    """Окно синка: позавчера..завтра, не раньше LIMIT_DATE."""
+    now = now or datetime.now()
+    days = [(now + timedelta(days=offset)).date() for offset in (-2, -1, 0, 1)]
+    return [d.strftime("%Y-%m-%d") for d in days if d >= LIMIT_DATE]
+
+
+# === ХЕЛПЕРЫ ===
+def translate(name: str, player_dict: Dict[str, str]) -> str:
+    if not name: return "TBD"
+    return player_dict.get(name.strip().lower(), name.strip())
+
+def clean_round(raw: str) -> str:
+    if not raw: return ""
+    temp = raw.split(" - ")[-1].strip()
+    return ROUND_MAP.get(temp, temp) if temp in ROUND_MAP else temp
+
+def format_set_score(val):
+    if val is None: return ""
+    v_str = str(val).strip()
+    if "." in v_str:
+        parts = v_str.split(".")
+        if len(parts) > 1 and parts[1] != "0": return f"{parts[0]}({parts[1]})"
+        return parts[0]
+    return v_str
+
+def build_score(match):
+    sets = []
+    scores_arr = match.get("scores", [])
+    if scores_arr:
+        for s in scores_arr:
+            s1 = format_set_score(s.get("score_first"))
+            s2 = format_set_score(s.get("score_second"))
+            if s1 and s2: sets.append(f"{s1}-{s2}")
+    if not sets:
+        txt = match.get("event_live_result") or match.get("event_final_result")
+        if txt and txt not in ["2 - 0", "2 - 1", "0 - 2", "1 - 2"]:
+            parts = txt.replace(" - ", "-").split(" ")
+            for p in parts:
+                if "-" in p:
+                    sub = p.split("-")
+                    if len(sub) == 2:
+                        sp1 = format_set_score(sub[0])
+                        sp2 = format_set_score(sub[1])
+                        sets.append(f"{sp1}-{sp2}")
+    res = ", ".join(sets)
+    game = str(match.get("event_game_result", ""))
+    if game and game not in ["-", "None"]:
+        clean_game = game.replace(" - ", ":").replace("-", ":").replace(" : ", ":")
+        res += f" ({clean_game})"
+    return res
+
+def classify_tournament(tournament_key, tournament_name, event_type):
+    """Очищенное название турнира или None, если турнир не наш (мемоизировано)."""
+    memo_key = (tournament_key, tournament_name, event_type)
+    if memo_key in _tournament_decisions:
+        return _tournament_decisions[memo_key]
+
+    decision = None
+    etype_title = str(event_type).title()
+    # Командные (Davis Cup и т.п.) — по названию и по типу
+    if _EXCLUDED_RE.search(str(tournament_name).lower()) or _EXCLUDED_RE.search(str(event_type).lower()):
+        pass
+    # Challenger, ITF, юниоры, пары
+    elif _INVALID_RE.search(etype_title):
+        pass
+    # Только одиночки мейджор-туров
+    elif _SINGLES_RE.search(etype_title) and _MAJOR_RE.search(etype_title):
+        decision = (tournament_name or "").replace(" Singles", "").strip()
+        if "Wta" in etype_title and "WTA" not in decision: decision = f"WTA {decision}"
+        elif "Atp" in etype_title and "ATP" not in decision: decision = f"ATP {decision}"
+
+    if len(_tournament_decisions) >= TOURNAMENT_MEMO_MAX:
+        _tournament_decisions.clear()
+    _tournament_decisions[memo_key] = decision
+    return decision
+
+def process_matches(matches, player_dict=None):
+    """События API -> строки DAILY_MATCHES [id, турнир, статус, раунд, время, p1, p2, счёт, победитель]."""
+    player_dict = player_dict or {}
+    processed = []
+    seen = set()
+    for m in matches:
+        m_id = str(m.get("event_key"))
+
+        # 1. Дешёвые отсевы по полям самого матча — до классификации и сборки строки
+        if m_id in seen: continue
+        if str(m.get("event_qualification", "")).lower() in ("true", "1"): continue
+        if _QUAL_ROUND_RE.search(str(m.get("tournament_round", "")).lower()): continue
+
+        # 2. Турнир (командные, ITF, не одиночки) — решение из кэша
+        t_clean = classify_tournament(m.get("tournament_key"), m.get("tournament_name", ""), m.get("event_type_type", ""))
+        if t_clean is None: continue
+
+        # 3. Парный разряд (имя с палкой)
+        p1_raw = m.get("event_first_player", "")
+        if "/" in p1_raw: continue
+
+        seen.add(m_id)
+
+        st_raw = str(m.get("event_status", "")).lower()
+        status = "PLANNED"
+        is_api_live = str(m.get("event_live", "0")) == "1"
+
+        if _CANCELLED_RE.search(st_raw): status = "CANCELLED"
+        elif _COMPLETED_RE.search(st_raw): status = "COMPLETED"
+        elif is_api_live or _LIVE_RE.search(st_raw): status = "LIVE"
+
+        score_str = build_score(m)
+        
+        # Детектор лайва
+        if status == "PLANNED" and score_str:
+            has_digits = any(c.isdigit() for c in score_str)
+            is_not_zero = score_str.strip() != "0-0"
+            if has_digits and is_not_zero:
+                status = "LIVE"
+
+        winner = None
+        if status == "COMPLETED":
+            w = m.get("event_winner", "")
+            if "First" in w or "Home" in w: winner = 1
+            elif "Second" in w or "Away" in w: winner = 2
+
+        d_part = m.get("event_date", "")
+        t_part = m.get("event_time", "")
+        time_str = f"{d_part} {t_part}"
+        try:
+            dt = datetime.strptime(f"{d_part} {t_part}", "%Y-%m-%d %H:%M")
+            time_str = dt.strftime("%d.%m.%Y %H:%M")
+        except: pass
+
+        processed.append([m_id, t_clean, status, clean_round(m.get("tournament_round")), time_str, translate(p1_raw, player_dict), translate(m.get("event_second_player"), player_dict), score_str, winner])
+    return processed
@@ -0,0 +1,114 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+
+from gspread.utils import rowcol_to_a1
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# DIFF-ЗАПИСЬ DAILY_MATCHES
+# ==========================================
+# Вместо перезаписи всей таблицы A1:J — только изменившиеся ячейки
+# (одним batch_update), удаление строк "Safe Clean" и дозапись новых матчей в конец.
+#
+# Колонка J (Manual Block) не пишется никогда: её ставит бот (/block, /manual),
+# и полная перезапись затирала его правку, сделанную между чтением и записью.
+# Семантика как раньше:
+#   M — строка не трогается вовсе, данные API по матчу игнорируются
+#   X — данные обновляются, матч остаётся заблокированным (его удаляет синк бэкенда)
+
+HEADER = ["ID", "Tournament", "Status", "Round", "Time", "Player 1", "Player 2", "Score", "Winner", "Manual Block"]
+DATA_COLS = 9  # A..I
+
+
+def _cell(value):
+    # Значения пишутся как есть (победитель — числом), None -> пустая ячейка
+    return "" if value is None else value
+
+def _row_date(row: list) -> str:
+    try:
+        return datetime.strptime(row[4].strip(), "%d.%m.%Y %H:%M").strftime("%Y-%m-%d")
+    except (ValueError, IndexError):
+        return ""
+
+def _sort_key(row: list):
+    try: return datetime.strptime(row[4], "%d.%m.%Y %H:%M")
+    except (ValueError, IndexError, TypeError): return datetime.min
+
+
+def plan(existing_data: List[list], api_map: Dict[str, list], dates_with_data: Set[str]):
+    """
+    Чистая функция: что поменять в таблице.
+    Возвращает (updates [(a1_range, [[...]])], удаляемые номера строк, новые строки).
+    Номера строк — в исходной таблице (1 = заголовок).
+    """
+    pending = dict(api_map)
+    updates: List[Tuple[str, List[list]]] = []
+    deletes: List[int] = []
+
+    for idx, row in enumerate(existing_data[1:], start=2):
+        row = row + [""] * (len(HEADER) - len(row))
+        m_id = str(row[0]).strip()
+        manual_block = str(row[9]).strip().upper()
+
+        if manual_block == "M":
+            pending.pop(m_id, None)
+            continue
+
+        if m_id in pending:
+            new_values = [_cell(v) for v in pending.pop(m_id)[:DATA_COLS]]
+            # Таблица отдаёт всё строками — сравниваем в строковом виде
+            differs = [str(new_values[c]) != row[c] for c in range(DATA_COLS)]
+            # Подряд идущие изменившиеся ячейки — одним диапазоном
+            col = 0
+            while col < DATA_COLS:
+                if not differs[col]:
+                    col += 1
+                    continue
+                start = col
+                while col < DATA_COLS and differs[col]:
+                    col += 1
+                updates.append((f"{rowcol_to_a1(idx, start + 1)}:{rowcol_to_a1(idx, col)}", [new_values[start:col]]))
+        elif _row_date(row) in dates_with_data:
+            # Матча нет в API за день, который API отдало целиком (или это дубль ID)
+            logger.info(f"🗑️ Safe Clean: {m_id} on {_row_date(row)}")
+            deletes.append(idx)
+
+    appends = sorted(([_cell(v) for v in data[:DATA_COLS]] + [""] for data in pending.values()), key=_sort_key)
+    return updates, deletes, appends
+
+
+def _delete_requests(sheet_id: int, rows: List[int]) -> List[dict]:
+    # Снизу вверх и слитными блоками: номера строк выше не сдвигаются
+    requests = []
+    for row in sorted(rows, reverse=True):
+        if requests and requests[-1]["deleteDimension"]["range"]["startIndex"] == row:
+            requests[-1]["deleteDimension"]["range"]["startIndex"] = row - 1
+            continue
+        requests.append({"deleteDimension": {"range": {
+            "sheetId": sheet_id, "dimension": "ROWS", "startIndex": row - 1, "endIndex": row
+        }}})
+    return requests
+
+
+def write(ws, existing_data: List[list], api_map: Dict[str, list], dates_with_data: Set[str]) -> Tuple[int, int, int]:
+    """
+    Применяет diff к листу. Порядок: ячейки (по исходным номерам строк),
+    потом удаление строк снизу вверх, потом дозапись.
+    Возвращает (обновлено диапазонов, удалено строк, добавлено строк).
+    """
+    if not existing_data:
+        ws.update(range_name="A1:J1", values=[HEADER])
+        existing_data = [HEADER]
+
+    updates, deletes, appends = plan(existing_data, api_map, dates_with_data)
+
+    if updates:
+        ws.batch_update([{"range": rng, "values": values} for rng, values in updates])
+    if deletes:
+        ws.spreadsheet.batch_update({"requests": _delete_requests(ws.id, deletes)})
+    if appends:
+        ws.append_rows(appends, table_range="A1:J1")
+
+    return len(updates), len(deletes), len(appends)
@@ -0,0 +1,178 @@
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import psycopg2
+    from psycopg2.extras import execute_values
+except ImportError:  # режим прямой записи нужен не везде
+    psycopg2 = None
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# ПРЯМАЯ ЗАПИСЬ МАТЧЕЙ В daily_matches
+# ==========================================
+# Опциональный режим (DAILY_DIRECT_INGEST=1 + DATABASE_URL): обработанные строки
+# идут в Postgres сразу, без круга "таблица -> 2-минутный синк бэкенда".
+# Таблица остаётся слоем ручных правок и читается как overlay:
+#   M — матч ведётся вручную: парсер его не трогает (значения из таблицы кладёт синк бэкенда)
+#   X — матч исключён: парсер удаляет его из БД вместе с прогнозами
+#
+# Одна транзакция на цикл: upsert (пишутся только реально изменившиеся строки),
+# удаление пропавших из API матчей за дни, которые API отдало целиком,
+# пересчёт прогнозов по матчам со сменой результата (daily_rescore_match),
+# live-события в канал SSE бэкенда. Источник записи — 'sync', как у синка бэкенда:
+# change-feed сбрасывает кэши daily, а пересчёт не дублируется.
+
+LIVE_CHANNEL = "live_updates"  # = services/live_hub.CHANNEL
+MAX_PAYLOAD = 7000
+
+_database_url: Optional[str] = None
+_conn = None
+
+
+UPSERT_SQL = """
+WITH incoming (id, tournament, status, round, start_time, match_date, player1, player2, score, winner) AS (
+    VALUES %s
+), old AS (
+    -- Без FOR UPDATE: строки, которые меняет up в этой же команде, он бы пропустил
+    -- (old оказался бы пустым). Снимок команды общий — old видит значения до up.
+    SELECT d.id, d.status, d.winner, d.match_date
+    FROM daily_matches d JOIN incoming i ON i.id = d.id
+), up AS (
+    INSERT INTO daily_matches AS d (id, tournament, status, round, start_time, match_date, player1, player2, score, winner)
+    SELECT id, tournament, status, round, start_time::timestamp, match_date::date, player1, player2, score, winner::int
+    FROM incoming
+    ON CONFLICT (id) DO UPDATE SET
+        tournament = EXCLUDED.tournament, status = EXCLUDED.status, round = EXCLUDED.round,
+        start_time = EXCLUDED.start_time, match_date = EXCLUDED.match_date,
+        player1 = EXCLUDED.player1, player2 = EXCLUDED.player2,
+        score = EXCLUDED.score, winner = EXCLUDED.winner
+    WHERE (d.tournament, d.status, d.round, d.start_time, d.match_date, d.player1, d.player2, d.score, d.winner)
+          IS DISTINCT FROM
+          (EXCLUDED.tournament, EXCLUDED.status, EXCLUDED.round, EXCLUDED.start_time, EXCLUDED.match_date,
+           EXCLUDED.player1, EXCLUDED.player2, EXCLUDED.score, EXCLUDED.winner)
+    RETURNING d.id, d.tournament, d.status, d.start_time, d.match_date, d.player1, d.player2, d.score, d.winner
+)
+SELECT up.*, old.id IS NULL AS inserted,
+       old.id IS NOT NULL AND (old.status, old.winner) IS DISTINCT FROM (up.status, up.winner) AS result_changed
+FROM up LEFT JOIN old ON old.id = up.id
+"""
+
+
+def configure(database_url: Optional[str]) -> None:
+    global _database_url
+    if database_url and psycopg2 is None:
+        logger.error("❌ DAILY_DIRECT_INGEST needs psycopg2 — direct ingestion disabled")
+        database_url = None
+    _database_url = database_url
+
+def enabled() -> bool:
+    return bool(_database_url)
+
+def _connection():
+    global _conn
+    if _conn is None or _conn.closed:
+        _conn = psycopg2.connect(_database_url, client_encoding="utf8")
+    return _conn
+
+
+def to_db_values(row: list) -> tuple:
+    """
+    Строка DAILY_MATCHES -> значения daily_matches. Те же правила, что у
+    синка бэкенда: LIVE без победителя, есть победитель -> COMPLETED.
+    """
+    m_id, tournament, status, round_name, time_str, p1, p2, score, winner = row[:9]
+    start_time = None
+    try: start_time = datetime.strptime(time_str, "%d.%m.%Y %H:%M")
+    except (TypeError, ValueError): pass
+    status = (status or "").upper()
+    winner = winner if winner in (1, 2) else None
+    if status == "LIVE": winner = None
+    elif winner is not None: status = "COMPLETED"
+    match_date = start_time.date() if start_time else None
+    return (str(m_id), tournament, status, round_name, start_time, match_date, p1, p2, score or "", winner)
+
+def _serialize(row: tuple) -> dict:
+    # Формат services/daily_cache.serialize_match
+    m_id, tournament, status, start_time, _, p1, p2, score, winner = row[:9]
+    return {
+        "id": m_id, "tournament": tournament,
+        "start_time": start_time.strftime("%H:%M") if start_time else "--:--",
+        "status": status, "player1": p1, "player2": p2, "score": score, "winner": winner,
+    }
+
+def _notify(cur, topic: str, event: str, key: str, items: List[dict]) -> None:
+    chunk, size = [], 0
+    for item in items + [None]:
+        item_size = 0 if item is None else len(json.dumps(item, ensure_ascii=False, default=str).encode("utf-8"))
+        if chunk and (item is None or size + item_size > MAX_PAYLOAD):
+            payload = json.dumps({"topic": topic, "event": event, "data": {key: chunk}}, ensure_ascii=False, default=str)
+            cur.execute("SELECT pg_notify(%s, %s)", (LIVE_CHANNEL, payload))
+            chunk, size = [], 0
+        if item is not None:
+            chunk.append(item)
+            size += item_size
+
+
+def ingest(api_map: Dict[str, list], dates_with_data: Iterable[str], overlay: Dict[str, str]) -> Dict[str, int]:
+    """
+    Записывает матчи в БД. overlay — {match_id: "M"/"X"} из таблицы.
+    Возвращает {"upserted", "removed", "rescored"}.
+    """
+    manual = {m_id for m_id, flag in overlay.items() if flag == "M"}
+    excluded = {m_id for m_id, flag in overlay.items() if flag == "X"}
+    values = [to_db_values(row) for m_id, row in api_map.items() if m_id not in manual and m_id not in excluded]
+    keep_ids = list(set(api_map) | manual)
+    full_days = sorted(dates_with_data)
+
+    conn = _connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT set_config('app.change_source', 'sync', true)")
+
+            changed_rows = []
+            if values:
+                changed_rows = execute_values(cur, UPSERT_SQL, values, fetch=True)
+
+            # Пропавшие из API матчи (за полностью полученные дни) и исключённые вручную
+            cur.execute(
+                "SELECT id, match_date FROM daily_matches "
+                "WHERE (match_date = ANY(%s::date[]) AND NOT (id = ANY(%s))) OR id = ANY(%s)",
+                (full_days, keep_ids, list(excluded)),
+            )
+            removed = cur.fetchall()
+            if removed:
+                removed_ids = [r[0] for r in removed]
+                cur.execute("SELECT daily_delete_match_picks(%s)", (removed_ids,))
+                cur.execute("DELETE FROM daily_matches WHERE id = ANY(%s)", (removed_ids,))
+
+            rescored = 0
+            for row in changed_rows:
+                if row[-1]:
+                    cur.execute("SELECT daily_rescore_match(%s)", (row[0],))
+                    rescored += cur.fetchone()[0] or 0
+
+            # LIVE: изменившиеся и удалённые матчи по дням (доставятся при COMMIT)
+            by_day: Dict[str, List[dict]] = {}
+            for row in changed_rows:
+                if row[4] is not None:
+                    by_day.setdefault(row[4].isoformat(), []).append(_serialize(row))
+            removed_by_day: Dict[str, List[dict]] = {}
+            for m_id, day in removed:
+                if day is not None:
+                    removed_by_day.setdefault(day.isoformat(), []).append({"id": m_id})
+            for day in set(by_day) | set(removed_by_day):
+                _notify(cur, f"day:{day}", "matches", "matches", by_day.get(day, []))
+                _notify(cur, f"day:{day}", "removed", "ids", removed_by_day.get(day, []))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    stats = {"upserted": len(changed_rows), "removed": len(removed), "rescored": rescored}
+    if any(stats.values()):
+        logger.info(f"🗄️ Direct ingest: {stats['upserted']} upserted, {stats['removed']} removed, {stats['rescored']} pick(s) rescored")
+    return stats
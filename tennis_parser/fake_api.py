@@ -0,0 +1,69 @@
+"""
+Фейковый Tennis API на записанных фикстурах (офлайн-прогоны и бенчмарки парсера).
+
+Записать фикстуры с боевого API:
+    PYTHONPATH=. TENNIS_API_RECORD_DIR=fixtures python parser_service/main.py
+
+Поднять фейк и направить на него парсер:
+    python -m tennis_parser.fake_api --dir fixtures --port 8089 --latency 0.3 --error-rate 0.1
+    PYTHONPATH=. TENNIS_API_URL=http://127.0.0.1:8089/tennis/ python parser_service/main.py
+
+Нет файла под запрос -> пустой result (как у API на день без матчей).
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from tennis_parser.tennis_api import fixture_name
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - [FAKE API] - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def make_handler(fixtures_dir: str, latency: float, error_rate: float):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            if latency:
+                # Разброс ±50%, чтобы параллельные запросы не приходили строем
+                time.sleep(latency * random.uniform(0.5, 1.5))
+            if error_rate and random.random() < error_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            path = os.path.join(fixtures_dir, fixture_name(params))
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    body = f.read()
+            else:
+                body = json.dumps({"success": 1, "result": []}).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            logger.info(fmt % args)
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Tennis API server")
+    parser.add_argument("--dir", default="fixtures", help="папка с записанными ответами")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="средняя задержка ответа, сек")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 503")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.dir, args.latency, args.error_rate))
+    logger.info(f"Serving {args.dir} on http://127.0.0.1:{args.port}/tennis/")
+    server.serve_forever()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# ЛОКАЛЬНЫЙ КЭШ РАСПИСАНИЯ (ПО ДНЯМ)
+# ==========================================
+# Файл на день: хэш каждого события API (по event_key) + уже обработанная
+# строка для таблицы. Свежий день не запрашивается вовсе; у перекачанного
+# дня через process_matches проходят только новые/изменившиеся события.
+#
+# Свежесть зависит от дня: прошлые почти не меняются, сегодня — часто,
+# live не кэшируется (качается каждый цикл, диффится в памяти).
+# Строки зависят от словаря имён: сменилась версия словаря -> день перекачивается.
+
+CACHE_DIR = os.getenv("FIXTURE_CACHE_DIR", ".fixture_cache")
+
+OLD_TTL = 6 * 3600        # D-2 и раньше
+YESTERDAY_TTL = 30 * 60   # D-1: ночные матчи дописываются после полуночи
+TODAY_TTL = 3 * 60
+FUTURE_TTL = 15 * 60
+
+# Запись дня: {"fetched_at", "dict_version", "hashes": {key: hash}, "rows": {key: row}}
+_memory: Dict[str, dict] = {}
+
+
+def ttl_for(day: str, today: date) -> int:
+    try:
+        d = datetime.strptime(day, "%Y-%m-%d").date()
+    except ValueError:
+        return 0
+    delta = (d - today).days
+    if delta < -1: return OLD_TTL
+    if delta == -1: return YESTERDAY_TTL
+    if delta == 0: return TODAY_TTL
+    return FUTURE_TTL
+
+def event_hash(event: dict) -> str:
+    raw = json.dumps(event, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+def _path(day: str) -> str:
+    return os.path.join(CACHE_DIR, f"fixtures_{day}.json")
+
+
+def get(day: str) -> Optional[dict]:
+    entry = _memory.get(day)
+    if entry is None and os.path.exists(_path(day)):
+        try:
+            with open(_path(day), encoding="utf-8") as f:
+                entry = json.load(f)
+            _memory[day] = entry
+        except Exception as e:
+            logger.warning(f"Fixture cache read failed ({day}): {e}")
+    return entry
+
+def is_fresh(day: str, today: date, dict_version: str) -> bool:
+    entry = get(day)
+    if not entry or entry.get("dict_version") != dict_version:
+        return False
+    return time.time() - entry.get("fetched_at", 0) < ttl_for(day, today)
+
+def rows(day: str) -> List[list]:
+    entry = get(day)
+    return list(entry["rows"].values()) if entry else []
+
+
+def diff_events(
+    events: Iterable[dict],
+    prev: Optional[dict],
+    process: Callable[[List[dict]], List[list]],
+    dict_version: str,
+) -> Tuple[dict, int]:
+    """
+    Новый снимок дня по ответу API. process вызывается только для событий,
+    которых не было или чей хэш поменялся. Возвращает (запись, число изменений).
+    """
+    if not prev or prev.get("dict_version") != dict_version:
+        prev = {"hashes": {}, "rows": {}}
+
+    hashes: Dict[str, str] = {}
+    new_rows: Dict[str, list] = {}
+    to_process = []
+    for event in events:
+        key = str(event.get("event_key"))
+        h = event_hash(event)
+        hashes[key] = h
+        if prev["hashes"].get(key) == h:
+            # Событие не менялось: строка та же (или его отфильтровали и в прошлый раз)
+            if key in prev["rows"]:
+                new_rows[key] = prev["rows"][key]
+        else:
+            to_process.append(event)
+
+    for row in process(to_process) if to_process else []:
+        new_rows[str(row[0])] = row
+
+    removed = len(set(prev["hashes"]) - set(hashes))
+    entry = {"fetched_at": time.time(), "dict_version": dict_version, "hashes": hashes, "rows": new_rows}
+    return entry, len(to_process) + removed
+
+def store(day: str, entry: dict) -> None:
+    _memory[day] = entry
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = _path(day) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, _path(day))
+    except Exception as e:
+        logger.warning(f"Fixture cache write failed ({day}): {e}")
+
+def prune(keep_days: Iterable[str]) -> None:
+    """Удаляет дни, выпавшие из окна синка."""
+    keep = set(keep_days)
+    for day in [d for d in _memory if d not in keep]:
+        del _memory[day]
+    if not os.path.isdir(CACHE_DIR): return
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith("fixtures_") and name.endswith(".json") and name[9:-5] not in keep:
+            try: os.remove(os.path.join(CACHE_DIR, name))
+            except OSError: pass
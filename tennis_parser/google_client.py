@@ -0,0 +1,35 @@
+import json
+import logging
+import os
+from typing import Optional
+
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+
+logger = logging.getLogger(__name__)
+
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+CREDENTIALS_FILE = "google-credentials.json"
+
+
+def get_client(credentials) -> Optional[gspread.Client]:
+    """
+    Клиент gspread: JSON из env (строкой или dict), иначе локальный
+    google-credentials.json. None — авторизоваться нечем или не вышло.
+    """
+    try:
+        if credentials:
+            try:
+                creds_dict = json.loads(credentials) if isinstance(credentials, str) else credentials
+                return gspread.authorize(ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE))
+            except Exception as e:
+                logger.error(f"❌ GOOGLE_CREDENTIALS rejected: {e}")
+
+        if os.path.exists(CREDENTIALS_FILE):
+            return gspread.authorize(ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, SCOPE))
+
+        logger.error("❌ GOOGLE_CREDENTIALS not found in env vars!")
+        return None
+    except Exception as e:
+        logger.error(f"❌ Google Auth Error: {e}")
+        return None
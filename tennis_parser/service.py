@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from tennis_parser import core, daily_sheet_writer, db_ingest, fixture_cache, google_client
+from tennis_parser.tennis_api import fetch_all, latency_summary
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# СИНК API -> DAILY_MATCHES
+# ==========================================
+# Ввод-вывод вокруг core: API, кэш фикстур, запись в таблицу.
+# Один код для parser_service (по расписанию) и бэкенда (ручной /sync).
+# Настройки хост-сервис передаёт через configure() из своего config.py.
+#
+# Адаптеры подменяемые:
+#   fetch(api_key, dates) -> ({дата: события или None}, live или None)  — по умолчанию tennis_api.fetch_all
+#   open_worksheet(name) -> лист gspread или None                        — по умолчанию Google Sheets
+#
+# С DAILY_DIRECT_INGEST матчи дополнительно пишутся прямо в daily_matches (db_ingest),
+# ручные блоки M/X берутся из таблицы как overlay.
+
+TENNIS_API_KEY: Optional[str] = None
+GOOGLE_SHEET_ID: Optional[str] = None
+GOOGLE_CREDENTIALS = None
+
+PLAYER_DICT: Dict[str, str] = {}
+# Версия словаря: обработанные строки в fixture_cache валидны только для неё
+DICT_VERSION = ""
+# Прошлый снимок livescore (диффится в памяти, на диск не пишется)
+_live_entry = None
+# Подпись данных, последними ушедших в таблицу. Те же данные -> таблицу не трогаем,
+# но не дольше FORCE_WRITE_SECONDS (ручные правки в таблице тоже надо перекрывать)
+_last_written = (None, 0.0)
+FORCE_WRITE_SECONDS = 15 * 60
+# Overlay ручных блоков из таблицы (для прямой записи в БД): (данные, время чтения)
+_overlay = ({}, 0.0)
+OVERLAY_TTL = 60
+# Подпись последней удачной записи в БД (api_map + дни + overlay)
+_last_ingested = None
+
+
+def configure(api_key: Optional[str], sheet_id: Optional[str], credentials, database_url: Optional[str] = None) -> None:
+    """database_url — включает прямую запись матчей в БД (db_ingest)."""
+    global TENNIS_API_KEY, GOOGLE_SHEET_ID, GOOGLE_CREDENTIALS
+    TENNIS_API_KEY, GOOGLE_SHEET_ID, GOOGLE_CREDENTIALS = api_key, sheet_id, credentials
+    db_ingest.configure(database_url)
+
+def open_worksheet(name: str):
+    client = google_client.get_client(GOOGLE_CREDENTIALS)
+    if not client: return None
+    return client.open_by_key(GOOGLE_SHEET_ID).worksheet(name)
+
+
+def load_dictionary_from_sheets(open_ws: Callable = None) -> None:
+    global PLAYER_DICT, DICT_VERSION
+    try:
+        ws = (open_ws or open_worksheet)("DICTIONARY")
+        if ws is None: return
+        PLAYER_DICT = core.parse_dictionary(ws.get_all_values())
+        DICT_VERSION = core.dictionary_version(PLAYER_DICT)
+        logger.info(f"📚 Dictionary loaded: {len(PLAYER_DICT)}")
+    except Exception as e:
+        logger.error(f"Dict load error: {e}")
+
+
+def _sheet_overlay(open_ws: Callable = None) -> Dict[str, str]:
+    """Ручные блоки из DAILY_MATCHES, не чаще раза в OVERLAY_TTL."""
+    global _overlay
+    overlay, read_at = _overlay
+    if time.time() - read_at < OVERLAY_TTL:
+        return overlay
+    ws = (open_ws or open_worksheet)("DAILY_MATCHES")
+    if ws is None:
+        raise RuntimeError("DAILY_MATCHES is not reachable")
+    _overlay = (core.sheet_overlay(ws.get_all_values()), time.time())
+    return _overlay[0]
+
+def _ingest(api_map: Dict[str, list], dates_with_data: Set[str], open_ws: Callable = None) -> None:
+    global _last_ingested
+    # Без свежего overlay не пишем: иначе можно затереть матч, который ведут вручную
+    overlay = _sheet_overlay(open_ws)
+    signature = hashlib.md5(
+        json.dumps([sorted(api_map.items()), sorted(dates_with_data), sorted(overlay.items())],
+                   ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+    if signature == _last_ingested: return
+    db_ingest.ingest(api_map, dates_with_data, overlay)
+    _last_ingested = signature
+
+
+def collect(
+    dates: List[str],
+    stale_dates: List[str],
+    fixtures_by_date: Dict[str, Optional[list]],
+    live_raw: Optional[list],
+) -> Tuple[Dict[str, list], Set[str], int]:
+    """
+    Ответы API + кэш фикстур -> (api_map {id: строка}, дни для "чистки", число изменённых событий).
+    Через process_matches идут только новые/изменившиеся события.
+    """
+    global _live_entry
+    process = partial(core.process_matches, player_dict=PLAYER_DICT)
+    api_map: Dict[str, list] = {}
+    dates_with_data: Set[str] = set()
+
+    changed_events = 0
+    for d in dates:
+        raw = fixtures_by_date.get(d)
+        if d in stale_dates and raw is not None:
+            entry, changed = fixture_cache.diff_events(raw, fixture_cache.get(d), process, DICT_VERSION)
+            fixture_cache.store(d, entry)
+            changed_events += changed
+            day_rows = list(entry["rows"].values())
+            fetched_ok = True
+        else:
+            # Свежий кэш или неудачный запрос (тогда — последний удачный снимок)
+            day_rows = fixture_cache.rows(d)
+            fetched_ok = d not in stale_dates
+        if day_rows:
+            # "Чистка" дня по таблице — только если данные дня получены от API
+            if fetched_ok: dates_with_data.add(d)
+            for item in day_rows:
+                api_map[str(item[0])] = item
+    fixture_cache.prune(dates)
+
+    # LIVE
+    if live_raw is not None:
+        _live_entry, changed = fixture_cache.diff_events(live_raw, _live_entry, process, DICT_VERSION)
+        changed_events += changed
+    live_processed = list(_live_entry["rows"].values()) if _live_entry else []
+    if live_processed:
+        logger.info(f"⚡ Live Interceptor: Found {len(live_processed)} active matches")
+        for item in live_processed:
+            api_map[str(item[0])] = item
+
+    return api_map, dates_with_data, changed_events
+
+
+# =========================================================
+# ГЛАВНАЯ ФУНКЦИЯ
+# =========================================================
+def update_google_sheet_from_api(fetch: Callable = None, open_ws: Callable = None) -> Dict[str, float]:
+    """
+    Один цикл синка. Возвращает статистику цикла: время стадий
+    (fetch / process / ingest / sheet, сек), число матчей, live и изменённых событий.
+    """
+    global _last_written, _overlay
+    stats = {
+        "fetch": 0.0, "process": 0.0, "ingest": 0.0, "sheet": 0.0,
+        "matches": 0, "live": 0, "changed": 0, "written": 0,
+        "fetch_errors": 0, "sheet_errors": 0, "ingest_errors": 0,
+    }
+    if not PLAYER_DICT: load_dictionary_from_sheets(open_ws)
+
+    # 1. Даты; свежие в fixture_cache не запрашиваются вовсе
+    dates = core.sync_dates()
+    today = datetime.now().date()
+    stale_dates = [d for d in dates if not fixture_cache.is_fresh(d, today, DICT_VERSION)]
+    logger.info(f"⏳ Syncing Fixtures for {stale_dates} (cached: {len(dates) - len(stale_dates)})")
+
+    # 2. FIXTURES + LIVE: все запросы параллельно
+    started = time.perf_counter()
+    if not TENNIS_API_KEY:
+        logger.error("❌ API Key missing!")
+        fixtures_by_date, live_raw = {}, None
+        stats["fetch_errors"] = 1
+    else:
+        fixtures_by_date, live_raw = (fetch or fetch_all)(TENNIS_API_KEY, stale_dates)
+        logger.info(f"🌐 API latency: {latency_summary()}")
+        # Ни один запрошенный день не пришёл — цикл неудачный (таблица живёт на кэше)
+        if stale_dates and all(fixtures_by_date.get(d) is None for d in stale_dates):
+            logger.error(f"❌ No fixtures fetched for any of {stale_dates}")
+            stats["fetch_errors"] = 1
+    stats["fetch"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    api_map, dates_with_data, changed_events = collect(dates, stale_dates, fixtures_by_date, live_raw)
+    stats["process"] = time.perf_counter() - started
+    stats["matches"] = len(api_map)
+    stats["live"] = sum(1 for row in api_map.values() if row[2] == "LIVE")
+    stats["changed"] = changed_events
+    logger.info(f"📊 Total matches found: {len(api_map)} (changed events: {changed_events})")
+
+    # 3. Прямая запись в БД (если включена) — до таблицы, ради задержки live
+    if db_ingest.enabled() and api_map:
+        started = time.perf_counter()
+        try:
+            _ingest(api_map, dates_with_data, open_ws)
+        except Exception as e:
+            logger.error(f"Direct ingest error: {e}")
+            stats["ingest_errors"] = 1
+        stats["ingest"] = time.perf_counter() - started
+
+    # Safety Brake не нужен: строки удаляются только за дни, которые API отдало целиком
+    if not api_map and not dates:
+        return stats
+
+    signature = hashlib.md5(
+        json.dumps([sorted(api_map.items()), sorted(dates_with_data)], ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+    if signature == _last_written[0] and time.time() - _last_written[1] < FORCE_WRITE_SECONDS:
+        logger.info("💤 No changes since last sheet write. Skipping.")
+        return stats
+
+    started = time.perf_counter()
+    try:
+        ws = (open_ws or open_worksheet)("DAILY_MATCHES")
+        if ws is None:
+            logger.error("Sheet Update Error: DAILY_MATCHES is not available")
+            stats["sheet_errors"] = 1
+            return stats
+        existing_data = ws.get_all_values()
+        _overlay = (core.sheet_overlay(existing_data), time.time())
+
+        # Только изменившиеся ячейки A..I, удаление "Safe Clean", дозапись новых
+        updated, deleted, appended = daily_sheet_writer.write(ws, existing_data, api_map, dates_with_data)
+        logger.info(f"✅ Safe Sync Complete. Ranges updated: {updated}, rows deleted: {deleted}, appended: {appended}")
+        _last_written = (signature, time.time())
+        stats["written"] = 1
+
+    except Exception as e:
+        logger.error(f"Sheet Update Error: {e}")
+        stats["sheet_errors"] = 1
+    finally:
+        stats["sheet"] = time.perf_counter() - started
+    return stats
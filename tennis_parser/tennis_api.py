@@ -0,0 +1,136 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# ASYNC-КЛИЕНТ TENNIS API
+# ==========================================
+# Все даты и livescore качаются параллельно через один пул соединений.
+# Параллельность ограничена, сбои (сеть, 429, 5xx) повторяются с
+# экспоненциальной задержкой и джиттером. Латентность каждого вызова
+# копится в LATENCY и печатается сводкой за цикл.
+#
+# TENNIS_API_URL        — другой адрес API (например, python -m tennis_parser.fake_api)
+# TENNIS_API_RECORD_DIR — сохранять ответы в папку (фикстуры для офлайн-прогонов)
+
+API_URL = os.getenv("TENNIS_API_URL", "https://api.api-tennis.com/tennis/")
+RECORD_DIR = os.getenv("TENNIS_API_RECORD_DIR")
+
+MAX_CONCURRENCY = 4
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+LIMITS = httpx.Limits(max_connections=MAX_CONCURRENCY, max_keepalive_connections=MAX_CONCURRENCY)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Последние N замеров на метод: method -> [(секунды, попыток, ok)]
+LATENCY_WINDOW = 200
+LATENCY: Dict[str, Deque[Tuple[float, int, bool]]] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter: равномерно в [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+def _record(params: dict, payload) -> None:
+    if not RECORD_DIR: return
+    try:
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        name = fixture_name(params)
+        with open(os.path.join(RECORD_DIR, name), "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+    except Exception as e:
+        logger.warning(f"Fixture record failed: {e}")
+
+def fixture_name(params: dict) -> str:
+    """Имя файла фикстуры для запроса: get_fixtures_2026-01-20.json / get_livescore.json"""
+    method = params.get("method", "unknown")
+    day = params.get("date_start")
+    return f"{method}_{day}.json" if day else f"{method}.json"
+
+def _unwrap(data) -> list:
+    if isinstance(data, dict) and "result" in data: return data["result"] or []
+    if isinstance(data, list): return data
+    return []
+
+
+async def _call(client: httpx.AsyncClient, sem: asyncio.Semaphore, params: dict) -> Optional[list]:
+    """
+    Один запрос с повторами. None — запрос так и не удался
+    (в отличие от [] — "API ответило, матчей нет").
+    """
+    method = params["method"]
+    started = time.perf_counter()
+    attempt = 0
+    ok = False
+    try:
+        while True:
+            try:
+                async with sem:
+                    resp = await client.get(API_URL, params=params)
+                if resp.status_code in RETRY_STATUSES:
+                    raise httpx.HTTPStatusError(f"HTTP {resp.status_code}", request=resp.request, response=resp)
+                resp.raise_for_status()
+                payload = resp.json()
+                _record(params, payload)
+                ok = True
+                return _unwrap(payload)
+            except (httpx.TransportError, httpx.HTTPStatusError, ValueError) as e:
+                retryable = not isinstance(e, httpx.HTTPStatusError) or e.response.status_code in RETRY_STATUSES
+                if not retryable or attempt >= MAX_RETRIES:
+                    logger.error(f"API {method} {params.get('date_start', '')} failed after {attempt + 1} attempt(s): {e}")
+                    return None
+                delay = _backoff(attempt)
+                attempt += 1
+                logger.warning(f"API {method} retry {attempt}/{MAX_RETRIES} in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+    finally:
+        LATENCY[method].append((time.perf_counter() - started, attempt + 1, ok))
+
+
+async def fetch_all_async(api_key: str, dates: List[str]) -> Tuple[Dict[str, Optional[list]], Optional[list]]:
+    """
+    Расписание на все даты + livescore одним параллельным заходом.
+    Возвращает ({дата: матчи или None}, live или None).
+    """
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    base = {"APIkey": api_key, "timezone": "Europe/Moscow"}
+    async with httpx.AsyncClient(timeout=TIMEOUT, limits=LIMITS) as client:
+        fixture_calls = [
+            _call(client, sem, dict(base, method="get_fixtures", date_start=d, date_stop=d))
+            for d in dates
+        ]
+        live_call = _call(client, sem, dict(base, method="get_livescore"))
+        results = await asyncio.gather(*fixture_calls, live_call)
+    return dict(zip(dates, results[:-1])), results[-1]
+
+def fetch_all(api_key: str, dates: List[str]) -> Tuple[Dict[str, Optional[list]], Optional[list]]:
+    """Синхронная обёртка (вызывать из потока без запущенного event loop)."""
+    return asyncio.run(fetch_all_async(api_key, dates))
+
+
+def latency_summary() -> str:
+    """Сводка по методам: вызовы, p50/p95/max, повторы, ошибки."""
+    parts = []
+    for method, samples in sorted(LATENCY.items()):
+        if not samples: continue
+        durations = sorted(s[0] for s in samples)
+        p50 = durations[len(durations) // 2]
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        retries = sum(s[1] - 1 for s in samples)
+        errors = sum(1 for s in samples if not s[2])
+        parts.append(
+            f"{method}: n={len(samples)} p50={p50:.2f}s p95={p95:.2f}s max={durations[-1]:.2f}s "
+            f"retries={retries} errors={errors}"
+        )
+    return "; ".join(parts)
@@ -0,0 +1,132 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from tennis_parser import core
+from tennis_parser.bench import load_events
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+PLAYER_DICT = {
+    "jannik sinner": "🇮🇹 Янник Синнер",
+    "carlos alcaraz": "🇪🇸 Карлос Алькарас",
+    "aryna sabalenka": "🇧🇾 Арина Соболенко",
+}
+
+
+# Фильтр process_matches до user-036 (без прекомпиляции и кэша решений по турнирам) —
+# эталон, с которым сверяется текущая версия
+def legacy_process_matches(matches, player_dict):
+    processed = []
+    seen = set()
+    for m in matches:
+        m_id = str(m.get("event_key"))
+
+        q_field = str(m.get("event_qualification", "")).lower()
+        if q_field in ["true", "1"]: continue
+        r_raw = str(m.get("tournament_round", "")).lower()
+        if "qual" in r_raw or "prelim" in r_raw: continue
+
+        t_raw_name = str(m.get("tournament_name", "")).lower()
+        e_type_raw = str(m.get("event_type_type", "")).lower()
+        if any(ex in t_raw_name for ex in core.EXCLUDED_TOURNAMENTS): continue
+        if any(ex in e_type_raw for ex in core.EXCLUDED_TOURNAMENTS): continue
+
+        etype_title = str(m.get("event_type_type", "")).title()
+        if any(b in etype_title for b in core.INVALID_TYPES): continue
+
+        is_singles = "Singles" in etype_title or "United Cup" in etype_title
+        is_major = any(x in etype_title for x in ["Atp", "Wta", "Open", "Slam", "Cup"])
+        if not (is_singles and is_major): continue
+
+        p1_raw = m.get("event_first_player", "")
+        if "/" in p1_raw: continue
+
+        if m_id in seen: continue
+        seen.add(m_id)
+
+        t_clean = (m.get("tournament_name") or "").replace(" Singles", "").strip()
+        if "Wta" in etype_title and "WTA" not in t_clean: t_clean = f"WTA {t_clean}"
+        elif "Atp" in etype_title and "ATP" not in t_clean: t_clean = f"ATP {t_clean}"
+
+        st_raw = str(m.get("event_status", "")).lower()
+        status = "PLANNED"
+        is_api_live = str(m.get("event_live", "0")) == "1"
+
+        if any(x in st_raw for x in ["can", "int", "walk", "w/o"]): status = "CANCELLED"
+        elif any(x in st_raw for x in ["fin", "aft", "ret"]): status = "COMPLETED"
+        elif is_api_live or any(x in st_raw for x in ["live", "set", "game"]): status = "LIVE"
+
+        score_str = core.build_score(m)
+
+        if status == "PLANNED" and score_str:
+            has_digits = any(c.isdigit() for c in score_str)
+            is_not_zero = score_str.strip() != "0-0"
+            if has_digits and is_not_zero:
+                status = "LIVE"
+
+        winner = None
+        if status == "COMPLETED":
+            w = m.get("event_winner", "")
+            if "First" in w or "Home" in w: winner = 1
+            elif "Second" in w or "Away" in w: winner = 2
+
+        d_part = m.get("event_date", "")
+        t_part = m.get("event_time", "")
+        time_str = f"{d_part} {t_part}"
+        try:
+            dt = datetime.strptime(f"{d_part} {t_part}", "%Y-%m-%d %H:%M")
+            time_str = dt.strftime("%d.%m.%Y %H:%M")
+        except: pass
+
+        processed.append([m_id, t_clean, status, core.clean_round(m.get("tournament_round")), time_str,
+                          core.translate(p1_raw, player_dict), core.translate(m.get("event_second_player"), player_dict),
+                          score_str, winner])
+    return processed
+
+
+@pytest.fixture
+def events():
+    return load_events(FIXTURES_DIR)
+
+@pytest.fixture(autouse=True)
+def cold_memo():
+    core._tournament_decisions.clear()
+    yield
+    core._tournament_decisions.clear()
+
+
+def test_matches_legacy_filter(events):
+    expected = legacy_process_matches(events, PLAYER_DICT)
+    assert core.process_matches(events, PLAYER_DICT) == expected
+    # Второй прогон — на тёплом кэше решений
+    assert core.process_matches(events, PLAYER_DICT) == expected
+
+def test_matches_legacy_filter_in_any_order(events):
+    # Кэш решений заполняется в другом порядке — результат не должен зависеть от него
+    reordered = list(reversed(events))
+    assert core.process_matches(reordered, PLAYER_DICT) == legacy_process_matches(reordered, PLAYER_DICT)
+
+def test_accepted_rows(events):
+    rows = {row[0]: row for row in core.process_matches(events, PLAYER_DICT)}
+
+    assert sorted(rows) == ["1001", "1002", "1003", "1004", "1005", "1006", "1007", "1008", "1011", "1022", "1023", "1024"]
+    assert rows["1001"] == ["1001", "ATP Shanghai", "COMPLETED", "QF", "19.10.2026 10:00",
+                            "🇮🇹 Янник Синнер", "🇪🇸 Карлос Алькарас", "6-4, 6-3", 1]
+    assert rows["1002"][2:4] == ["COMPLETED", "SF"] and rows["1002"][7:] == ["6(7)-7(9)", 2]
+    assert rows["1003"][1:3] == ["WTA Wuhan", "LIVE"] and rows["1003"][7] == "6-3 (30:15)"
+    assert rows["1004"][1:4] == ["WTA Tokyo", "PLANNED", "F"]
+    assert rows["1005"][2] == "CANCELLED"
+    assert rows["1006"][2] == "LIVE"
+    assert rows["1007"][2] == "PLANNED"
+    assert rows["1008"][4] == "2026-10-19 TBA"
+    assert rows["1011"][1] == "United Cup"
+    assert rows["1022"][3] == "Round Robin" and rows["1022"][5] == "Unknown Qualifier Winner"
+    assert rows["1023"][7:] == ["4-6, 7-6(5)", 2]
+
+def test_tournament_decision_keeps_event_type():
+    # Один tournament_key, разные типы: одиночка проходит, пары — нет
+    assert core.classify_tournament(2001, "Shanghai", "Atp Singles") == "ATP Shanghai"
+    assert core.classify_tournament(2001, "Shanghai", "Atp Doubles") is None
+    assert core.classify_tournament(2001, "Shanghai", "Atp Singles") == "ATP Shanghai"
@@ -0,0 +1,101 @@
+from tennis_parser.daily_sheet_writer import HEADER, _delete_requests, plan
+
+DAY = "2026-10-19"
+OTHER_DAY = "2026-10-18"
+
+
+def sheet_row(m_id, status="PLANNED", score="", winner="", block="", time="19.10.2026 10:00"):
+    # Таблица отдаёт всё строками
+    return [m_id, "ATP Shanghai", status, "QF", time, "Синнер", "Алькарас", score, winner, block]
+
+def api_row(m_id, status="PLANNED", score="", winner=None, time="19.10.2026 10:00"):
+    return [m_id, "ATP Shanghai", status, "QF", time, "Синнер", "Алькарас", score, winner]
+
+
+def test_unchanged_rows_are_not_written():
+    existing = [HEADER, sheet_row("1", "COMPLETED", "6-4", "1")]
+    # Победитель из API — число, в таблице — строка: это не изменение
+    assert plan(existing, {"1": api_row("1", "COMPLETED", "6-4", 1)}, {DAY}) == ([], [], [])
+
+def test_changed_cells_are_grouped_into_ranges():
+    existing = [HEADER, sheet_row("1"), sheet_row("2", "LIVE", "6-4")]
+    api = {
+        "1": api_row("1", "LIVE", "1-0"),               # C и H — два диапазона
+        "2": api_row("2", "COMPLETED", "6-4, 6-2", 2),  # C и H:I
+    }
+    updates, deletes, appends = plan(existing, api, {DAY})
+    assert updates == [
+        ("C2:C2", [["LIVE"]]),
+        ("H2:H2", [["1-0"]]),
+        ("C3:C3", [["COMPLETED"]]),
+        ("H3:I3", [["6-4, 6-2", 2]]),
+    ]
+    assert deletes == [] and appends == []
+
+def test_manual_block_m_is_left_alone():
+    existing = [HEADER, sheet_row("1", "PLANNED", block="M"), sheet_row("2", block="m")]
+    # Матч 1 есть в API с другими данными, матча 2 в API нет вовсе
+    updates, deletes, appends = plan(existing, {"1": api_row("1", "COMPLETED", "6-4", 1)}, {DAY})
+    assert (updates, deletes, appends) == ([], [], [])
+
+def test_manual_block_x_still_gets_api_data():
+    existing = [HEADER, sheet_row("1", block="X")]
+    updates, deletes, appends = plan(existing, {"1": api_row("1", "LIVE", "3-2")}, {DAY})
+    # Колонка J (флаг) не пишется никогда
+    assert updates == [("C2:C2", [["LIVE"]]), ("H2:H2", [["3-2"]])]
+    assert deletes == [] and appends == []
+
+def test_duplicate_ids_keep_first_row():
+    existing = [HEADER, sheet_row("1"), sheet_row("2"), sheet_row("1", "LIVE")]
+    updates, deletes, appends = plan(existing, {"1": api_row("1"), "2": api_row("2")}, {DAY})
+    assert updates == [] and appends == []
+    assert deletes == [4]
+
+def test_duplicate_ids_on_day_without_data_are_kept():
+    existing = [HEADER, sheet_row("1", time="18.10.2026 12:00"), sheet_row("1", time="18.10.2026 12:00")]
+    assert plan(existing, {}, {DAY}) == ([], [], [])
+
+def test_safe_clean_only_for_days_with_data():
+    existing = [
+        HEADER,
+        sheet_row("1"),                                  # день с данными, матча нет — удалить
+        sheet_row("2", time="18.10.2026 12:00"),         # день без данных — не трогаем
+        sheet_row("3", time="кривая дата"),              # дату не разобрать — не трогаем
+    ]
+    updates, deletes, appends = plan(existing, {}, {DAY})
+    assert deletes == [2]
+    assert plan(existing, {}, {DAY, OTHER_DAY})[1] == [2, 3]
+
+def test_new_matches_appended_in_time_order():
+    existing = [HEADER, sheet_row("1")]
+    api = {
+        "1": api_row("1"),
+        "3": api_row("3", time="19.10.2026 18:00"),
+        "2": api_row("2", "COMPLETED", "6-1", 1, time="19.10.2026 09:00"),
+        "4": api_row("4", time="TBA"),
+    }
+    updates, deletes, appends = plan(existing, api, {DAY})
+    assert [row[0] for row in appends] == ["4", "2", "3"]
+    # None -> пустая ячейка, колонка J пустая
+    assert appends[2][8:] == ["", ""]
+    assert appends[1][8:] == [1, ""]
+
+def test_short_rows_are_padded():
+    existing = [HEADER, ["1", "ATP Shanghai", "PLANNED", "QF", "19.10.2026 10:00", "Синнер", "Алькарас"]]
+    updates, deletes, appends = plan(existing, {"1": api_row("1", "LIVE", "1-0")}, {DAY})
+    assert updates == [("C2:C2", [["LIVE"]]), ("H2:H2", [["1-0"]])]
+
+
+def _ranges(requests):
+    return [(r["deleteDimension"]["range"]["startIndex"], r["deleteDimension"]["range"]["endIndex"]) for r in requests]
+
+def test_delete_requests_merge_adjacent_rows_bottom_up():
+    requests = _delete_requests(7, [2, 3, 4, 7, 9, 10])
+    # Снизу вверх, индексы 0-based, endIndex не включается
+    assert _ranges(requests) == [(8, 10), (6, 7), (1, 4)]
+    assert all(r["deleteDimension"]["range"]["sheetId"] == 7 for r in requests)
+    assert all(r["deleteDimension"]["range"]["dimension"] == "ROWS" for r in requests)
+
+def test_delete_requests_unsorted_input():
+    assert _ranges(_delete_requests(0, [10, 2, 9, 3])) == [(8, 10), (1, 3)]
+    assert _delete_requests(0, []) == []
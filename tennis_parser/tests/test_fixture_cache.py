@@ -0,0 +1,119 @@
+import copy
+import os
+from datetime import datetime
+
+import pytest
+
+from tennis_parser import core, fixture_cache
+from tennis_parser.bench import load_events
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class CountingProcess:
+    """process_matches, который запоминает, какие события ему отдали."""
+
+    def __init__(self, player_dict=None):
+        self.player_dict = player_dict or {}
+        self.calls = []
+
+    def __call__(self, events):
+        self.calls.append([str(e["event_key"]) for e in events])
+        return core.process_matches(events, self.player_dict)
+
+    @property
+    def processed(self):
+        return [key for call in self.calls for key in call]
+
+
+@pytest.fixture
+def events():
+    # Одна версия каждого события, как в ответе API за день
+    unique = {}
+    for event in load_events(FIXTURES_DIR):
+        unique.setdefault(event["event_key"], event)
+    return list(unique.values())
+
+@pytest.fixture
+def first(events):
+    process = CountingProcess()
+    entry, changed = fixture_cache.diff_events(events, None, process, "v1")
+    return entry, changed, process
+
+
+def test_first_fetch_processes_everything(events, first):
+    entry, changed, process = first
+    assert changed == len(events)
+    assert process.calls == [[str(e["event_key"]) for e in events]]
+    assert set(entry["hashes"]) == {str(e["event_key"]) for e in events}
+    # Строки — только у принятых событий
+    assert sorted(entry["rows"]) == sorted(row[0] for row in core.process_matches(events))
+
+def test_unchanged_day_processes_nothing(events, first):
+    entry, _, _ = first
+    process = CountingProcess()
+    again, changed = fixture_cache.diff_events(events, entry, process, "v1")
+    assert changed == 0
+    assert process.calls == []
+    # Отфильтрованные события не обрабатываются повторно и строк не получают
+    assert again["rows"] == entry["rows"]
+
+def test_changed_and_new_events(events, first):
+    entry, _, _ = first
+    updated = copy.deepcopy(events)
+    live = next(e for e in updated if e["event_key"] == 1003)
+    live["event_game_result"] = "40 - 15"
+    filtered = next(e for e in updated if e["event_key"] == 1012)  # Challenger
+    filtered["event_status"] = "Finished"
+    updated.append(dict(live, event_key=1099, event_first_player="Mirra Andreeva"))
+
+    process = CountingProcess()
+    again, changed = fixture_cache.diff_events(updated, entry, process, "v1")
+    assert changed == 3
+    assert sorted(process.processed) == ["1003", "1012", "1099"]
+    assert again["rows"]["1003"][7] == "6-3 (40:15)"
+    assert again["rows"]["1099"][5] == "Mirra Andreeva"
+    assert "1012" not in again["rows"]
+    # Остальные строки взяты из прошлого снимка как есть
+    for key in set(entry["rows"]) - {"1003"}:
+        assert again["rows"][key] is entry["rows"][key]
+
+def test_removed_events(events, first):
+    entry, _, _ = first
+    # Одно принятое и одно отфильтрованное событие пропали из ответа
+    remaining = [e for e in events if e["event_key"] not in (1001, 1013)]
+
+    process = CountingProcess()
+    again, changed = fixture_cache.diff_events(remaining, entry, process, "v1")
+    assert changed == 2
+    assert process.calls == []
+    assert "1001" not in again["rows"] and "1001" not in again["hashes"]
+    assert "1013" not in again["hashes"]
+
+def test_dictionary_version_change_reprocesses_day(events, first):
+    entry, _, _ = first
+    process = CountingProcess({"jannik sinner": "🇮🇹 Янник Синнер"})
+    again, changed = fixture_cache.diff_events(events, entry, process, "v2")
+    assert changed == len(events)
+    assert sorted(process.processed) == sorted(str(e["event_key"]) for e in events)
+    assert again["dict_version"] == "v2"
+    assert again["rows"]["1001"][5] == "🇮🇹 Янник Синнер"
+
+def test_dictionary_version_tracks_content():
+    v1 = core.dictionary_version({"a": "1", "b": "2"})
+    assert core.dictionary_version({"b": "2", "a": "1"}) == v1
+    assert core.dictionary_version({"a": "1", "b": "3"}) != v1
+
+def test_stored_day_is_stale_for_other_dictionary(first, tmp_path, monkeypatch):
+    entry, _, _ = first
+    monkeypatch.setattr(fixture_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(fixture_cache, "_memory", {})
+    today = datetime(2026, 10, 19).date()
+
+    fixture_cache.store("2026-10-19", entry)
+    assert fixture_cache.is_fresh("2026-10-19", today, "v1")
+    assert not fixture_cache.is_fresh("2026-10-19", today, "v2")
+    # После рестарта (пустая память) — то же с диска
+    monkeypatch.setattr(fixture_cache, "_memory", {})
+    assert fixture_cache.is_fresh("2026-10-19", today, "v1")
+    assert not fixture_cache.is_fresh("2026-10-19", today, "v2")